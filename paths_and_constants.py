@@ -29,13 +29,145 @@ PRIVATE_DATA_JSON = BASE_DIR / "data" / "raw" / "private" / "patient_data_and_tr
 PRIVATE_FAISS_DIR = BASE_DIR / "data" / "embeddings" / "private_faiss_index"
 PRIVATE_FAISS_DIR.mkdir(parents=True, exist_ok=True)
 
+PUBLIC_EMBEDDING_PROVIDER = "openai"
 PUBLIC_EMBEDDING_MODEL = "text-embedding-ada-002"
 PUBLIC_EMBEDDING_MODEL_TOKEN_LIMIT_PER_MINUTE = 950_000
 
 
+PRIVATE_EMBEDDING_PROVIDER = "sentence_transformers"
 PRIVATE_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 
-RETRIEVAL_TOP_N = 5
+# FAISS index type built by the embedding scripts: "Flat" (exact), "IVF" or "HNSW"
+PUBLIC_FAISS_INDEX_TYPE = "Flat"
+PRIVATE_FAISS_INDEX_TYPE = "Flat"
+FAISS_IVF_NLIST = None  # None picks about 4 * sqrt(n) centroids
+FAISS_HNSW_M = 32
+FAISS_HNSW_EF_CONSTRUCTION = 200
+
+# Vector encoding: "Flat" (float32), "SQfp16", "SQ8" or "PQ"; compressed indexes keep the
+# original vectors on disk for exact re-ranking of the top candidates
+PUBLIC_FAISS_ENCODING = "Flat"
+PRIVATE_FAISS_ENCODING = "Flat"
+FAISS_PQ_SUBQUANTIZERS = None  # None uses one sub-vector per 16 dimensions
+FAISS_EXACT_RERANK = True
+FAISS_RERANK_FACTOR = 4
+
+# Query-time accuracy/speed trade-off of approximate indexes
+FAISS_NPROBE = 16
+FAISS_EF_SEARCH = 64
+
+# The public index is split into one shard per value of this metadata key (None: one index)
+PUBLIC_SHARD_KEY = "source"
+FAISS_SHARD_SEARCH_THREADS = 4
+
+# Index benchmark: query sample size and the search parameters swept
+BENCHMARK_QUERY_COUNT = 200
+BENCHMARK_NPROBE_VALUES = (1, 4, 16, 64)
+BENCHMARK_EF_SEARCH_VALUES = (16, 32, 64, 128)
+BENCHMARK_ENCODINGS = ("SQfp16", "SQ8", "PQ")
+
+# Retrieval sizes: candidates fetched per index, and chunks kept for the LLM prompt.
+# Indexes in RERANK_INDEXES fetch RETRIEVAL_FETCH_N candidates and keep the
+# RETRIEVAL_KEEP_N best-scored by the cross-encoder; others fetch RETRIEVAL_KEEP_N.
+RETRIEVAL_FETCH_N = 20
+RETRIEVAL_KEEP_N = 5
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"  # None disables re-ranking
+RERANK_INDEXES = ("public",)
+RERANKER_BATCH_SIZE = 32
+
+# Adaptive top-k: results scoring below the similarity threshold of their index, or more
+# than ADAPTIVE_RELATIVE_GAP below the best result, are dropped before re-ranking; the
+# ADAPTIVE_MIN_K best results above the threshold are exempt from the gap cutoff, and at
+# most RETRIEVAL_KEEP_N results are kept per index. Scores are cosine similarities.
+ADAPTIVE_TOP_K = True
+SIMILARITY_THRESHOLDS = {"public": 0.3, "private": 0.2}
+ADAPTIVE_MIN_K = 2
+ADAPTIVE_RELATIVE_GAP = 0.25  # fraction of the best score; None disables the gap cutoff
+
+# Diversity: near-duplicate chunks, e.g. the same paragraph in several yearly editions of
+# the Standards of Care, are dropped from the candidates of DIVERSITY_INDEXES
+DIVERSITY_MODE = "dedup"  # "off", "dedup" (keep the ranking order) or "mmr"
+DIVERSITY_INDEXES = ("public",)
+DIVERSITY_CANDIDATES_N = 40  # candidates de-duplicated before the top results are kept
+DUPLICATE_SIMILARITY_THRESHOLD = 0.95  # cosine similarity
+MMR_LAMBDA = 0.7  # relevance weight of maximal marginal relevance
+
+# Hybrid retrieval: indexes saved with a BM25 index fuse sparse and dense rankings
+RETRIEVAL_MODE = "hybrid"  # "vector" or "hybrid"
+HYBRID_CANDIDATES_N = 20  # candidates taken from each ranking before fusion
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+# Metadata partitions: chunk row ids per value of these fields, used to pre-filter searches
+PARTITIONED_RETRIEVAL = True
+PARTITION_FIELDS = ("population", "source", "year")
+CHILD_AGE_LIMIT = 18
+
+# Structured private retrieval: weighted distance over lab values and categorical fields.
+# "fusion" fuses it with the text embedding ranking, "structured" replaces it, "off" skips it.
+STRUCTURED_RETRIEVAL_MODE = "fusion"
+STRUCTURED_FEATURE_WEIGHTS = {
+    "labs": 1.0,  # per lab, in units of its normal range
+    "gender": 0.5,
+    "ethnicity": 0.25,
+    "co_morbidities": 1.0,
+    "symptoms": 0.5,
+}
+
+CACHE_DIR = BASE_DIR / "data" / "cache"
+# Disk tier bounds of every persistent cache table; the oldest rows are evicted first
+CACHE_DISK_MAX_ENTRIES = 200_000
+CACHE_DISK_MAX_AGE_SECONDS = 30 * 24 * 3600
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embedding_cache.sqlite"
+EMBEDDING_CACHE_MEMORY_SIZE = 4096
+
+RERANK_CACHE_PATH = CACHE_DIR / "rerank_cache.sqlite"
+RERANK_CACHE_MEMORY_SIZE = 8192
+
+COMPLETION_CACHE_PATH = CACHE_DIR / "completion_cache.sqlite"
+COMPLETION_CACHE_MEMORY_SIZE = 1024
+
+# Semantic cache of full `/query` responses: scoped by the exact patient data, then
+# matched by the embedding of the base query
+SEMANTIC_CACHE_INDEX = "public"  # index whose embedding model embeds the base query
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = 0.97
+SEMANTIC_CACHE_TTL_SECONDS = 3600
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+
+# Maximum number of patients summarized concurrently by the `/query/batch` endpoint
+BATCH_SUMMARY_CONCURRENCY = 8
+# Patients embedded and searched together by `/query/batch`; at most two chunks of
+# retrieved patients wait to be summarized and streamed back
+BATCH_RETRIEVAL_CHUNK_SIZE = 32
+
+# Admission control for LLM calls: concurrency limit, bulk lane share and wait queues,
+# for the whole server; each of the UVICORN_WORKERS worker processes enforces its share
+LLM_MAX_CONCURRENCY = 16
+LLM_MAX_BULK_CONCURRENCY = 8
+LLM_MAX_QUEUE_SIZE = {"interactive": 64, "bulk": 256}
+LLM_MAX_QUEUE_WAIT_SECONDS = 30.0
+ADMISSION_RETRY_AFTER_SECONDS = 5
+
+# Sampling CPU profiles of `/query` requests sent with `X-Profile` by an admin
+PROFILE_DIR = LOG_DIR / "profiles"
+PROFILE_SAMPLING_INTERVAL_SECONDS = 0.001
+
+# Memory-map FAISS indexes so uvicorn workers share one copy (docstores are always mapped)
+FAISS_MMAP = True
+
+# Index hot reload: versions kept on disk by the builders and the CURRENT polling interval
+INDEX_VERSIONS_TO_KEEP = 3
+INDEX_RELOAD_POLL_SECONDS = 30  # 0 disables the watcher; reloads can still be triggered by admins
+
+# Admin actions (cache invalidation, search parameters, forced reloads) recorded for the
+# other uvicorn workers, and how often each worker polls for them
+ADMIN_STATE_FILE = CACHE_DIR / "admin_state.json"
+ADMIN_SYNC_POLL_SECONDS = 2  # 0 disables the polling
+
+# Memory report: allocation sites listed and stack depth kept by tracemalloc
+MEMORY_REPORT_TOP_N = 20
+TRACEMALLOC_FRAMES = 5
 
 DEBUG = True
 
@@ -0,0 +1,191 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from paths_and_constants import (
+    BENCHMARK_EF_SEARCH_VALUES,
+    BENCHMARK_ENCODINGS,
+    BENCHMARK_NPROBE_VALUES,
+    BENCHMARK_QUERY_COUNT,
+    FAISS_RERANK_FACTOR,
+    PRIVATE_FAISS_DIR,
+    PUBLIC_FAISS_DIR,
+    RETRIEVAL_KEEP_N,
+)
+from src.logging_config import setup_logger
+from src.rag_pipeline.index_manifest import SHARDS_DIR_NAME, resolve_index_version
+from src.rag_pipeline.index_types import (
+    FLAT,
+    HNSW,
+    IVF,
+    build_index,
+    encoding_report,
+    reconstruct_vectors,
+    recall_at_k,
+    set_search_params,
+)
+
+logger = setup_logger(__name__)
+
+
+def sample_queries(vectors: np.ndarray, count: int, seed: int = 0) -> np.ndarray:
+    """
+    Build benchmark queries by perturbing a random sample of the stored vectors.
+
+    Args:
+        vectors (np.ndarray): Stored vectors of shape (n, d).
+        count (int): Number of queries.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        np.ndarray: float32 queries of shape (count, d).
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)
+    noise = rng.normal(scale=vectors.std() * 0.1, size=(len(rows), vectors.shape[1]))
+    return (vectors[rows] + noise).astype(np.float32)
+
+
+def measure(index: Any, queries: np.ndarray, k: int) -> Dict[str, Any]:
+    """
+    Search one query at a time, as the API does, and record the latency of each search.
+
+    Args:
+        index (Any): The FAISS index.
+        queries (np.ndarray): Queries of shape (count, d).
+        k (int): Number of neighbors per query.
+
+    Returns:
+        Dict[str, Any]: Neighbor ids and p50/p99 latency in milliseconds.
+    """
+    ids, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, row = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids.append(row[0])
+    return {
+        "ids": np.asarray(ids),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def benchmark_index_types(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[Dict[str, Any]]:
+    """
+    Compare Flat, IVF and HNSW indexes on the same vectors and queries.
+
+    IVF is measured for every value of `BENCHMARK_NPROBE_VALUES` and HNSW for every value
+    of `BENCHMARK_EF_SEARCH_VALUES`. Recall is measured against the exact flat search.
+
+    Args:
+        vectors (np.ndarray): Stored vectors of shape (n, d).
+        queries (np.ndarray): Queries of shape (count, d).
+        k (int): Number of neighbors per query.
+
+    Returns:
+        List[Dict[str, Any]]: One row per index type and search parameter.
+    """
+    sweeps: Dict[str, List[Dict[str, Optional[int]]]] = {
+        FLAT: [{}],
+        IVF: [{"nprobe": nprobe} for nprobe in BENCHMARK_NPROBE_VALUES],
+        HNSW: [{"ef_search": ef_search} for ef_search in BENCHMARK_EF_SEARCH_VALUES],
+    }
+    truth = None
+    rows = []
+    for index_type, params_list in sweeps.items():
+        started = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - started
+        for params in params_list:
+            set_search_params(index, **params)
+            result = measure(index, queries, k)
+            if truth is None:
+                truth = result["ids"]
+            rows.append(
+                {
+                    "index_type": index_type,
+                    **params,
+                    "recall_at_k": recall_at_k(truth, result["ids"]),
+                    "p50_ms": result["p50_ms"],
+                    "p99_ms": result["p99_ms"],
+                    "build_seconds": build_seconds,
+                }
+            )
+    return rows
+
+
+def benchmark_encodings(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[Dict[str, Any]]:
+    """
+    Compare compressed vector encodings of a flat index with the float32 original.
+
+    Args:
+        vectors (np.ndarray): Stored vectors of shape (n, d).
+        queries (np.ndarray): Queries of shape (count, d).
+        k (int): Number of neighbors per query.
+
+    Returns:
+        List[Dict[str, Any]]: Compression ratio and recall@k with and without exact
+            re-ranking, one row per encoding in `BENCHMARK_ENCODINGS`.
+    """
+    rows = []
+    for encoding in BENCHMARK_ENCODINGS:
+        index = build_index(vectors, FLAT, encoding)
+        report = encoding_report(vectors, index, queries, k, FAISS_RERANK_FACTOR)
+        rows.append({"encoding": encoding, **report})
+    return rows
+
+
+def format_encoding_report(name: str, rows: List[Dict[str, Any]], k: int) -> str:
+    """Render encoding benchmark rows as a fixed-width table."""
+    lines = [
+        f"{name}: vector encodings, recall@{k} against float32 (rerank x{FAISS_RERANK_FACTOR})",
+        f"{'encoding':<10}{'ratio':>8}{'recall':>10}{'reranked':>10}",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['encoding']:<10}{row['compression_ratio']:>8.1f}"
+            f"{row['recall_at_k']:>10.3f}{row['recall_at_k_reranked']:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+def format_report(name: str, rows: List[Dict[str, Any]], k: int) -> str:
+    """Render benchmark rows as a fixed-width table."""
+    lines = [
+        f"{name}: recall@{k} against Flat, single-query latency",
+        f"{'index':<8}{'param':<16}{'recall':>8}{'p50 ms':>10}{'p99 ms':>10}{'build s':>10}",
+    ]
+    for row in rows:
+        param = ", ".join(f"{key}={row[key]}" for key in ("nprobe", "ef_search") if key in row)
+        lines.append(
+            f"{row['index_type']:<8}{param:<16}{row['recall_at_k']:>8.3f}"
+            f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['build_seconds']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def benchmark_faiss_indexes():
+    """Benchmark index types and encodings on the vectors of the live public and private indexes."""
+    for name, base_dir in (("public", PUBLIC_FAISS_DIR), ("private", PRIVATE_FAISS_DIR)):
+        _, index_dir = resolve_index_version(base_dir)
+        # A sharded index is benchmarked as one index over the vectors of all shards
+        shards_dir = index_dir / SHARDS_DIR_NAME
+        index_paths = sorted(shards_dir.glob("*/index.faiss")) or [index_dir / "index.faiss"]
+        vectors = np.vstack(
+            [reconstruct_vectors(faiss.read_index(str(path))) for path in index_paths]
+        )
+        logger.info(
+            f"Benchmarking {name} index: {len(vectors)} vectors of dimension {vectors.shape[1]}"
+        )
+        queries = sample_queries(vectors, BENCHMARK_QUERY_COUNT)
+        rows = benchmark_index_types(vectors, queries, RETRIEVAL_KEEP_N)
+        print(format_report(name, rows, RETRIEVAL_KEEP_N))
+        rows = benchmark_encodings(vectors, queries, RETRIEVAL_KEEP_N)
+        print(format_encoding_report(name, rows, RETRIEVAL_KEEP_N))
+
+
+if __name__ == "__main__":
+    benchmark_faiss_indexes()
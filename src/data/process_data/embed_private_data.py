@@ -1,11 +1,35 @@
 import json
 
+from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
-from paths_and_constants import PRIVATE_DATA_JSON, DEBUG, PRIVATE_FAISS_DIR, PRIVATE_EMBEDDING_MODEL
+from paths_and_constants import (
+    PRIVATE_DATA_JSON,
+    DEBUG,
+    PRIVATE_FAISS_DIR,
+    PRIVATE_FAISS_INDEX_TYPE,
+    PRIVATE_FAISS_ENCODING,
+    BENCHMARK_QUERY_COUNT,
+    FAISS_RERANK_FACTOR,
+    RETRIEVAL_KEEP_N,
+    PRIVATE_EMBEDDING_MODEL,
+    PRIVATE_EMBEDDING_PROVIDER,
+)
 from src.logging_config import setup_logger
+from src.rag_pipeline.index_manifest import (
+    new_index_version_dir,
+    publish_index_version,
+    write_index_manifest,
+)
+from src.rag_pipeline.index_types import (
+    FLAT,
+    convert_index,
+    encoding_report,
+    save_exact_vectors,
+)
+from src.rag_pipeline.mmap_docstore import save_mmap_index
+from src.rag_pipeline.patient_features import PatientFeatureIndex
 
 logger = setup_logger(__name__)
 
@@ -53,11 +77,16 @@ def load_private_data():
 
 
 def generate_embeddings(documents):
-    model = SentenceTransformer(PRIVATE_EMBEDDING_MODEL)
+    # Same embeddings class the retriever builds from the index manifest
+    model = HuggingFaceEmbeddings(
+        model_name=PRIVATE_EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": 32},
+        show_progress=True,
+    )
     logger.info(f"Generating embeddings using model: {PRIVATE_EMBEDDING_MODEL} ({model})")
     vectorstore = FAISS.from_texts(
         [doc["text"] for doc in tqdm(documents, desc="Embedding texts")],
-        embedding=lambda texts: model.encode(texts, batch_size=32, show_progress_bar=True),
+        embedding=model,
         metadatas=[doc["metadata"] for doc in documents],
     )
     return vectorstore
@@ -65,8 +94,33 @@ def generate_embeddings(documents):
 
 def save_faiss_index(vectorstore):
     logger.info("Saving FAISS index and metadata...")
-    vectorstore.save_local(str(PRIVATE_FAISS_DIR))
-    logger.info(f"Private FAISS index saved to {PRIVATE_FAISS_DIR}")
+    vectors = convert_index(vectorstore, PRIVATE_FAISS_INDEX_TYPE, PRIVATE_FAISS_ENCODING)
+    version_dir = new_index_version_dir(PRIVATE_FAISS_DIR)
+    save_mmap_index(version_dir, vectorstore)
+    # Lab values and categorical fields of each patient, in FAISS row order
+    PatientFeatureIndex.build(
+        vectorstore.docstore.search(vectorstore.index_to_docstore_id[row]).metadata
+        for row in range(vectorstore.index.ntotal)
+    ).save(version_dir)
+    if PRIVATE_FAISS_ENCODING != FLAT:
+        save_exact_vectors(version_dir, vectors)
+        # Stored vectors double as queries: recall loss is measured on their neighbors
+        queries = vectors[:BENCHMARK_QUERY_COUNT]
+        report = encoding_report(
+            vectors, vectorstore.index, queries, RETRIEVAL_KEEP_N, FAISS_RERANK_FACTOR
+        )
+        logger.info(f"{PRIVATE_FAISS_ENCODING} encoding of the private index: {report}")
+    write_index_manifest(
+        version_dir,
+        provider=PRIVATE_EMBEDDING_PROVIDER,
+        model_name=PRIVATE_EMBEDDING_MODEL,
+        dimension=vectorstore.index.d,
+        vector_count=vectorstore.index.ntotal,
+        index_type=PRIVATE_FAISS_INDEX_TYPE,
+        encoding=PRIVATE_FAISS_ENCODING,
+    )
+    publish_index_version(PRIVATE_FAISS_DIR, version_dir)
+    logger.info(f"Private FAISS index saved to {version_dir}")
 
 
 def validate_vector_count(documents, vectorstore):
@@ -1,5 +1,11 @@
 import pickle
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
 
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from tiktoken import encoding_for_model
@@ -7,13 +13,38 @@ from tqdm import tqdm
 
 from paths_and_constants import (
     PUBLIC_EMBEDDING_MODEL,
+    PUBLIC_EMBEDDING_PROVIDER,
     PROCESSED_PUBLIC_DATA_PICKLE,
     DEBUG,
     PUBLIC_EMBEDDING_MODEL_TOKEN_LIMIT_PER_MINUTE,
     PUBLIC_FAISS_DIR,
+    PUBLIC_FAISS_INDEX_TYPE,
+    PUBLIC_FAISS_ENCODING,
+    BENCHMARK_QUERY_COUNT,
+    FAISS_RERANK_FACTOR,
+    RETRIEVAL_KEEP_N,
+    PUBLIC_SHARD_KEY,
 )
 from src.env_config import OPENAI_API_KEY
 from src.logging_config import setup_logger
+from src.rag_pipeline.bm25 import BM25Index
+from src.rag_pipeline.index_manifest import (
+    SHARDS_DIR_NAME,
+    new_index_version_dir,
+    publish_index_version,
+    read_index_manifest,
+    resolve_index_version,
+    write_index_manifest,
+)
+from src.rag_pipeline.index_types import (
+    FLAT,
+    convert_index,
+    encoding_report,
+    reconstruct_vectors,
+    save_exact_vectors,
+)
+from src.rag_pipeline.mmap_docstore import MmapDocstore, save_mmap_index
+from src.rag_pipeline.partitions import PartitionIndex
 
 logger = setup_logger(__name__)
 
@@ -48,11 +79,14 @@ def batch_documents(documents, token_limit):
     return batches
 
 
-def load_processed_data():
-    """Load processed public data for embedding."""
+def load_processed_data(shards: Optional[List[str]] = None):
+    """Load processed public data for embedding, optionally only the documents of some shards."""
     with PROCESSED_PUBLIC_DATA_PICKLE.open("rb") as f:
         documents = pickle.load(f)
 
+    if shards is not None:
+        documents = [doc for doc in documents if shard_name(doc) in shards]
+
     if DEBUG:
         logger.warning("Running in DEBUG mode: Processing only 10 documents.")
         documents = documents[:10]
@@ -77,24 +111,171 @@ def process_batches(batches, embeddings):
     return vectorstore
 
 
-def save_faiss_index(vectorstore):
-    """Save the FAISS index to disk."""
-    vectorstore.save_local(str(PUBLIC_FAISS_DIR))
-    logger.info(f"Embeddings saved to {PUBLIC_FAISS_DIR}.")
+def shard_name(document) -> str:
+    """Name the shard of a document after its `PUBLIC_SHARD_KEY` metadata, safe as a directory."""
+    value = str(document.metadata.get(PUBLIC_SHARD_KEY) or "unknown")
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "unknown"
+
+
+def split_into_shards(vectorstore: FAISS) -> Dict[str, FAISS]:
+    """
+    Split a vector store into one flat vector store per shard, without re-embedding.
+
+    Args:
+        vectorstore (FAISS): Vector store of all documents to shard.
+
+    Returns:
+        Dict[str, FAISS]: Shard vector stores keyed by shard name.
+    """
+    vectors = reconstruct_vectors(vectorstore.index)
+    rows_by_shard: Dict[str, List[int]] = {}
+    for position in range(vectorstore.index.ntotal):
+        document = vectorstore.docstore.search(vectorstore.index_to_docstore_id[position])
+        rows_by_shard.setdefault(shard_name(document), []).append(position)
+
+    shards = {}
+    for name, rows in sorted(rows_by_shard.items()):
+        ids = [vectorstore.index_to_docstore_id[row] for row in rows]
+        index = faiss.IndexFlatL2(vectorstore.index.d)
+        index.add(vectors[rows])
+        docstore = InMemoryDocstore({doc_id: vectorstore.docstore.search(doc_id) for doc_id in ids})
+        shards[name] = FAISS(vectorstore.embedding_function, index, docstore, dict(enumerate(ids)))
+    logger.info(f"Split {len(vectors)} vectors into {len(shards)} shards: {', '.join(shards)}")
+    return shards
+
+
+def save_index_files(index_dir: Path, vectorstore: FAISS):
+    """Convert the index to the configured type and encoding and save it with its manifest."""
+    vectors = convert_index(vectorstore, PUBLIC_FAISS_INDEX_TYPE, PUBLIC_FAISS_ENCODING)
+    save_mmap_index(index_dir, vectorstore)
+    if PUBLIC_FAISS_ENCODING != FLAT:
+        save_exact_vectors(index_dir, vectors)
+        # Stored vectors double as queries: recall loss is measured on their neighbors
+        queries = vectors[:BENCHMARK_QUERY_COUNT]
+        report = encoding_report(
+            vectors, vectorstore.index, queries, RETRIEVAL_KEEP_N, FAISS_RERANK_FACTOR
+        )
+        logger.info(f"{PUBLIC_FAISS_ENCODING} encoding of {index_dir.name}: {report}")
+    write_index_manifest(
+        index_dir,
+        provider=PUBLIC_EMBEDDING_PROVIDER,
+        model_name=PUBLIC_EMBEDDING_MODEL,
+        dimension=vectors.shape[1],
+        vector_count=len(vectors),
+        index_type=PUBLIC_FAISS_INDEX_TYPE,
+        encoding=PUBLIC_FAISS_ENCODING,
+    )
+
+
+def save_sharded_index(version_dir: Path, shards: Dict[str, FAISS], keep: Optional[Path] = None):
+    """
+    Save shards under `version_dir/shards/` and write the manifest of the whole index.
+
+    Args:
+        version_dir (Path): Directory of the new index version.
+        shards (Dict[str, FAISS]): Rebuilt shard vector stores keyed by shard name.
+        keep (Optional[Path]): Shards directory of the live version; its shards that were
+            not rebuilt are copied into the new version unchanged.
 
+    Raises:
+        ValueError: If there are no shards to save.
+    """
+    if not shards:
+        raise ValueError(f"No shards to save in {version_dir}: the vector store is empty.")
+    shards_dir = version_dir / SHARDS_DIR_NAME
+    shards_dir.mkdir()
+    counts = {}
+    for name, shard in shards.items():
+        (shards_dir / name).mkdir()
+        save_index_files(shards_dir / name, shard)
+        counts[name] = shard.index.ntotal
+    if keep is not None:
+        for old_shard_dir in sorted(keep.iterdir()):
+            if old_shard_dir.is_dir() and old_shard_dir.name not in counts:
+                shutil.copytree(old_shard_dir, shards_dir / old_shard_dir.name)
+                counts[old_shard_dir.name] = read_index_manifest(old_shard_dir)["vector_count"]
+                logger.info(f"Kept shard {old_shard_dir.name} of the live version.")
+    dimension = next(iter(shards.values())).index.d
+    write_index_manifest(
+        version_dir,
+        provider=PUBLIC_EMBEDDING_PROVIDER,
+        model_name=PUBLIC_EMBEDDING_MODEL,
+        dimension=dimension,
+        vector_count=sum(counts.values()),
+        index_type=PUBLIC_FAISS_INDEX_TYPE,
+        encoding=PUBLIC_FAISS_ENCODING,
+        shards=dict(sorted(counts.items())),
+    )
 
-def embed_public_data():
-    """Embed processed public data and save to FAISS."""
-    documents = load_processed_data()
 
-    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+def save_search_indexes(version_dir: Path):
+    """
+    Build the BM25 index and the metadata partitions of a saved version, in FAISS row order.
+
+    The chunks are read back from the saved docstores, so shards kept from the live
+    version are indexed too. Shards are numbered in name order, as the retriever loads them.
+    """
+    shards_dir = version_dir / SHARDS_DIR_NAME
+    if shards_dir.exists():
+        index_dirs = sorted(path for path in shards_dir.iterdir() if path.is_dir())
+    else:
+        index_dirs = [version_dir]
+    documents = []
+    for index_dir in index_dirs:
+        docstore = MmapDocstore(index_dir)
+        documents.extend(docstore.search(row) for row in range(len(docstore)))
+    BM25Index.build(doc.page_content for doc in documents).save(version_dir)
+    PartitionIndex.build(doc.metadata for doc in documents).save(version_dir)
+
+
+def save_faiss_index(vectorstore, shards: Optional[List[str]] = None):
+    """
+    Save the FAISS index as a new version and publish it for the running backend.
+
+    With `PUBLIC_SHARD_KEY` set, the index is saved as one shard per metadata value.
+
+    Args:
+        vectorstore: Vector store of the embedded documents.
+        shards (Optional[List[str]]): Names of the shards that were re-embedded; the other
+            shards are taken from the live version. None saves every shard.
+    """
+    version_dir = new_index_version_dir(PUBLIC_FAISS_DIR)
+    if PUBLIC_SHARD_KEY is None:
+        save_index_files(version_dir, vectorstore)
+    else:
+        keep = None
+        if shards is not None:
+            _, live_dir = resolve_index_version(PUBLIC_FAISS_DIR)
+            keep = live_dir / SHARDS_DIR_NAME
+            if not keep.exists():
+                raise ValueError(f"Live index at {live_dir} is not sharded; rebuild every shard.")
+        save_sharded_index(version_dir, split_into_shards(vectorstore), keep)
+    save_search_indexes(version_dir)
+    publish_index_version(PUBLIC_FAISS_DIR, version_dir)
+    logger.info(f"Embeddings saved to {version_dir}.")
+
+
+def embed_public_data(shards: Optional[List[str]] = None):
+    """
+    Embed processed public data and save to FAISS.
+
+    Args:
+        shards (Optional[List[str]]): Re-embed only the documents of these shards and keep
+            the other shards of the live version. None embeds everything.
+    """
+    documents = load_processed_data(shards)
+
+    embeddings = OpenAIEmbeddings(model=PUBLIC_EMBEDDING_MODEL, openai_api_key=OPENAI_API_KEY)
 
     batches = batch_documents(documents, PUBLIC_EMBEDDING_MODEL_TOKEN_LIMIT_PER_MINUTE)
 
     vectorstore = process_batches(batches, embeddings)
 
-    save_faiss_index(vectorstore)
+    save_faiss_index(vectorstore, shards)
 
 
 if __name__ == "__main__":
-    embed_public_data()
+    import sys
+
+    # Shard names given on the command line are rebuilt; the others are kept
+    embed_public_data(sys.argv[1:] or None)
@@ -13,6 +13,7 @@ from paths_and_constants import (
     METADATA_FILE,
 )
 from src.logging_config import setup_logger
+from src.rag_pipeline.partitions import infer_population
 
 logger = setup_logger(__name__)
 
@@ -59,6 +60,7 @@ def split_documents(splitter, documents, metadata, pdf_file):
         file_metadata = metadata[pdf_file.name]
         chunk.metadata.update(file_metadata)
         chunk.metadata["page"] = chunk.metadata.get("page", 0)
+        chunk.metadata["population"] = infer_population(file_metadata["file_name"])
         unique_id = generate_unique_id(
             source=file_metadata["source"],
             file_name=file_metadata["file_name"],
@@ -7,11 +7,14 @@ from tqdm import tqdm
 
 from paths_and_constants import (
     PROCESSED_PUBLIC_DATA_PICKLE,
-    PUBLIC_FAISS_INDEX_PATH,
+    PUBLIC_FAISS_DIR,
     BASE_DIR,
 )
 from src.env_config import OPENAI_API_KEY
 from src.logging_config import setup_logger
+from src.rag_pipeline.index_manifest import SHARDS_DIR_NAME, resolve_index_version
+from src.rag_pipeline.mmap_docstore import has_mmap_docstore, load_mmap_vectorstore
+from src.rag_pipeline.sharded_index import combine_shards, load_shards
 
 logger = setup_logger(__name__)
 
@@ -27,15 +30,28 @@ def load_processed_data():
 
 
 def load_faiss_index():
-    if not PUBLIC_FAISS_INDEX_PATH.exists():
-        logger.error(f"FAISS index file not found at {PUBLIC_FAISS_INDEX_PATH}")
-        return
+    _, index_dir = resolve_index_version(PUBLIC_FAISS_DIR)
     embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-    vectorstore = FAISS.load_local(
-        str(PUBLIC_FAISS_INDEX_PATH.parent),
-        embeddings=embeddings,
-        allow_dangerous_deserialization=True,
-    )
+    shards_dir = index_dir / SHARDS_DIR_NAME
+    if shards_dir.exists():
+        shards = load_shards(shards_dir, lambda shard_dir: load_mmap_vectorstore(shard_dir))
+        vectorstore = combine_shards(shards, embeddings)
+        logger.info(
+            f"FAISS index loaded from {len(shards)} shards. Vector count: {vectorstore.index.ntotal}"
+        )
+        return vectorstore
+    index_path = index_dir / "index.faiss"
+    if not index_path.exists():
+        logger.error(f"FAISS index file not found at {index_path}")
+        return
+    if has_mmap_docstore(index_dir):
+        vectorstore = load_mmap_vectorstore(index_dir, embeddings)
+    else:
+        vectorstore = FAISS.load_local(
+            str(index_dir),
+            embeddings=embeddings,
+            allow_dangerous_deserialization=True,
+        )
     logger.info(f"FAISS index loaded. Vector count: {vectorstore.index.ntotal}")
     return vectorstore
 
@@ -7,3 +7,6 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_PROJECT_ID = os.getenv("OPENAI_PROJECT_ID")
 BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://localhost:8000")
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+# Number of uvicorn worker processes serving the API, set by the Docker image
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", "1"))
@@ -1,3 +1,5 @@
+import json
+
 import requests
 import streamlit as st
 
@@ -8,6 +10,26 @@ from src.patient_data_params import *
 logger = setup_logger(__name__)
 
 API_URL = f"{BACKEND_API_URL}/query"
+STREAM_API_URL = f"{BACKEND_API_URL}/query/stream"
+
+
+def iter_sse_events(response):
+    """
+    Parse a server-sent events response into (event, data) pairs.
+    """
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            field, _, value = line.partition(":")
+            value = value.lstrip()
+            if field == "event":
+                event = value
+            elif field == "data":
+                data_lines.append(value)
+        elif data_lines:
+            yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+
 
 st.title("Diabetes Treatment Support Chatbot")
 
@@ -147,17 +169,41 @@ if st.button("Submit"):
     patient_data = {k: v for k, v in patient_data.items() if v is not None}
     logger.info(f"Patient data after removing None values: {patient_data}")
 
-    response = requests.post(API_URL, json={"patient_data": patient_data, "base_query": base_query})
-    logger.info(f"API response: {response.json()}")
+    response = requests.post(
+        STREAM_API_URL,
+        json={"patient_data": patient_data, "base_query": base_query},
+        stream=True,
+    )
 
     if response.status_code == 200:
-        data = response.json()
         st.header("Results")
         st.subheader("Public Summary")
-        st.write(data["public_summary"])
+        public_placeholder = st.empty()
+        public_placeholder.info("Retrieving sources...")
         st.subheader("Private Summary")
-        st.write(data["private_summary"])
+        private_placeholder = st.empty()
         st.subheader("Combined Summary")
-        st.write(data["combined_summary"])
+        combined_placeholder = st.empty()
+        combined_summary = ""
+
+        for event, data in iter_sse_events(response):
+            logger.info(f"API stream event: {event}")
+            if event == "sources":
+                public_placeholder.info(
+                    f"Summarizing {len(data['public_sources'])} public sources..."
+                )
+                private_placeholder.info(
+                    f"Summarizing {len(data['private_sources'])} private sources..."
+                )
+            elif event == "public_summary":
+                public_placeholder.write(data["summary"])
+            elif event == "private_summary":
+                private_placeholder.write(data["summary"])
+            elif event == "combined_token":
+                combined_summary += data["token"]
+                combined_placeholder.write(combined_summary)
+            elif event == "error":
+                st.error(data["detail"])
+                break
     else:
         st.error("Error processing query.")
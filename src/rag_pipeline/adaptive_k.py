@@ -0,0 +1,48 @@
+from typing import List, Optional, Sequence
+
+from paths_and_constants import ADAPTIVE_MIN_K, ADAPTIVE_RELATIVE_GAP
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def adaptive_cutoff(
+    scores: Sequence[float],
+    max_k: int,
+    threshold: Optional[float] = None,
+    min_k: int = ADAPTIVE_MIN_K,
+    relative_gap: Optional[float] = ADAPTIVE_RELATIVE_GAP,
+) -> List[int]:
+    """
+    Choose which results to keep from their similarity scores.
+
+    A result is dropped when its score is below `threshold`, or more than `relative_gap`
+    (a fraction of the best score) below the best result. The threshold is absolute, but
+    the `min_k` best-scored results above it are kept whatever the gap, and at most
+    `max_k` are kept. The ranking order is kept, which may differ from score order, e.g.
+    after fusion; `max_k` keeps the first results in that order.
+
+    Args:
+        scores (Sequence[float]): Similarity scores of the ranked results; higher is better.
+        max_k (int): Maximum number of results.
+        threshold (Optional[float]): Minimum score, or None for no minimum.
+        min_k (int): Number of best-scored results above `threshold` exempt from the gap.
+        relative_gap (Optional[float]): Largest relative drop from the best score, or None
+            for no gap cutoff.
+
+    Returns:
+        List[int]: Positions of the kept results, in ranking order.
+    """
+    if not scores:
+        return []
+    minimum = -float("inf") if threshold is None else threshold
+    floor = minimum
+    if relative_gap is not None:
+        best = max(scores)
+        floor = max(floor, best - relative_gap * abs(best))
+    by_score = sorted(range(len(scores)), key=lambda position: -scores[position])
+    exempt = {position for position in by_score[:min_k] if scores[position] >= minimum}
+    kept = [
+        position for position, score in enumerate(scores) if score >= floor or position in exempt
+    ]
+    return kept[:max_k]
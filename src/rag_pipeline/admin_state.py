@@ -0,0 +1,102 @@
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker process, nothing to serialize against
+    fcntl = None
+
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SharedAdminState:
+    """
+    Admin actions shared by every uvicorn worker through a small JSON file.
+
+    An admin request reaches a single worker, which applies the action and records it
+    in the file with a sequence number per action. Every worker polls the file and
+    applies the actions recorded since its last poll, so a cache invalidation, a search
+    parameter change or a forced index reload reaches all workers. The file survives
+    restarts, so workers started later pick up the search parameters in effect.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path (Path): The JSON file shared by the workers.
+        """
+        self.path = path
+        self._seen: Dict[str, int] = {}
+
+    def publish(self, action: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record an action the calling worker has applied, for the other workers.
+
+        Payloads of the same action are merged, so concurrent search parameter changes
+        made on different workers are both kept.
+
+        Args:
+            action (str): Name of the action.
+            payload (Dict[str, Any]): Arguments of the action.
+
+        Returns:
+            Dict[str, Any]: The merged payload now recorded for the action.
+        """
+        with self._locked():
+            state = self._read()
+            entry = state.get(action, {"seq": 0, "payload": {}})
+            entry = {"seq": entry["seq"] + 1, "payload": {**entry["payload"], **payload}}
+            state[action] = entry
+            pending = self.path.with_name(f"{self.path.name}.tmp")
+            pending.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(pending, self.path)
+        self._seen[action] = entry["seq"]
+        return entry["payload"]
+
+    def pending(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Take the actions recorded by other workers since the last call.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: Action names and payloads to apply.
+        """
+        actions = []
+        for action, entry in self._read().items():
+            if entry["seq"] > self._seen.get(action, 0):
+                self._seen[action] = entry["seq"]
+                actions.append((action, entry["payload"]))
+        return actions
+
+    def current(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Mark every recorded action as applied and return their payloads, for a worker
+        that is starting up.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The recorded payload of each action.
+        """
+        return dict(self.pending())
+
+    def _read(self) -> Dict[str, Any]:
+        """Load the recorded actions; a missing or unreadable file records none."""
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read shared admin state {self.path}: {e}")
+            return {}
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize read-modify-writes of the file across worker processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f"{self.path.name}.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
@@ -0,0 +1,205 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+INTERACTIVE_LANE = "interactive"
+BULK_LANE = "bulk"
+LANES = (INTERACTIVE_LANE, BULK_LANE)
+
+# Lane of the request being processed, set by each endpoint
+current_lane: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_lane", default=INTERACTIVE_LANE
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a call cannot be admitted.
+
+    Attributes:
+        status_code (int): 429 when the wait queue is full, 503 when the wait timed out.
+        detail (str): Human-readable reason.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def worker_share(limit: int, workers: int) -> int:
+    """
+    Split a server-wide limit evenly between worker processes.
+
+    Args:
+        limit (int): The limit for the whole server.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The limit each worker enforces, at least 1.
+    """
+    return max(1, limit // max(1, workers))
+
+
+class AdmissionController:
+    """
+    Bounds concurrent LLM calls with a priority semaphore and per-lane wait queues.
+
+    At most `max_concurrency` calls hold a slot at once, and the bulk lane may use at
+    most `max_bulk_concurrency` of them so batch jobs cannot starve interactive users.
+    When a slot frees up, waiting interactive calls are always served first. Each lane
+    has a bounded wait queue; a call arriving at a full queue is rejected at once
+    (429) and a call that waits longer than `max_wait_seconds` is rejected (503).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_bulk_concurrency: int,
+        max_queue_size: Dict[str, int],
+        max_wait_seconds: float,
+    ):
+        """
+        Args:
+            max_concurrency (int): Maximum number of concurrent calls across lanes.
+            max_bulk_concurrency (int): Maximum number of concurrent bulk calls.
+            max_queue_size (Dict[str, int]): Maximum number of waiting calls per lane.
+            max_wait_seconds (float): Maximum time a call may wait for a slot.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_bulk_concurrency = min(max_bulk_concurrency, max_concurrency)
+        self.max_queue_size = max_queue_size
+        self.max_wait_seconds = max_wait_seconds
+        self._active = {lane: 0 for lane in LANES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._metrics = {
+            lane: {"admitted": 0, "rejected": 0, "timed_out": 0, "queue_seconds_total": 0.0}
+            for lane in LANES
+        }
+        self._max_queue_seconds = {lane: 0.0 for lane in LANES}
+
+    def check_capacity(self, lane: str) -> None:
+        """
+        Reject a request up front when its lane's wait queue is already full.
+
+        Args:
+            lane (str): The lane of the request.
+
+        Raises:
+            AdmissionRejected: 429 if the wait queue is full.
+        """
+        if len(self._waiters[lane]) >= self.max_queue_size[lane]:
+            self._metrics[lane]["rejected"] += 1
+            logger.warning(f"Admission queue for the {lane} lane is full. Rejecting request.")
+            raise AdmissionRejected(429, f"The {lane} queue is full. Retry later.")
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold an LLM slot for the duration of the block.
+
+        Args:
+            lane (Optional[str]): The lane of the call. Defaults to `current_lane`.
+
+        Raises:
+            AdmissionRejected: 429 if the wait queue is full, 503 if the wait timed out.
+        """
+        lane = lane or current_lane.get()
+        await self._acquire(lane)
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report active calls, queue lengths and queue-time metrics per lane.
+
+        Returns:
+            Dict[str, Any]: Metrics keyed by lane.
+        """
+        report = {}
+        for lane in LANES:
+            metrics = self._metrics[lane]
+            admitted = metrics["admitted"]
+            report[lane] = {
+                **metrics,
+                "active": self._active[lane],
+                "queued": len(self._waiters[lane]),
+                "queue_seconds_avg": metrics["queue_seconds_total"] / admitted if admitted else 0.0,
+                "queue_seconds_max": self._max_queue_seconds[lane],
+            }
+        return report
+
+    def _can_run(self, lane: str) -> bool:
+        """Whether a call in `lane` may take a slot right now."""
+        if sum(self._active.values()) >= self.max_concurrency:
+            return False
+        if lane == BULK_LANE:
+            # Interactive waiters go first, and bulk calls never take every slot
+            return (
+                not self._waiters[INTERACTIVE_LANE]
+                and self._active[BULK_LANE] < self.max_bulk_concurrency
+            )
+        return True
+
+    async def _acquire(self, lane: str) -> None:
+        """Take a slot, waiting in the lane's queue if none is free."""
+        started = time.monotonic()
+        if not self._waiters[lane] and self._can_run(lane):
+            self._admit(lane, started)
+            return
+
+        self.check_capacity(lane)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self._metrics[lane]["timed_out"] += 1
+            logger.warning(f"Call in the {lane} lane timed out waiting for an LLM slot.")
+            raise AdmissionRejected(503, "The service is overloaded. Retry later.")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; give it back
+                self._active[lane] -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+        self._record_wait(lane, started)
+
+    def _admit(self, lane: str, started: float) -> None:
+        """Take a slot immediately."""
+        self._active[lane] += 1
+        self._record_wait(lane, started)
+
+    def _record_wait(self, lane: str, started: float) -> None:
+        """Record the queue time of an admitted call."""
+        waited = time.monotonic() - started
+        self._metrics[lane]["admitted"] += 1
+        self._metrics[lane]["queue_seconds_total"] += waited
+        self._max_queue_seconds[lane] = max(self._max_queue_seconds[lane], waited)
+
+    def _release(self, lane: str) -> None:
+        """Free a slot and hand it to the next eligible waiter."""
+        self._active[lane] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, interactive lane first."""
+        for lane in LANES:
+            while self._waiters[lane] and self._can_run(lane):
+                waiter = self._waiters[lane].popleft()
+                if waiter.done():
+                    continue
+                self._active[lane] += 1
+                waiter.set_result(None)
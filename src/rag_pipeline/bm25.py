@@ -0,0 +1,170 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from paths_and_constants import BM25_B, BM25_K1, RRF_K
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+BM25_INDEX_FILE = "bm25_index.json"
+
+# Keeps drug names, dosages and codes such as "degludec", "10mg", "egfr" or "e11.9" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for the sparse index.
+
+    Args:
+        text (str): Text of a chunk or a query.
+
+    Returns:
+        List[str]: The terms, in order.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index over chunk texts, scored with Okapi BM25.
+
+    Documents are identified by their row in the FAISS index, so sparse and dense
+    results can be fused without a lookup table.
+    """
+
+    def __init__(
+        self,
+        postings: Dict[str, List[List[int]]],
+        doc_lengths: List[int],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ):
+        """
+        Args:
+            postings (Dict[str, List[List[int]]]): `[row, term frequency]` pairs per term.
+            doc_lengths (List[int]): Number of terms of each document, by row.
+            k1 (float): Term frequency saturation.
+            b (float): Strength of the document length normalization.
+        """
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.average_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """
+        Build the index from document texts in FAISS row order.
+
+        Args:
+            texts (Iterable[str]): Document texts, one per FAISS row.
+            k1 (float): Term frequency saturation.
+            b (float): Strength of the document length normalization.
+
+        Returns:
+            BM25Index: The index.
+        """
+        postings: Dict[str, List[List[int]]] = {}
+        doc_lengths = []
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings.setdefault(term, []).append([row, frequency])
+        return cls(postings, doc_lengths, k1, b)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency of a term; never negative."""
+        frequency = len(self.postings.get(term, ()))
+        return math.log((len(self) - frequency + 0.5) / (frequency + 0.5) + 1.0)
+
+    def search(
+        self, query: str, k: int, rows: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Score the documents sharing terms with the query.
+
+        Args:
+            query (str): The query text.
+            k (int): Number of results.
+            rows (Optional[Iterable[int]]): Only score these rows, if given.
+
+        Returns:
+            List[Tuple[int, float]]: Up to `k` `(row, score)` pairs, best first.
+        """
+        allowed = None if rows is None else {int(row) for row in rows}
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for row, frequency in postings:
+                if allowed is not None and row not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[row] / self.average_length
+                score = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[row] = scores.get(row, 0.0) + score
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def save(self, index_dir: Path) -> None:
+        """Save the index as JSON next to the FAISS index."""
+        path = index_dir / BM25_INDEX_FILE
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "k1": self.k1,
+                    "b": self.b,
+                    "doc_lengths": self.doc_lengths,
+                    "postings": self.postings,
+                },
+                f,
+            )
+        logger.info(f"Saved BM25 index of {len(self)} documents and {len(self.postings)} terms.")
+
+    @classmethod
+    def load(cls, index_dir: Path) -> Optional["BM25Index"]:
+        """
+        Load the index saved next to a FAISS index.
+
+        Args:
+            index_dir (Path): Directory of the index version.
+
+        Returns:
+            Optional[BM25Index]: The index, or None if none was built.
+        """
+        path = index_dir / BM25_INDEX_FILE
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["postings"], data["doc_lengths"], data["k1"], data["b"])
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[int]:
+    """
+    Fuse rankings by summing `1 / (k + rank)` for every ranking a document appears in.
+
+    Rank fusion needs no score calibration between BM25 and vector distances.
+
+    Args:
+        rankings (List[List[int]]): Ranked document rows, best first.
+        k (int): Damping constant; larger values flatten the contribution of top ranks.
+
+    Returns:
+        List[int]: Document rows ordered by fused score.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda row: (-scores[row], row))
@@ -0,0 +1,261 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from paths_and_constants import CACHE_DISK_MAX_AGE_SECONDS, CACHE_DISK_MAX_ENTRIES
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class PersistentLRUCache:
+    """
+    Two-tier key/value cache: an in-memory LRU in front of a SQLite table on disk.
+
+    Values are raw bytes so callers decide on their own encoding. Entries evicted from
+    memory stay on disk and are promoted back to memory on the next hit. The disk tier
+    survives restarts; pass `db_path=None` to use the memory tier only.
+
+    Writes never wait on SQLite: `set` only updates memory and queues the entry, and a
+    background thread writes queued entries in batches on its own connection, then
+    evicts rows older than `max_age_seconds` and the oldest rows beyond
+    `max_disk_entries`. Disk reads use one connection per thread and never hold the
+    memory-tier lock; `aget` and `aget_many` run them in a worker thread so event loop
+    callers do not block on SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path],
+        max_memory_entries: int,
+        table: str = "cache",
+        max_disk_entries: Optional[int] = CACHE_DISK_MAX_ENTRIES,
+        max_age_seconds: Optional[float] = CACHE_DISK_MAX_AGE_SECONDS,
+    ):
+        """
+        Args:
+            db_path (Optional[Path]): SQLite database file for the disk tier, or None.
+            max_memory_entries (int): Maximum number of entries kept in memory.
+            table (str): Table name, so several caches can share one database file.
+            max_disk_entries (Optional[int]): Maximum number of rows on disk, or None.
+            max_age_seconds (Optional[float]): Lifetime of a row on disk, or None.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.table = table
+        self.max_disk_entries = max_disk_entries
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        # Entries queued for the writer thread, and whether it is writing a batch
+        self._pending: Dict[str, Tuple[bytes, float]] = {}
+        self._writing = False
+        self._write_condition = threading.Condition(self._lock)
+
+        self._db = None
+        self._db_path = db_path
+        self._readers = threading.local()
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                f"(key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)"
+            )
+            self._db.commit()
+            threading.Thread(
+                target=self._write_loop,
+                args=(db_path,),
+                name=f"cache-writer-{table}",
+                daemon=True,
+            ).start()
+            logger.info(f"Opened persistent cache table '{table}' at {db_path}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a key, checking memory first and then disk.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[bytes]: The cached value, or None on a miss.
+        """
+        value = self._get_memory(key)
+        if value is None:
+            value = self._get_disk([key])[key]
+        return value
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """
+        Look up a key like `get`, reading the disk tier in a worker thread.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[bytes]: The cached value, or None on a miss.
+        """
+        return (await self.aget_many([key]))[key]
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, Optional[bytes]]:
+        """
+        Look up several keys, reading every memory miss from disk in one worker thread.
+
+        Args:
+            keys (Sequence[str]): The cache keys.
+
+        Returns:
+            Dict[str, Optional[bytes]]: The cached value of each key, or None on a miss.
+        """
+        found = {key: self._get_memory(key) for key in keys}
+        missing = [key for key, value in found.items() if value is None]
+        if missing and self._db_path is not None:
+            found.update(await asyncio.to_thread(self._get_disk, missing))
+        elif missing:
+            found.update(self._get_disk(missing))
+        return found
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value in memory and queue it for the disk tier.
+
+        Args:
+            key (str): The cache key.
+            value (bytes): The value to store.
+        """
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._pending[key] = (value, time.time())
+                self._write_condition.notify_all()
+
+    def flush(self) -> None:
+        """Wait until every queued entry is written to disk."""
+        with self._write_condition:
+            self._write_condition.wait_for(lambda: not self._pending and not self._writing)
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        self.flush()
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report hit/miss counters and the number of entries held in memory.
+
+        Returns:
+            Dict[str, int]: Counters for memory hits, disk hits, misses and memory size.
+        """
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._memory)}
+
+    def _remember(self, key: str, value: bytes) -> None:
+        """Insert into the memory tier and evict the least recently used entries."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        """Look up a key in memory and in the entries queued for disk."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._memory[key]
+            if key in self._pending:
+                value = self._pending[key][0]
+                self._counters["memory_hits"] += 1
+                self._remember(key, value)
+                return value
+        return None
+
+    def _get_disk(self, keys: Sequence[str]) -> Dict[str, Optional[bytes]]:
+        """Read keys from disk without holding the lock, and promote the hits to memory."""
+        rows: Dict[str, bytes] = {}
+        if self._db_path is not None:
+            reader = self._reader()
+            oldest_allowed = self._oldest_allowed()
+            for key in keys:
+                row = reader.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ? AND created_at >= ?",
+                    (key, oldest_allowed),
+                ).fetchone()
+                if row is not None:
+                    rows[key] = row[0]
+
+        found: Dict[str, Optional[bytes]] = {}
+        with self._lock:
+            for key in keys:
+                if key not in rows:
+                    self._counters["misses"] += 1
+                    found[key] = None
+                    continue
+                self._counters["disk_hits"] += 1
+                # A value set while the disk was read is newer than the row
+                if key not in self._memory:
+                    self._remember(key, rows[key])
+                found[key] = self._memory.get(key, rows[key])
+        return found
+
+    def _reader(self) -> sqlite3.Connection:
+        """Connection of the calling thread for disk reads."""
+        reader = getattr(self._readers, "db", None)
+        if reader is None:
+            reader = sqlite3.connect(str(self._db_path))
+            self._readers.db = reader
+        return reader
+
+    def _oldest_allowed(self) -> float:
+        """Creation time of the oldest row still served from disk."""
+        if self.max_age_seconds is None:
+            return float("-inf")
+        return time.time() - self.max_age_seconds
+
+    def _write_loop(self, db_path: Path) -> None:
+        """Write queued entries in batches and keep the table within its bounds."""
+        db = sqlite3.connect(str(db_path))
+        while True:
+            with self._write_condition:
+                self._write_condition.wait_for(lambda: self._pending)
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            try:
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                    [(key, value, created_at) for key, (value, created_at) in batch.items()],
+                )
+                self._evict(db)
+                db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(batch)} entries to cache '{self.table}': {e}")
+                db.rollback()
+            finally:
+                with self._write_condition:
+                    self._writing = False
+                    self._write_condition.notify_all()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows and the oldest rows beyond `max_disk_entries`."""
+        if self.max_age_seconds is not None:
+            db.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (self._oldest_allowed(),))
+        if self.max_disk_entries is not None:
+            db.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                f"ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
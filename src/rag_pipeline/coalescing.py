@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from src.logging_config import setup_logger
+from tracing import record_cache_event
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same result instead of repeating it. The work runs as its own
+    task, so a cancelled caller (e.g. a disconnected client) does not cancel it for
+    the others.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Name used in log messages and stats.
+        """
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._counters = {"executions": 0, "coalesced": 0}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `func` once per key among concurrent callers.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            func (Callable[[], Awaitable[T]]): Starts the work when no call is in flight.
+
+        Returns:
+            T: The result of the shared execution.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._counters["executions"] += 1
+        else:
+            self._counters["coalesced"] += 1
+            logger.info(f"Coalesced duplicate in-flight {self.name} call.")
+            record_cache_event(f"coalesced_{self.name}", hit=True)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report how many calls ran and how many were coalesced.
+
+        Returns:
+            Dict[str, Any]: Counters and the number of calls currently in flight.
+        """
+        return {**self._counters, "in_flight": len(self._inflight)}
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Remove a finished task so later calls start fresh work."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
@@ -0,0 +1,193 @@
+import hashlib
+import json
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, Optional
+
+from admission import AdmissionController, current_lane
+from cache_store import PersistentLRUCache
+from coalescing import SingleFlight
+from src.logging_config import setup_logger
+from tracing import record_cache_event
+
+logger = setup_logger(__name__)
+
+
+def completion_cache_key(llm: Any, prompt: str) -> str:
+    """
+    Build the content-addressed cache key of a completion.
+
+    Args:
+        llm (Any): The chat model; its `model_name` and `temperature` are part of the key.
+        prompt (str): The prompt sent to the model.
+
+    Returns:
+        str: SHA-256 hex digest of the model name, temperature and prompt.
+    """
+    payload = json.dumps(
+        [getattr(llm, "model_name", None), getattr(llm, "temperature", None), prompt]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Memoizes chat model completions in a `PersistentLRUCache`.
+
+    Identical prompts sent to the same model with the same temperature are answered
+    locally instead of calling the model again. Asynchronous cache misses take a slot
+    from the admission controller, if one is given, before calling the model. Concurrent
+    misses for the same prompt share one call only within an admission lane, so an
+    interactive request never waits behind a bulk call in the bulk lane.
+    """
+
+    def __init__(
+        self,
+        store: PersistentLRUCache,
+        admission: Optional[AdmissionController] = None,
+        on_response: Optional[Callable[[Any, Any], None]] = None,
+    ):
+        """
+        Args:
+            store (PersistentLRUCache): Cache storage for the completions.
+            admission (Optional[AdmissionController]): Bounds concurrent model calls.
+            on_response (Optional[Callable[[Any, Any], None]]): Called with the model and
+                each response message or streamed chunk, e.g. to record token usage.
+        """
+        self.store = store
+        self.admission = admission
+        self.on_response = on_response
+        self.single_flight = SingleFlight("completion")
+
+    def get(self, llm: Any, prompt: str) -> Optional[str]:
+        """
+        Look up a cached completion.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+
+        Returns:
+            Optional[str]: The cached completion, or None on a miss.
+        """
+        value = self.store.get(completion_cache_key(llm, prompt))
+        record_cache_event("completion", hit=value is not None)
+        return value.decode("utf-8") if value is not None else None
+
+    async def aget(self, llm: Any, prompt: str) -> Optional[str]:
+        """
+        Look up a cached completion without blocking the event loop on the disk tier.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+
+        Returns:
+            Optional[str]: The cached completion, or None on a miss.
+        """
+        value = await self.store.aget(completion_cache_key(llm, prompt))
+        record_cache_event("completion", hit=value is not None)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, llm: Any, prompt: str, completion: str) -> None:
+        """
+        Store a completion.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+            completion (str): The completion returned by the model.
+        """
+        self.store.set(completion_cache_key(llm, prompt), completion.encode("utf-8"))
+
+    def invoke(self, llm: Any, prompt: str) -> str:
+        """
+        Return the cached completion of a prompt, calling `llm.invoke` on a miss.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+
+        Returns:
+            str: The completion text.
+        """
+        completion = self.get(llm, prompt)
+        if completion is None:
+            message = llm.invoke(prompt)
+            self._notify(llm, message)
+            completion = message.content
+            self.set(llm, prompt, completion)
+        else:
+            logger.info("Completion served from cache.")
+        return completion
+
+    async def ainvoke(self, llm: Any, prompt: str) -> str:
+        """
+        Return the cached completion of a prompt, awaiting `llm.ainvoke` on a miss.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+
+        Returns:
+            str: The completion text.
+        """
+        completion = await self.aget(llm, prompt)
+        if completion is not None:
+            logger.info("Completion served from cache.")
+            return completion
+
+        async def complete() -> str:
+            async with self._slot():
+                message = await llm.ainvoke(prompt)
+            self._notify(llm, message)
+            result = message.content
+            self.set(llm, prompt, result)
+            return result
+
+        # Concurrent requests in the same lane for the same uncached prompt share one call
+        key = (current_lane.get(), completion_cache_key(llm, prompt))
+        return await self.single_flight.run(key, complete)
+
+    async def astream(self, llm: Any, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream the completion of a prompt, yielding a cached completion as one chunk.
+
+        Args:
+            llm (Any): The chat model.
+            prompt (str): The prompt sent to the model.
+
+        Yields:
+            str: Chunks of the completion text.
+        """
+        completion = await self.aget(llm, prompt)
+        if completion is not None:
+            logger.info("Completion served from cache.")
+            yield completion
+            return
+
+        chunks = []
+        async with self._slot():
+            async for chunk in llm.astream(prompt):
+                self._notify(llm, chunk)
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+        self.set(llm, prompt, "".join(chunks))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache hit and miss counters.
+
+        Returns:
+            Dict[str, int]: Counters from the underlying cache store.
+        """
+        return self.store.stats()
+
+    def _slot(self) -> AsyncContextManager:
+        """Take an admission slot for a model call, or do nothing without a controller."""
+        return self.admission.slot() if self.admission is not None else nullcontext()
+
+    def _notify(self, llm: Any, message: Any) -> None:
+        """Pass a model response to the `on_response` hook, if any."""
+        if self.on_response is not None:
+            self.on_response(llm, message)
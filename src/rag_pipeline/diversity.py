@@ -0,0 +1,85 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from paths_and_constants import DIVERSITY_MODE, DUPLICATE_SIMILARITY_THRESHOLD, MMR_LAMBDA
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+DIVERSITY_MODES = ("off", "dedup", "mmr")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row to unit length, so dot products are cosine similarities.
+
+    Args:
+        matrix (np.ndarray): Vectors of shape (n, d).
+
+    Returns:
+        np.ndarray: float32 unit vectors; zero rows stay zero.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def select_diverse(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    mode: str = DIVERSITY_MODE,
+    mmr_lambda: float = MMR_LAMBDA,
+    duplicate_threshold: float = DUPLICATE_SIMILARITY_THRESHOLD,
+) -> List[Tuple[int, float]]:
+    """
+    Select up to `k` candidates, skipping near-duplicates of the ones already selected.
+
+    All pairwise cosine similarities are computed with one matrix product. In "dedup"
+    mode the candidates are taken in their ranking order and a candidate is dropped when
+    its similarity to a selected one reaches `duplicate_threshold`. In "mmr" mode the
+    next candidate maximizes `mmr_lambda * relevance - (1 - mmr_lambda) * redundancy`
+    (maximal marginal relevance), where redundancy is the highest similarity to a
+    selected candidate; near-duplicates are dropped as well. In "off" mode the first `k`
+    candidates are kept and only scored.
+
+    Args:
+        query (np.ndarray): The query vector.
+        candidates (np.ndarray): Candidate vectors of shape (n, d), in ranking order.
+        k (int): Number of candidates to select.
+        mode (str): One of `DIVERSITY_MODES`.
+        mmr_lambda (float): Relevance weight of maximal marginal relevance, from 0 to 1.
+        duplicate_threshold (float): Cosine similarity from which two chunks are duplicates.
+
+    Returns:
+        List[Tuple[int, float]]: `(candidate position, cosine similarity to the query)`
+            pairs, in selection order.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+    if mode not in DIVERSITY_MODES:
+        raise ValueError(f"Unsupported diversity mode: {mode}")
+    candidates = normalize_rows(candidates)
+    relevance = candidates @ normalize_rows(np.reshape(query, (1, -1)))[0]
+    if mode == "off":
+        return [
+            (position, float(relevance[position])) for position in range(min(k, len(relevance)))
+        ]
+
+    similarity = candidates @ candidates.T
+    redundancy = np.zeros(len(candidates), dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+    while len(selected) < k and available.any():
+        if mode == "mmr":
+            scores = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+            position = int(np.argmax(np.where(available, scores, -np.inf)))
+        else:
+            position = int(np.argmax(available))
+        selected.append((position, float(relevance[position])))
+        redundancy = np.maximum(redundancy, similarity[position])
+        available &= redundancy < duplicate_threshold
+        available[position] = False
+    return selected
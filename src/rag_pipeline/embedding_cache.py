@@ -0,0 +1,157 @@
+import hashlib
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from cache_store import PersistentLRUCache
+from coalescing import SingleFlight
+from src.logging_config import setup_logger
+from tracing import record_cache_event
+
+logger = setup_logger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before it is used as a cache key.
+
+    Args:
+        text (str): Raw text to embed.
+
+    Returns:
+        str: Unicode-normalized text with collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def get_embedding_model_name(embeddings: Embeddings) -> str:
+    """
+    Get the model name of an embeddings object.
+
+    Args:
+        embeddings (Embeddings): A LangChain embeddings object.
+
+    Returns:
+        str: The model name, falling back to the class name when none is exposed.
+    """
+    for attribute in ("model", "model_name"):
+        name = getattr(embeddings, attribute, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings).__name__
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated texts from a `PersistentLRUCache`.
+
+    Cache keys are derived from the wrapped model name and the normalized text, so a
+    cache file can be shared by several models without collisions.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: PersistentLRUCache):
+        """
+        Args:
+            embeddings (Embeddings): The embeddings object to wrap.
+            store (PersistentLRUCache): Cache storage for the vectors.
+        """
+        self.embeddings = embeddings
+        self.store = store
+        self.model_name = get_embedding_model_name(embeddings)
+        self.single_flight = SingleFlight(f"{self.model_name} embedding")
+
+    def cache_key(self, text: str) -> str:
+        """
+        Build the cache key for a text.
+
+        Args:
+            text (str): Raw text to embed.
+
+        Returns:
+            str: SHA-256 hex digest of the model name and normalized text.
+        """
+        payload = f"{self.model_name}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached, missing = self._lookup(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(missing)
+            self._store(missing, vectors, cached)
+        return [cached[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        cached, missing = self._lookup([text])
+        if missing:
+            self._store(missing, [self.embeddings.embed_query(text)], cached)
+        return cached[text]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached, missing = await self._alookup(texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            self._store(missing, vectors, cached)
+        return [cached[text] for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        cached, missing = await self._alookup([text])
+        if not missing:
+            return cached[text]
+
+        async def embed() -> List[float]:
+            vector = await self.embeddings.aembed_query(text)
+            self._store(missing, [vector], cached)
+            return cached[text]
+
+        # Concurrent requests for the same uncached text share one embedding call
+        return await self.single_flight.run(self.cache_key(text), embed)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache hit and miss counters.
+
+        Returns:
+            Dict[str, int]: Counters from the underlying cache store.
+        """
+        return self.store.stats()
+
+    def _lookup(self, texts: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        """Split texts into cached vectors and the unique texts that must be embedded."""
+        keys = {text: self.cache_key(text) for text in texts}
+        return self._split(keys, {key: self.store.get(key) for key in keys.values()})
+
+    async def _alookup(self, texts: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        """Like `_lookup`, without blocking the event loop on the disk tier."""
+        keys = {text: self.cache_key(text) for text in texts}
+        return self._split(keys, await self.store.aget_many(list(keys.values())))
+
+    def _split(
+        self, keys: Dict[str, str], values: Dict[str, Optional[bytes]]
+    ) -> Tuple[Dict[str, List[float]], List[str]]:
+        """Decode the cached vectors of unique texts and list the texts that missed."""
+        cached, missing = {}, []
+        for text, key in keys.items():
+            value = values[key]
+            record_cache_event("embedding", hit=value is not None)
+            if value is None:
+                missing.append(text)
+            else:
+                cached[text] = array("f", value).tolist()
+        return cached, missing
+
+    def _store(
+        self, texts: List[str], vectors: List[List[float]], cached: Dict[str, List[float]]
+    ) -> None:
+        """
+        Persist freshly computed vectors and add them to the lookup result.
+
+        Fresh vectors are returned in the float32 precision they are stored with, so a
+        text gets exactly the same vector on a miss and on later hits.
+        """
+        for text, vector in zip(texts, vectors):
+            encoded = array("f", vector)
+            self.store.set(self.cache_key(text), encoded.tobytes())
+            cached[text] = encoded.tolist()
+        logger.info(f"Embedded {len(texts)} uncached texts with {self.model_name}.")
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from index_manifest import read_index_manifest, resolve_index_version
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class IndexVersion:
+    """
+    A loaded version of an index and the number of requests currently using it.
+    """
+
+    def __init__(self, version: str, vectorstore: Any):
+        self.version = version
+        self.vectorstore = vectorstore
+        self.loaded_at = time.time()
+        self.leases = 0
+        self.retired = False
+
+
+def validate_vectorstore(vectorstore: Any, index_dir: Path) -> None:
+    """
+    Check that a loaded index is consistent before it serves requests.
+
+    Args:
+        vectorstore (Any): The loaded FAISS vector store.
+        index_dir (Path): Directory the index was loaded from.
+
+    Raises:
+        ValueError: If the vector count does not match the docstore size or the manifest.
+    """
+    vector_count = vectorstore.index.ntotal
+    docstore_size = len(vectorstore.index_to_docstore_id)
+    if vector_count != docstore_size:
+        raise ValueError(
+            f"Index at {index_dir} has {vector_count} vectors but {docstore_size} documents."
+        )
+    manifest = read_index_manifest(index_dir)
+    if manifest and manifest.get("vector_count", vector_count) != vector_count:
+        raise ValueError(
+            f"Index at {index_dir} has {vector_count} vectors, but its manifest declares "
+            f"{manifest['vector_count']}."
+        )
+
+
+class IndexManager:
+    """
+    Serves the live version of a FAISS index and swaps in rebuilt versions without a restart.
+
+    Requests take a lease on the current version for as long as they use it. A reload
+    loads and validates the new version in a worker thread while requests keep using
+    the old one, then swaps the reference. The old version is released once its last
+    lease is returned.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        index_dir: Path,
+        loader: Callable[[Path], Any],
+        on_swap: Optional[Callable[[str, Any], None]] = None,
+    ):
+        """
+        Args:
+            name (str): Index name used in log messages and stats.
+            index_dir (Path): Base directory of the index.
+            loader (Callable[[Path], Any]): Loads the vector store saved in a directory.
+            on_swap (Optional[Callable[[str, Any], None]]): Called with the index name and
+                the new vector store after every load, e.g. to invalidate caches.
+        """
+        self.name = name
+        self.index_dir = index_dir
+        self.loader = loader
+        self.on_swap = on_swap
+        self._lock = threading.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._draining: List[IndexVersion] = []
+        self._reloads = {"succeeded": 0, "failed": 0}
+        self._current = self._load(*resolve_index_version(index_dir))
+        self._notify()
+
+    @property
+    def version(self) -> str:
+        """Name of the live version."""
+        return self._current.version
+
+    @property
+    def vectorstore(self) -> Any:
+        """The live vector store, for callers that do not need a lease."""
+        return self._current.vectorstore
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """
+        Use the live version for the duration of the block, even if a reload swaps it.
+
+        Yields:
+            Any: The vector store of the live version.
+        """
+        with self._lock:
+            current = self._current
+            current.leases += 1
+        try:
+            yield current.vectorstore
+        finally:
+            with self._lock:
+                current.leases -= 1
+                drained = current.retired and current.leases == 0
+            if drained:
+                self._release(current)
+
+    async def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Load the version named in CURRENT and swap it in if it differs from the live one.
+
+        Args:
+            force (bool): Reload even if the version did not change.
+
+        Returns:
+            Dict[str, Any]: Whether the index was swapped, and the previous and live versions.
+
+        Raises:
+            Exception: If the new version fails to load or validate; the live version is kept.
+        """
+        async with self._reload_lock:
+            version, version_dir = resolve_index_version(self.index_dir)
+            previous = self._current
+            if version == previous.version and not force:
+                return {"swapped": False, "version": version}
+
+            logger.info(f"Loading {self.name} index version {version} in the background...")
+            try:
+                loaded = await asyncio.to_thread(self._load, version, version_dir)
+            except Exception as e:
+                self._reloads["failed"] += 1
+                logger.error(f"Failed to reload {self.name} index version {version}: {e}")
+                raise
+
+            with self._lock:
+                self._current = loaded
+                previous.retired = True
+                drained = previous.leases == 0
+                if not drained:
+                    self._draining.append(previous)
+            self._reloads["succeeded"] += 1
+            logger.info(f"Swapped {self.name} index from {previous.version} to {version}.")
+            if drained:
+                self._release(previous)
+            self._notify()
+            return {"swapped": True, "previous_version": previous.version, "version": version}
+
+    async def watch(self, interval: float) -> None:
+        """
+        Poll the CURRENT file and reload when it names a new version.
+
+        Args:
+            interval (float): Seconds between polls.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception:
+                # Already logged; keep serving the live version and retry on the next poll
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the live version and the old versions still draining.
+
+        Returns:
+            Dict[str, Any]: Version, vector count, load time, leases and reload counters.
+        """
+        with self._lock:
+            current = self._current
+            return {
+                "version": current.version,
+                "vectors": current.vectorstore.index.ntotal,
+                "loaded_at": current.loaded_at,
+                "leases": current.leases,
+                "draining": [
+                    {"version": old.version, "leases": old.leases} for old in self._draining
+                ],
+                "reloads": dict(self._reloads),
+            }
+
+    def _load(self, version: str, version_dir: Path) -> IndexVersion:
+        """Load and validate one version of the index."""
+        vectorstore = self.loader(version_dir)
+        validate_vectorstore(vectorstore, version_dir)
+        return IndexVersion(version, vectorstore)
+
+    def _release(self, old: IndexVersion) -> None:
+        """Drop the last reference to a retired version once its leases are returned."""
+        with self._lock:
+            if old in self._draining:
+                self._draining.remove(old)
+        old.vectorstore = None
+        logger.info(f"Released {self.name} index version {old.version}.")
+
+    def _notify(self) -> None:
+        """Pass the live vector store to the `on_swap` hook, if any."""
+        if self.on_swap is not None:
+            self.on_swap(self.name, self._current.vectorstore)
@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from paths_and_constants import (
+    INDEX_VERSIONS_TO_KEEP,
+    PRIVATE_EMBEDDING_MODEL,
+    PRIVATE_EMBEDDING_PROVIDER,
+    PUBLIC_EMBEDDING_MODEL,
+    PUBLIC_EMBEDDING_PROVIDER,
+)
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Versioned layout: <index dir>/versions/<version>/ with the live version named in CURRENT
+VERSIONS_DIR_NAME = "versions"
+CURRENT_VERSION_FILE = "CURRENT"
+UNVERSIONED = "unversioned"
+# Sharded versions keep one index per shard in <version>/shards/<shard name>/
+SHARDS_DIR_NAME = "shards"
+
+# Embedding models of indexes saved before manifests existed, keyed by vector dimension
+LEGACY_EMBEDDING_MODELS = {
+    1536: (PUBLIC_EMBEDDING_PROVIDER, PUBLIC_EMBEDDING_MODEL),
+    768: (PRIVATE_EMBEDDING_PROVIDER, PRIVATE_EMBEDDING_MODEL),
+}
+
+
+def write_index_manifest(
+    index_dir: Path,
+    provider: str,
+    model_name: str,
+    dimension: int,
+    vector_count: int,
+    index_type: str = "Flat",
+    encoding: str = "Flat",
+    shards: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Write the manifest describing how a FAISS index was built.
+
+    Args:
+        index_dir (Path): Directory containing the saved FAISS index.
+        provider (str): Embedding provider (e.g., "openai" or "sentence_transformers").
+        model_name (str): Embedding model used to build the index.
+        dimension (int): Dimension of the stored vectors.
+        vector_count (int): Number of vectors in the index.
+        index_type (str): FAISS index type (e.g., "Flat", "IVF" or "HNSW").
+        encoding (str): Vector encoding (e.g., "Flat", "SQ8" or "PQ").
+        shards (Optional[Dict[str, int]]): Vector count of each shard, for sharded indexes.
+
+    Returns:
+        Dict[str, Any]: The manifest that was written.
+    """
+    manifest = {
+        "embedding_provider": provider,
+        "embedding_model": model_name,
+        "dimension": dimension,
+        "vector_count": vector_count,
+        "index_type": index_type,
+        "encoding": encoding,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if shards is not None:
+        manifest["shards"] = shards
+    manifest_path = index_dir / MANIFEST_FILE_NAME
+    with manifest_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    logger.info(f"Index manifest saved to {manifest_path}")
+    return manifest
+
+
+def read_index_manifest(index_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the manifest of a FAISS index.
+
+    Args:
+        index_dir (Path): Directory containing the saved FAISS index.
+
+    Returns:
+        Optional[Dict[str, Any]]: The manifest, or None if the index has none.
+    """
+    manifest_path = index_dir / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return None
+    with manifest_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def infer_legacy_manifest(index_dir: Path, dimension: int) -> Dict[str, Any]:
+    """
+    Infer the manifest of an index saved without one from its vector dimension.
+
+    Args:
+        index_dir (Path): Directory containing the saved FAISS index.
+        dimension (int): Dimension of the stored vectors.
+
+    Returns:
+        Dict[str, Any]: A manifest with the embedding provider and model.
+
+    Raises:
+        ValueError: If no known embedding model produces vectors of this dimension.
+    """
+    if dimension not in LEGACY_EMBEDDING_MODELS:
+        raise ValueError(
+            f"Index at {index_dir} has no {MANIFEST_FILE_NAME} and its dimension "
+            f"({dimension}) does not match a known embedding model."
+        )
+    provider, model_name = LEGACY_EMBEDDING_MODELS[dimension]
+    logger.warning(
+        f"Index at {index_dir} has no {MANIFEST_FILE_NAME}. "
+        f"Assuming {provider} model {model_name} from dimension {dimension}."
+    )
+    return {"embedding_provider": provider, "embedding_model": model_name, "dimension": dimension}
+
+
+def new_index_version_dir(index_dir: Path) -> Path:
+    """
+    Create the directory for a new version of an index.
+
+    Args:
+        index_dir (Path): Base directory of the index.
+
+    Returns:
+        Path: The empty version directory, named after the current UTC time.
+    """
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    version_dir = index_dir / VERSIONS_DIR_NAME / version
+    version_dir.mkdir(parents=True)
+    return version_dir
+
+
+def publish_index_version(
+    index_dir: Path, version_dir: Path, keep: int = INDEX_VERSIONS_TO_KEEP
+) -> None:
+    """
+    Make a saved index version the live one and prune the oldest versions.
+
+    CURRENT is replaced atomically, so readers see either the old or the new version.
+
+    Args:
+        index_dir (Path): Base directory of the index.
+        version_dir (Path): Directory of the fully saved version.
+        keep (int): Number of most recent versions to keep on disk.
+    """
+    pending = index_dir / f"{CURRENT_VERSION_FILE}.tmp"
+    pending.write_text(version_dir.name, encoding="utf-8")
+    os.replace(pending, index_dir / CURRENT_VERSION_FILE)
+    logger.info(f"Published index version {version_dir.name} in {index_dir}")
+
+    versions = sorted(path for path in (index_dir / VERSIONS_DIR_NAME).iterdir() if path.is_dir())
+    for stale in versions[:-keep]:
+        if stale.name != version_dir.name:
+            shutil.rmtree(stale)
+            logger.info(f"Removed old index version {stale.name}")
+
+
+def resolve_index_version(index_dir: Path) -> Tuple[str, Path]:
+    """
+    Find the live version of an index.
+
+    Args:
+        index_dir (Path): Base directory of the index, or the directory of one version.
+
+    Returns:
+        Tuple[str, Path]: The version name and its directory. Indexes saved directly in
+            `index_dir`, without a CURRENT file, are reported as `UNVERSIONED`.
+    """
+    current_file = index_dir / CURRENT_VERSION_FILE
+    if not current_file.exists():
+        return UNVERSIONED, index_dir
+    version = current_file.read_text(encoding="utf-8").strip()
+    return version, index_dir / VERSIONS_DIR_NAME / version
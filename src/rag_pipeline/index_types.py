@@ -0,0 +1,462 @@
+import math
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from paths_and_constants import (
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_M,
+    FAISS_IVF_NLIST,
+    FAISS_PQ_SUBQUANTIZERS,
+)
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+FLAT = "Flat"
+IVF = "IVF"
+HNSW = "HNSW"
+INDEX_TYPES = (FLAT, IVF, HNSW)
+
+# Vector encodings: full float32, float16, 8-bit scalar quantization, product quantization
+SQ_FP16 = "SQfp16"
+SQ8 = "SQ8"
+PQ = "PQ"
+ENCODINGS = (FLAT, SQ_FP16, SQ8, PQ)
+
+# Original float32 vectors kept next to compressed indexes for exact re-ranking
+EXACT_VECTORS_FILE = "vectors.npy"
+
+# FAISS warns below ~39 training points per centroid
+MIN_TRAINING_POINTS_PER_CENTROID = 39
+
+
+def default_nlist(vector_count: int) -> int:
+    """
+    Pick the number of IVF centroids for a corpus size.
+
+    Args:
+        vector_count (int): Number of vectors in the index.
+
+    Returns:
+        int: About 4 * sqrt(n) centroids, capped so each one gets enough training points.
+    """
+    nlist = int(4 * math.sqrt(vector_count))
+    return max(1, min(nlist, vector_count // MIN_TRAINING_POINTS_PER_CENTROID))
+
+
+def encoding_factory_string(encoding: str, vector_count: int, dimension: int) -> str:
+    """
+    Build the `faiss.index_factory` description of a vector encoding.
+
+    PQ uses `FAISS_PQ_SUBQUANTIZERS` sub-vectors (default: one per 16 dimensions) and
+    8-bit codes, or fewer bits when there are too few vectors to train 256 centroids.
+
+    Args:
+        encoding (str): One of `ENCODINGS`.
+        vector_count (int): Number of vectors that will be added.
+        dimension (int): Vector dimension.
+
+    Returns:
+        str: The factory description, e.g. "SQ8" or "PQ96x8".
+
+    Raises:
+        ValueError: If the encoding is unknown or PQ does not divide the dimension.
+    """
+    if encoding in (FLAT, SQ_FP16, SQ8):
+        return encoding
+    if encoding == PQ:
+        subquantizers = FAISS_PQ_SUBQUANTIZERS or max(1, dimension // 16)
+        if dimension % subquantizers:
+            raise ValueError(f"PQ{subquantizers} does not divide dimension {dimension}.")
+        bits = max(1, min(8, int(math.log2(max(vector_count, 2)))))
+        return f"PQ{subquantizers}x{bits}"
+    raise ValueError(f"Unknown vector encoding {encoding!r}; expected one of {ENCODINGS}.")
+
+
+def index_factory_string(
+    index_type: str, vector_count: int, dimension: int, encoding: str = FLAT
+) -> str:
+    """
+    Build the `faiss.index_factory` description of an index type and vector encoding.
+
+    Args:
+        index_type (str): One of `INDEX_TYPES`.
+        vector_count (int): Number of vectors that will be added.
+        dimension (int): Vector dimension.
+        encoding (str): One of `ENCODINGS`.
+
+    Returns:
+        str: The factory description, e.g. "IVF64,Flat", "HNSW32" or "IVF64,SQ8".
+
+    Raises:
+        ValueError: If the index type or encoding is unknown, or HNSW is combined with PQ.
+    """
+    codes = encoding_factory_string(encoding, vector_count, dimension)
+    if index_type == FLAT:
+        return codes
+    if index_type == IVF:
+        return f"IVF{FAISS_IVF_NLIST or default_nlist(vector_count)},{codes}"
+    if index_type == HNSW:
+        if encoding == PQ:
+            raise ValueError("HNSW indexes support Flat and scalar-quantized encodings only.")
+        return f"HNSW{FAISS_HNSW_M}" if encoding == FLAT else f"HNSW{FAISS_HNSW_M},{codes}"
+    raise ValueError(f"Unknown FAISS index type {index_type!r}; expected one of {INDEX_TYPES}.")
+
+
+def build_index(vectors: np.ndarray, index_type: str, encoding: str = FLAT) -> Any:
+    """
+    Build and fill a FAISS index of the given type and encoding, training it if needed.
+
+    Args:
+        vectors (np.ndarray): float32 matrix of shape (n, d).
+        index_type (str): One of `INDEX_TYPES`.
+        encoding (str): One of `ENCODINGS`.
+
+    Returns:
+        Any: The filled FAISS index, using L2 distance like LangChain's flat indexes.
+    """
+    description = index_factory_string(index_type, len(vectors), vectors.shape[1], encoding)
+    index = faiss.index_factory(vectors.shape[1], description, faiss.METRIC_L2)
+    if index_type == HNSW:
+        faiss.downcast_index(index).hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        logger.info(f"Training {description} index on {len(vectors)} vectors...")
+        index.train(vectors)
+    index.add(vectors)
+    logger.info(f"Built {description} index with {index.ntotal} vectors.")
+    return index
+
+
+def reconstruct_vectors(index: Any) -> np.ndarray:
+    """
+    Read every stored vector back from a FAISS index.
+
+    Args:
+        index (Any): A FAISS index that supports reconstruction.
+
+    Returns:
+        np.ndarray: float32 matrix of shape (ntotal, d), in index order.
+    """
+    if hasattr(index, "shards"):
+        return np.vstack([reconstruct_vectors(shard) for shard in index.shards])
+    if isinstance(index, ExactRerankIndex):
+        return np.asarray(index.vectors, dtype=np.float32)
+    enable_reconstruction(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def enable_reconstruction(index: Any) -> None:
+    """
+    Make the stored vectors of an index readable by row id.
+
+    IVF indexes need an id -> list map before vectors can be read back. It is built once,
+    e.g. at load time, so concurrent searches never race on it.
+
+    Args:
+        index (Any): The FAISS index, possibly sharded or re-ranked.
+    """
+    if hasattr(index, "shards"):
+        for shard in index.shards:
+            enable_reconstruction(shard)
+        return
+    if isinstance(index, ExactRerankIndex):
+        return
+    if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        ivf = faiss.extract_index_ivf(index)
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+
+
+def reconstruct_rows(index: Any, rows: Sequence[int]) -> np.ndarray:
+    """
+    Read the stored vectors of some rows back from an index.
+
+    Compressed indexes return their approximate vectors, unless the original vectors
+    were kept for exact re-ranking.
+
+    Args:
+        index (Any): The FAISS index, possibly sharded or re-ranked, with reconstruction
+            enabled.
+        rows (Sequence[int]): Row ids.
+
+    Returns:
+        np.ndarray: float32 matrix of shape (len(rows), d), in the order of `rows`.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    if hasattr(index, "shards"):
+        vectors = np.empty((len(rows), index.d), dtype=np.float32)
+        located = np.array([index.locate(int(row)) for row in rows])
+        for shard in np.unique(located[:, 0]):
+            positions = np.flatnonzero(located[:, 0] == shard)
+            vectors[positions] = reconstruct_rows(index.shards[shard], located[positions, 1])
+        return vectors
+    if isinstance(index, ExactRerankIndex):
+        return np.asarray(index.vectors[rows], dtype=np.float32)
+    return index.reconstruct_batch(rows)
+
+
+def convert_index(vectorstore: Any, index_type: str, encoding: str = FLAT) -> np.ndarray:
+    """
+    Rebuild the index of a vector store as another index type and encoding.
+
+    The row order is kept, so the docstore still matches.
+
+    Args:
+        vectorstore (Any): A LangChain FAISS vector store built with a flat index.
+        index_type (str): One of `INDEX_TYPES`.
+        encoding (str): One of `ENCODINGS`.
+
+    Returns:
+        np.ndarray: The original float32 vectors, in index order.
+    """
+    vectors = reconstruct_vectors(vectorstore.index)
+    if index_type != FLAT or encoding != FLAT:
+        vectorstore.index = build_index(vectors, index_type, encoding)
+    return vectors
+
+
+class ExactRerankIndex:
+    """
+    Re-ranks the candidates of a compressed index by exact L2 distance to the original vectors.
+
+    The compressed index returns `rerank_factor * k` candidates and only their rows are
+    read from the original vectors, which are memory-mapped so they stay on disk until
+    touched. Exposes the `search`, `ntotal` and `d` attributes used by LangChain's FAISS.
+    """
+
+    def __init__(self, base_index: Any, vectors: np.ndarray, rerank_factor: int):
+        """
+        Args:
+            base_index (Any): The compressed FAISS index.
+            vectors (np.ndarray): Original float32 vectors in index order, usually a memmap.
+            rerank_factor (int): Candidates fetched per requested result.
+        """
+        self.base_index = base_index
+        self.vectors = vectors
+        self.rerank_factor = rerank_factor
+
+    @property
+    def ntotal(self) -> int:
+        return self.base_index.ntotal
+
+    @property
+    def d(self) -> int:
+        return self.base_index.d
+
+    @property
+    def code_size(self) -> int:
+        return faiss.downcast_index(self.base_index).code_size
+
+    def search(
+        self, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the compressed index, then re-rank its candidates exactly.
+
+        Args:
+            queries (np.ndarray): float32 queries of shape (n, d).
+            k (int): Number of results per query.
+            rows (Optional[np.ndarray]): Only return these row ids, if given.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Squared L2 distances and ids of shape (n, k),
+                padded with inf and -1 like FAISS.
+        """
+        candidate_count = min(k * self.rerank_factor, self.ntotal)
+        _, candidates = filtered_search(self.base_index, queries, candidate_count, rows)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            ids = np.sort(ids[ids >= 0])
+            exact = ((np.asarray(self.vectors[ids]) - query) ** 2).sum(axis=1)
+            best = np.argsort(exact)[:k]
+            distances[row, : len(best)] = exact[best]
+            labels[row, : len(best)] = ids[best]
+        return distances, labels
+
+    def reconstruct_n(self, start: int, count: int) -> np.ndarray:
+        return np.asarray(self.vectors[start : start + count], dtype=np.float32)
+
+
+def save_exact_vectors(index_dir: Path, vectors: np.ndarray) -> None:
+    """
+    Save the original vectors of a compressed index for exact re-ranking.
+
+    Args:
+        index_dir (Path): Directory of the saved index.
+        vectors (np.ndarray): Original float32 vectors in index order.
+    """
+    np.save(index_dir / EXACT_VECTORS_FILE, vectors.astype(np.float32))
+
+
+def with_exact_rerank(index: Any, index_dir: Path, rerank_factor: int) -> Any:
+    """
+    Wrap an index in `ExactRerankIndex` if its original vectors were saved.
+
+    Args:
+        index (Any): The loaded FAISS index.
+        index_dir (Path): Directory the index was loaded from.
+        rerank_factor (int): Candidates fetched per requested result.
+
+    Returns:
+        Any: The wrapped index, or `index` itself when there are no saved vectors.
+    """
+    vectors_path = index_dir / EXACT_VECTORS_FILE
+    if not vectors_path.exists():
+        return index
+    return ExactRerankIndex(index, np.load(vectors_path, mmap_mode="r"), rerank_factor)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """
+    Compute the mean fraction of the true top-k neighbors that were returned.
+
+    Args:
+        truth (np.ndarray): Exact neighbor ids of shape (queries, k).
+        found (np.ndarray): Returned neighbor ids of shape (queries, k).
+
+    Returns:
+        float: Recall@k averaged over the queries.
+    """
+    hits = [len(set(expected) & set(returned)) for expected, returned in zip(truth, found)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def index_size_bytes(index: Any) -> int:
+    """Size of a FAISS index once serialized, i.e. its on-disk and in-memory footprint."""
+    if isinstance(index, ExactRerankIndex):
+        index = index.base_index
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def encoding_report(
+    vectors: np.ndarray, index: Any, queries: np.ndarray, k: int, rerank_factor: int
+) -> Dict[str, float]:
+    """
+    Measure what a compressed index saves and what it costs in recall.
+
+    Args:
+        vectors (np.ndarray): Original float32 vectors in index order.
+        index (Any): The compressed FAISS index.
+        queries (np.ndarray): float32 queries of shape (n, d).
+        k (int): Number of results per query.
+        rerank_factor (int): Candidates fetched per result for exact re-ranking.
+
+    Returns:
+        Dict[str, float]: Compression ratio against float32 vectors, and recall@k with
+            and without exact re-ranking.
+    """
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    _, found = index.search(queries, k)
+    _, reranked = ExactRerankIndex(index, vectors, rerank_factor).search(queries, k)
+    return {
+        "compression_ratio": vectors.nbytes / index_size_bytes(index),
+        "recall_at_k": recall_at_k(truth, found),
+        "recall_at_k_reranked": recall_at_k(truth, reranked),
+    }
+
+
+def set_search_params(
+    index: Any, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+) -> None:
+    """
+    Set the query-time accuracy/speed trade-off of an approximate index.
+
+    Parameters that do not apply to the index type are ignored.
+
+    Args:
+        index (Any): The FAISS index.
+        nprobe (Optional[int]): Number of IVF lists visited per query.
+        ef_search (Optional[int]): Size of the HNSW candidate list per query.
+    """
+    if hasattr(index, "shards"):
+        for shard in index.shards:
+            set_search_params(shard, nprobe, ef_search)
+        return
+    if isinstance(index, ExactRerankIndex):
+        index = index.base_index
+    index = faiss.downcast_index(index)
+    if nprobe is not None and isinstance(index, faiss.IndexIVF):
+        index.nprobe = nprobe
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def filtered_search(
+    index: Any, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Search an index, optionally only over a subset of its rows.
+
+    The subset is passed to FAISS as an ID selector, so vectors outside it are skipped
+    during the search instead of being filtered out afterwards. The IVF `nprobe` and
+    HNSW `efSearch` set on the index are kept.
+
+    Args:
+        index (Any): The FAISS index, possibly sharded or re-ranked.
+        queries (np.ndarray): float32 queries of shape (n, d).
+        k (int): Number of results per query.
+        rows (Optional[np.ndarray]): Sorted row ids to search, or None for all rows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Distances and ids of shape (n, k), padded with
+            inf and -1 like FAISS.
+    """
+    if rows is None:
+        return index.search(queries, k)
+    if hasattr(index, "shards"):
+        return index.fan_out(
+            lambda shard, shard_index: filtered_search(
+                shard_index, queries, k, index.local_rows(rows, shard)
+            ),
+            k,
+        )
+    if isinstance(index, ExactRerankIndex):
+        return index.search(queries, k, rows)
+    if len(rows) == 0:
+        return (
+            np.full((len(queries), k), np.inf, dtype=np.float32),
+            np.full((len(queries), k), -1, dtype=np.int64),
+        )
+
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(rows, dtype=np.int64))
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=downcast.nprobe)
+    elif isinstance(downcast, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=downcast.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=params)
+
+
+def describe_index(index: Any) -> str:
+    """
+    Name the type of a FAISS index.
+
+    Args:
+        index (Any): The FAISS index.
+
+    Returns:
+        str: One of `INDEX_TYPES`, or the FAISS class name for other indexes.
+    """
+    if hasattr(index, "shards"):
+        types = sorted({describe_index(shard) for shard in index.shards})
+        return f"{'/'.join(types)} x{len(index.shards)} shards"
+    if isinstance(index, ExactRerankIndex):
+        return f"{describe_index(index.base_index)}+rerank"
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIVF):
+        return IVF
+    if isinstance(index, faiss.IndexHNSW):
+        return HNSW
+    if isinstance(index, faiss.IndexFlat):
+        return FLAT
+    return type(index).__name__
@@ -0,0 +1,335 @@
+import gc
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from typing import Any, Dict, List, Optional, Set
+
+from paths_and_constants import MEMORY_REPORT_TOP_N, TRACEMALLOC_FRAMES
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Objects that belong to the interpreter rather than to a component; loggers and their
+# handlers are process-wide too, and reachable from most clients
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    logging.Logger,
+    logging.Handler,
+)
+
+
+def process_rss_bytes() -> int:
+    """
+    Read the resident set size of the current process.
+
+    Returns:
+        int: RSS in bytes, or the peak RSS where /proc is not available.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def tensor_bytes(tensor: Any) -> int:
+    """
+    Compute the memory held by the storage of a torch tensor.
+
+    Args:
+        tensor (Any): The tensor.
+
+    Returns:
+        int: Bytes used by the tensor elements.
+    """
+    return int(tensor.numel() * tensor.element_size())
+
+
+def _is_tensor(obj: Any) -> bool:
+    """Whether an object looks like a torch tensor, without importing torch."""
+    return all(callable(getattr(obj, name, None)) for name in ("numel", "element_size", "data_ptr"))
+
+
+def _is_torch_module(obj: Any) -> bool:
+    """Whether an object looks like a torch module, without importing torch."""
+    return callable(getattr(obj, "parameters", None)) and callable(getattr(obj, "buffers", None))
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[Any]] = None) -> int:
+    """
+    Estimate the memory held by an object and everything it references.
+
+    Classes, modules, functions and loggers are shared by the whole process and are not
+    counted. Pass the same `seen` set to several calls to count objects shared between
+    components (e.g. an HTTP client) only for the first one.
+    `sys.getsizeof` does not see the storage of torch tensors, so the parameters and
+    buffers of torch modules (e.g. the model behind HuggingFaceEmbeddings) are added
+    separately, once per storage.
+
+    Args:
+        obj (Any): The root object.
+        seen (Optional[Set[Any]]): Objects already counted; updated in place.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current, 0)
+        if _is_tensor(current):
+            tensors = [current]
+        elif _is_torch_module(current):
+            tensors = [*current.parameters(), *current.buffers()]
+        else:
+            tensors = []
+        for tensor in tensors:
+            storage = ("storage", tensor.data_ptr())
+            if storage not in seen:
+                seen.add(storage)
+                total += tensor_bytes(tensor)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            if isinstance(slot, str) and hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return total
+
+
+def faiss_index_bytes(index: Any) -> int:
+    """
+    Compute the memory held by a FAISS index.
+
+    Counts the stored vector codes plus the structures around them: the graph links of
+    HNSW indexes, and the ids, coarse quantizer and direct map of IVF indexes. The
+    original vectors of an exact re-rank wrapper are memory-mapped and only paged in
+    when touched, so only the wrapped index is counted.
+
+    Args:
+        index (Any): The FAISS index.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if hasattr(index, "shards"):
+        return sum(faiss_index_bytes(shard) for shard in index.shards)
+    if hasattr(index, "base_index"):
+        return faiss_index_bytes(index.base_index)
+    code_size = getattr(index, "code_size", None) or index.d * 4
+    total = index.ntotal * code_size
+
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        # int32 neighbor ids and levels, int64 offsets into the neighbor table
+        total += hnsw.neighbors.size() * 4 + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8
+
+    if getattr(index, "invlists", None) is not None:
+        # int64 id per vector in the inverted lists
+        total += index.invlists.compute_ntotal() * 8
+        total += faiss_index_bytes(index.quantizer)
+        direct_map = getattr(index, "direct_map", None)
+        if direct_map is not None:
+            total += direct_map.array.size() * 8
+    return int(total)
+
+
+def vectorstore_report(vectorstore: Any, seen: Optional[Set[Any]] = None) -> Dict[str, int]:
+    """
+    Report the memory held by a FAISS vector store, split into vectors and docstore.
+
+    Args:
+        vectorstore (Any): The loaded LangChain FAISS vector store.
+        seen (Optional[Set[Any]]): Objects already counted, see `deep_sizeof`.
+
+    Returns:
+        Dict[str, int]: Vector count, vector bytes and docstore bytes.
+    """
+    docstore = getattr(vectorstore.docstore, "_dict", vectorstore.docstore)
+    if seen is None:
+        seen = set()
+    docstore_bytes = deep_sizeof(docstore, seen) + deep_sizeof(
+        vectorstore.index_to_docstore_id, seen
+    )
+    return {
+        "vectors": vectorstore.index.ntotal,
+        "faiss_vectors_bytes": faiss_index_bytes(vectorstore.index),
+        "docstore_bytes": docstore_bytes,
+    }
+
+
+def memory_report(vectorstores: Dict[str, Any], clients: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Report the resident memory of the process split by component.
+
+    Each object is counted once, for the first component that references it: indexes
+    first, then clients in the given order.
+
+    Args:
+        vectorstores (Dict[str, Any]): Loaded FAISS vector stores keyed by index name.
+        clients (Dict[str, Any]): Embedding and LLM clients keyed by name.
+
+    Returns:
+        Dict[str, Any]: Process RSS, per-index vector and docstore sizes, and client sizes.
+    """
+    gc.collect()
+    seen: Set[Any] = set()
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "indexes": {name: vectorstore_report(store, seen) for name, store in vectorstores.items()},
+        "clients_bytes": {name: deep_sizeof(client, seen) for name, client in clients.items()},
+    }
+
+
+class AllocationTracker:
+    """
+    Diffs tracemalloc snapshots to find allocations that grow over a window of requests.
+
+    `start` takes a baseline snapshot; `diff` compares the current allocations against
+    it. Tracing slows allocation down, so it only runs between `start` and `stop`;
+    tracing started elsewhere (e.g. with `PYTHONTRACEMALLOC`) is left running.
+    """
+
+    def __init__(self, frames: int = TRACEMALLOC_FRAMES):
+        """
+        Args:
+            frames (int): Number of stack frames stored per allocation.
+        """
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_at: Optional[float] = None
+        # Whether `start` turned tracing on, so `stop` may turn it off
+        self._owns_tracing = False
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Whether a window is open."""
+        return self._baseline is not None
+
+    def start(self) -> None:
+        """Start tracing allocations and take the baseline snapshot."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._owns_tracing = True
+            self._baseline = tracemalloc.take_snapshot()
+            self._started_at = time.monotonic()
+        logger.info("Allocation tracking started.")
+
+    def stop(self) -> None:
+        """Stop tracing allocations and drop the baseline."""
+        with self._lock:
+            self._baseline = None
+            self._started_at = None
+            if self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+        logger.info("Allocation tracking stopped.")
+
+    def diff(self, top_n: int = MEMORY_REPORT_TOP_N) -> Dict[str, Any]:
+        """
+        Compare the current allocations against the baseline.
+
+        Args:
+            top_n (int): Number of allocation sites to report.
+
+        Returns:
+            Dict[str, Any]: Window length, traced memory and the top allocation sites
+                sorted by growth.
+
+        Raises:
+            RuntimeError: If no window has been started.
+        """
+        with self._lock:
+            if self._baseline is None:
+                raise RuntimeError("Allocation tracking is not started.")
+            gc.collect()
+            snapshot = tracemalloc.take_snapshot()
+            stats = snapshot.compare_to(self._baseline, "traceback")
+            current, peak = tracemalloc.get_traced_memory()
+            window_seconds = time.monotonic() - self._started_at
+        return {
+            "window_seconds": round(window_seconds, 1),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "top_allocations": [_format_stat(stat) for stat in stats[:top_n]],
+        }
+
+
+def _format_stat(stat: tracemalloc.StatisticDiff) -> Dict[str, Any]:
+    """Describe one allocation site of a snapshot diff."""
+    frames: List[str] = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    return {
+        "location": frames[0] if frames else "<unknown>",
+        "traceback": frames,
+        "size_diff_bytes": stat.size_diff,
+        "size_bytes": stat.size,
+        "count_diff": stat.count_diff,
+    }
+
+
+if __name__ == "__main__":
+    from langchain_openai import ChatOpenAI
+
+    from paths_and_constants import (
+        PRIVATE_FAISS_DIR,
+        PUBLIC_FAISS_DIR,
+        RAG_MODEL_NAME,
+        RETRIEVAL_KEEP_N,
+    )
+    from query_generalizer import generalize_query
+    from retriever import load_faiss_index, retrieve_context
+    from src.env_config import OPENAI_API_KEY
+
+    REQUEST_WINDOW = 20
+
+    rss_before = process_rss_bytes()
+    public_retriever = load_faiss_index(PUBLIC_FAISS_DIR)
+    private_retriever = load_faiss_index(PRIVATE_FAISS_DIR)
+    llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
+
+    report = memory_report(
+        {"public": public_retriever, "private": private_retriever},
+        {
+            "public_embeddings": public_retriever.embedding_function,
+            "private_embeddings": private_retriever.embedding_function,
+            "llm": llm,
+        },
+    )
+    report["rss_before_load_bytes"] = rss_before
+
+    # Allocation growth over a window of retrieval requests
+    tracker = AllocationTracker()
+    tracker.start()
+    query = generalize_query(
+        "Age: 45\nGender: Female\nHbA1c: 8.1%", "What is the recommended treatment?"
+    )
+    for _ in range(REQUEST_WINDOW):
+        retrieve_context(query, public_retriever, private_retriever, RETRIEVAL_KEEP_N)
+    report["allocations"] = tracker.diff()
+    tracker.stop()
+
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,136 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from src.logging_config import setup_logger
+from tracing import current_trace
+
+logger = setup_logger(__name__)
+
+# Buckets from 5 ms (local FAISS search) up to 1 min (long LLM completions)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+# Registry owned by this module rather than the process-wide default, so the module can
+# be imported under both `metrics` and `src.rag_pipeline.metrics` (as the tests do)
+# without registering the same collectors twice
+REGISTRY = CollectorRegistry()
+
+# With several uvicorn workers, prometheus_client keeps every metric in files under this
+# directory (it must be set before the workers start) and `/metrics` aggregates them
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of each RAG pipeline stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total",
+    "Number of RAG pipeline stages that raised an exception.",
+    ["stage"],
+    registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "Tokens consumed by LLM calls.",
+    ["model", "kind"],
+    registry=REGISTRY,
+)
+FAISS_INDEX_VECTORS = Gauge(
+    "rag_faiss_index_vectors",
+    "Number of vectors stored in each FAISS index.",
+    ["index"],
+    registry=REGISTRY,
+    # Every worker loads the same index; report the size it was last set to
+    multiprocess_mode="mostrecent",
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Record the duration of a pipeline stage, and count it as an error if it raises.
+
+    The stage is also added to the current request trace, if any.
+
+    Args:
+        stage (str): Stage name used as the metric label.
+    """
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        STAGE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage=stage).observe(duration)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_stage(stage, duration, error=failed)
+
+
+def record_token_usage(llm: Any, message: Any) -> None:
+    """
+    Count the tokens reported in the usage metadata of an LLM response.
+
+    Args:
+        llm (Any): The chat model that produced the message.
+        message (Any): The response message or streamed chunk.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    model = getattr(llm, "model_name", None) or "unknown"
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    LLM_TOKENS.labels(model=model, kind="input").inc(input_tokens)
+    LLM_TOKENS.labels(model=model, kind="output").inc(output_tokens)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_llm_call(model, input_tokens, output_tokens)
+
+
+def set_index_size(index_name: str, vectorstore: Any) -> None:
+    """
+    Publish the number of vectors in a FAISS index.
+
+    Args:
+        index_name (str): Index name used as the metric label.
+        vectorstore (Any): The loaded FAISS vector store.
+    """
+    FAISS_INDEX_VECTORS.labels(index=index_name).set(vectorstore.index.ntotal)
+
+
+def render_metrics() -> bytes:
+    """
+    Render every metric of this module in the Prometheus text format.
+
+    In multiprocess mode the metrics of every worker process are aggregated: counters
+    and histograms are summed, and index sizes report the most recent value.
+
+    Returns:
+        bytes: The exposition payload.
+    """
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
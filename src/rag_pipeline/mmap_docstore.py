@@ -0,0 +1,203 @@
+import json
+import mmap
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+FAISS_INDEX_FILE = "index.faiss"
+
+# Columnar docstore: each column is a blob of values plus an int64 offsets table
+ID_COLUMN = "docstore_ids"
+TEXT_COLUMN = "docstore_text"
+METADATA_COLUMN = "docstore_metadata"  # distinct metadata values only
+METADATA_CODES_FILE = "docstore_metadata_codes.npy"  # per document: row in METADATA_COLUMN
+
+# Map the index file instead of reading it, so every worker shares the same page cache.
+# FAISS >= 1.10 maps flat codes zero-copy with IO_FLAG_MMAP_IFC; older versions only map
+# inverted lists and read the rest.
+FAISS_MMAP_IO_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | getattr(
+    faiss, "IO_FLAG_READ_ONLY", 0
+)
+
+
+def write_column(index_dir: Path, name: str, values: List[bytes]) -> None:
+    """
+    Write a column of variable-length values as a blob and an offsets table.
+
+    Args:
+        index_dir (Path): Directory of the index.
+        name (str): Column name used as the file name prefix.
+        values (List[bytes]): Encoded values in row order.
+    """
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with (index_dir / f"{name}.bin").open("wb") as f:
+        for row, value in enumerate(values):
+            f.write(value)
+            offsets[row + 1] = offsets[row] + len(value)
+    np.save(index_dir / f"{name}_offsets.npy", offsets)
+
+
+class MmapColumn:
+    """
+    Read-only view of a column written by `write_column`, decoded one row at a time.
+    """
+
+    def __init__(self, index_dir: Path, name: str):
+        """
+        Args:
+            index_dir (Path): Directory of the index.
+            name (str): Column name used as the file name prefix.
+        """
+        self._offsets = np.load(index_dir / f"{name}_offsets.npy", mmap_mode="r")
+        with (index_dir / f"{name}.bin").open("rb") as f:
+            # mmap cannot map an empty file
+            size = int(self._offsets[-1])
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self._blob[int(self._offsets[row]) : int(self._offsets[row + 1])].decode("utf-8")
+
+
+def save_mmap_index(index_dir: Path, vectorstore: FAISS) -> None:
+    """
+    Save a FAISS vector store as `index.faiss` plus a columnar docstore, without pickles.
+
+    Document ids and texts are stored as columns in index order. Metadata is
+    dictionary-encoded: distinct values are stored once and each document keeps the
+    row of its value, since many chunks of the same source share their metadata.
+
+    Args:
+        index_dir (Path): Directory to save the index in.
+        vectorstore (FAISS): The vector store to save.
+    """
+    ids, texts, codes = [], [], []
+    metadata_rows: Dict[str, int] = {}
+    for position in range(vectorstore.index.ntotal):
+        doc_id = vectorstore.index_to_docstore_id[position]
+        document = vectorstore.docstore.search(doc_id)
+        metadata = json.dumps(document.metadata, ensure_ascii=False, sort_keys=True)
+        ids.append(str(doc_id).encode("utf-8"))
+        texts.append(document.page_content.encode("utf-8"))
+        codes.append(metadata_rows.setdefault(metadata, len(metadata_rows)))
+
+    faiss.write_index(vectorstore.index, str(index_dir / FAISS_INDEX_FILE))
+    write_column(index_dir, ID_COLUMN, ids)
+    write_column(index_dir, TEXT_COLUMN, texts)
+    write_column(index_dir, METADATA_COLUMN, [value.encode("utf-8") for value in metadata_rows])
+    np.save(index_dir / METADATA_CODES_FILE, np.asarray(codes, dtype=np.int32))
+    logger.info(
+        f"Saved {len(ids)} documents with {len(metadata_rows)} distinct metadata values "
+        f"to the columnar docstore in {index_dir}"
+    )
+
+
+def has_mmap_docstore(index_dir: Path) -> bool:
+    """Whether a columnar docstore was saved next to the index."""
+    return (index_dir / METADATA_CODES_FILE).exists()
+
+
+class MmapDocstore(Docstore):
+    """
+    Read-only docstore backed by memory-mapped columns.
+
+    Nothing is decoded at load time: a document's id, text and metadata are decoded only
+    when a search hit is returned, and the file pages are shared through the OS page
+    cache by every process that maps them.
+    """
+
+    def __init__(self, index_dir: Path):
+        """
+        Args:
+            index_dir (Path): Directory containing the columnar docstore files.
+        """
+        self._ids = MmapColumn(index_dir, ID_COLUMN)
+        self._texts = MmapColumn(index_dir, TEXT_COLUMN)
+        self._metadata = MmapColumn(index_dir, METADATA_COLUMN)
+        self._metadata_codes = np.load(index_dir / METADATA_CODES_FILE, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search(self, search: Union[int, str]) -> Union[Document, str]:
+        """
+        Decode the document at a position of the index.
+
+        Args:
+            search (Union[int, str]): Position of the document in the FAISS index.
+
+        Returns:
+            Union[Document, str]: The document, or an error message if there is none.
+        """
+        position = int(search)
+        if not 0 <= position < len(self):
+            return f"ID {search} not found."
+        metadata: Dict[str, Any] = json.loads(self._metadata[self._metadata_codes[position]])
+        return Document(
+            id=self._ids[position], page_content=self._texts[position], metadata=metadata
+        )
+
+
+class PositionalIds(Mapping):
+    """
+    Maps FAISS row positions to docstore ids without storing a dict entry per vector.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, position: int) -> int:
+        position = int(position)
+        if not 0 <= position < self._size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def load_mmap_vectorstore(
+    index_dir: Path, embeddings: Optional[Embeddings] = None, mmap_index: bool = True
+) -> FAISS:
+    """
+    Load a FAISS index saved by `save_mmap_index`; no pickle is deserialized.
+
+    Args:
+        index_dir (Path): Directory of the saved FAISS index and columnar docstore.
+        embeddings (Optional[Embeddings]): Embedding model of the vector store.
+        mmap_index (bool): Map the FAISS index read-only instead of reading it into memory.
+
+    Returns:
+        FAISS: The vector store. It cannot be modified.
+    """
+    index_path = str(index_dir / FAISS_INDEX_FILE)
+    index = faiss.read_index(index_path, FAISS_MMAP_IO_FLAGS if mmap_index else 0)
+    docstore = MmapDocstore(index_dir)
+    return FAISS(embeddings, index, docstore, PositionalIds(len(docstore)))
+
+
+if __name__ == "__main__":
+    from index_manifest import resolve_index_version
+    from paths_and_constants import PRIVATE_FAISS_DIR, PUBLIC_FAISS_DIR
+
+    # Convert the pickled docstore of the live version of existing indexes
+    for base_dir in (PUBLIC_FAISS_DIR, PRIVATE_FAISS_DIR):
+        _, index_dir = resolve_index_version(base_dir)
+        vectorstore = FAISS.load_local(str(index_dir), None, allow_dangerous_deserialization=True)
+        save_mmap_index(index_dir, vectorstore)
@@ -0,0 +1,186 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from paths_and_constants import CHILD_AGE_LIMIT, PARTITION_FIELDS
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+PARTITIONS_FILE = "partitions.json"
+
+PREGNANCY = "pregnancy"
+CHILDREN = "children"
+GENERAL = "general"
+
+# File name words marking guidance written for one population
+POPULATION_KEYWORDS = {
+    PREGNANCY: ("pregnancy",),
+    CHILDREN: ("children", "childhood"),
+}
+
+
+def infer_population(file_name: str) -> str:
+    """
+    Name the population a source document is written for, from its file name.
+
+    Args:
+        file_name (str): File name of the source PDF.
+
+    Returns:
+        str: `PREGNANCY`, `CHILDREN` or `GENERAL`.
+    """
+    words = file_name.lower().replace("-", "_").split("_")
+    for population, keywords in POPULATION_KEYWORDS.items():
+        if any(keyword in words for keyword in keywords):
+            return population
+    return GENERAL
+
+
+def document_partitions(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Read the partition value of every field in `PARTITION_FIELDS` from chunk metadata.
+
+    Chunks processed before the population was stored get it from their file name.
+
+    Args:
+        metadata (Dict[str, Any]): Metadata of a chunk.
+
+    Returns:
+        Dict[str, str]: Partition value keyed by field; missing fields are left out.
+    """
+    values = {}
+    for field in PARTITION_FIELDS:
+        value = metadata.get(field)
+        if value is None and field == "population":
+            value = infer_population(metadata.get("file_name", ""))
+        if value is not None:
+            values[field] = str(value)
+    return values
+
+
+class PartitionIndex:
+    """
+    Sorted FAISS row ids of the chunks in each partition, per metadata field.
+    """
+
+    def __init__(self, partitions: Dict[str, Dict[str, np.ndarray]]):
+        """
+        Args:
+            partitions (Dict[str, Dict[str, np.ndarray]]): Row ids keyed by field and value.
+        """
+        self.partitions = partitions
+
+    @classmethod
+    def build(cls, metadatas: Iterable[Dict[str, Any]]) -> "PartitionIndex":
+        """
+        Build the index from chunk metadata in FAISS row order.
+
+        Args:
+            metadatas (Iterable[Dict[str, Any]]): Metadata of each chunk, one per FAISS row.
+
+        Returns:
+            PartitionIndex: The index.
+        """
+        rows: Dict[str, Dict[str, List[int]]] = {}
+        for row, metadata in enumerate(metadatas):
+            for field, value in document_partitions(metadata).items():
+                rows.setdefault(field, {}).setdefault(value, []).append(row)
+        return cls(
+            {
+                field: {value: np.asarray(ids, dtype=np.int64) for value, ids in values.items()}
+                for field, values in rows.items()
+            }
+        )
+
+    def rows(self, filters: Dict[str, List[str]]) -> Optional[np.ndarray]:
+        """
+        Select the rows matching structured filters.
+
+        A row matches if, for every filtered field, its value is one of the listed values.
+        Fields the index does not know are ignored.
+
+        Args:
+            filters (Dict[str, List[str]]): Accepted values keyed by field.
+
+        Returns:
+            Optional[np.ndarray]: Sorted matching row ids, or None if nothing is filtered.
+        """
+        selected = None
+        for field, values in filters.items():
+            if field not in self.partitions:
+                continue
+            empty = np.empty(0, dtype=np.int64)
+            field_rows = np.unique(
+                np.concatenate(
+                    [empty] + [self.partitions[field].get(str(value), empty) for value in values]
+                )
+            )
+            selected = field_rows if selected is None else np.intersect1d(selected, field_rows)
+        return selected
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Number of chunks in each partition, keyed by field and value."""
+        return {
+            field: {value: len(ids) for value, ids in values.items()}
+            for field, values in self.partitions.items()
+        }
+
+    def save(self, index_dir: Path) -> None:
+        """Save the index as JSON next to the FAISS index."""
+        with (index_dir / PARTITIONS_FILE).open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    field: {value: ids.tolist() for value, ids in values.items()}
+                    for field, values in self.partitions.items()
+                },
+                f,
+            )
+        logger.info(f"Saved metadata partitions: {self.stats()}")
+
+    @classmethod
+    def load(cls, index_dir: Path) -> Optional["PartitionIndex"]:
+        """
+        Load the index saved next to a FAISS index.
+
+        Args:
+            index_dir (Path): Directory of the index version.
+
+        Returns:
+            Optional[PartitionIndex]: The index, or None if none was built.
+        """
+        path = index_dir / PARTITIONS_FILE
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            {
+                field: {value: np.asarray(ids, dtype=np.int64) for value, ids in values.items()}
+                for field, values in data.items()
+            }
+        )
+
+
+def partition_filters(patient_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Derive the population partitions to search from the patient's data.
+
+    Pregnant patients are matched with pregnancy guidance and patients younger than
+    `CHILD_AGE_LIMIT` with guidance for children; everyone else with general guidance.
+
+    Args:
+        patient_data (Dict[str, Any]): The patient's data.
+
+    Returns:
+        Dict[str, List[str]]: Accepted values keyed by partition field.
+    """
+    populations = []
+    if patient_data.get("pregnancy_status") == "Pregnant":
+        populations.append(PREGNANCY)
+    age = patient_data.get("age")
+    if isinstance(age, (int, float)) and age < CHILD_AGE_LIMIT:
+        populations.append(CHILDREN)
+    return {"population": populations or [GENERAL]}
@@ -0,0 +1,192 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from paths_and_constants import STRUCTURED_FEATURE_WEIGHTS
+from src.logging_config import setup_logger
+from src.patient_data_params import CO_MORBIDITIES, ETHNICITIES, GENDERS, LAB_RANGES, SYMPTOMS
+
+logger = setup_logger(__name__)
+
+FEATURES_FILE = "patient_features.npy"
+FEATURE_COLUMNS_FILE = "patient_feature_columns.json"
+
+# One-hot (single value) and multi-hot (comma-separated values) categorical fields
+CATEGORICAL_FIELDS = {
+    "gender": GENDERS,
+    "ethnicity": ETHNICITIES,
+    "co_morbidities": CO_MORBIDITIES,
+    "symptoms": SYMPTOMS,
+}
+
+
+def feature_columns() -> List[Tuple[str, str]]:
+    """
+    List the feature columns as `(field, value)` pairs: lab fields, then categorical values.
+
+    Returns:
+        List[Tuple[str, str]]: Lab columns have an empty value.
+    """
+    columns = [(field, "") for field in LAB_RANGES]
+    for field, values in CATEGORICAL_FIELDS.items():
+        columns.extend((field, value) for value in values)
+    return columns
+
+
+def column_weights(columns: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Weight of each column in the distance, from `STRUCTURED_FEATURE_WEIGHTS`.
+
+    Args:
+        columns (List[Tuple[str, str]]): Feature columns.
+
+    Returns:
+        np.ndarray: float32 weights, one per column.
+    """
+    return np.asarray(
+        [STRUCTURED_FEATURE_WEIGHTS["labs" if not value else field] for field, value in columns],
+        dtype=np.float32,
+    )
+
+
+def parse_values(value: Any) -> List[str]:
+    """Split a categorical value given as a list or a comma-separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value]
+
+
+def encode_patient(patient: Dict[str, Any], columns: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Encode a patient as one row of the feature matrix.
+
+    Lab values are scaled so that the normal range of `LAB_RANGES` spans 0 to 1, which
+    puts every lab on the same scale. Missing or non-numeric labs are NaN and do not
+    count in distances.
+
+    Args:
+        patient (Dict[str, Any]): Patient data.
+        columns (List[Tuple[str, str]]): Feature columns.
+
+    Returns:
+        np.ndarray: float32 feature vector.
+    """
+    categorical = {field: set(parse_values(patient.get(field))) for field in CATEGORICAL_FIELDS}
+    row = np.zeros(len(columns), dtype=np.float32)
+    for position, (field, value) in enumerate(columns):
+        if value:
+            row[position] = float(value in categorical[field])
+            continue
+        low, high = LAB_RANGES[field]
+        try:
+            row[position] = (float(patient[field]) - low) / (high - low)
+        except (KeyError, TypeError, ValueError):
+            row[position] = np.nan
+    return row
+
+
+class PatientFeatureIndex:
+    """
+    Structured similarity search over the lab values and categorical fields of patients.
+
+    Rows follow the FAISS index of the private text embeddings, so the two rankings
+    can be fused. A search is one weighted distance computation over the whole matrix;
+    no embedding is needed.
+    """
+
+    def __init__(self, matrix: np.ndarray, columns: List[Tuple[str, str]]):
+        """
+        Args:
+            matrix (np.ndarray): float32 features of shape (patients, columns).
+            columns (List[Tuple[str, str]]): The feature column of each matrix column.
+        """
+        self.matrix = matrix
+        self.columns = columns
+        self.weights = column_weights(columns)
+
+    @classmethod
+    def build(cls, patients: Iterable[Dict[str, Any]]) -> "PatientFeatureIndex":
+        """
+        Build the feature matrix from patient records in FAISS row order.
+
+        Args:
+            patients (Iterable[Dict[str, Any]]): Patient records, one per FAISS row.
+
+        Returns:
+            PatientFeatureIndex: The index.
+        """
+        columns = feature_columns()
+        rows = [encode_patient(patient, columns) for patient in patients]
+        matrix = np.vstack(rows) if rows else np.zeros((0, len(columns)), dtype=np.float32)
+        return cls(matrix, columns)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def distances(self, patient: Dict[str, Any], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Weighted squared distances from a patient to the stored patients.
+
+        Args:
+            patient (Dict[str, Any]): The query patient's data.
+            rows (Optional[np.ndarray]): Only compare with these rows, if given.
+
+        Returns:
+            np.ndarray: One distance per compared row.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        difference = matrix - encode_patient(patient, self.columns)
+        # Labs missing on either side contribute nothing
+        np.nan_to_num(difference, copy=False, nan=0.0)
+        return (difference * difference) @ self.weights
+
+    def search(
+        self, patient: Dict[str, Any], k: int, rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the stored patients closest to a patient.
+
+        Args:
+            patient (Dict[str, Any]): The query patient's data.
+            k (int): Number of results.
+            rows (Optional[np.ndarray]): Only search these rows, if given.
+
+        Returns:
+            List[Tuple[int, float]]: Up to `k` `(row, distance)` pairs, closest first.
+        """
+        distances = self.distances(patient, rows)
+        k = min(k, len(distances))
+        if k == 0:
+            return []
+        best = np.argpartition(distances, k - 1)[:k]
+        best = best[np.argsort(distances[best], kind="stable")]
+        ids = best if rows is None else np.asarray(rows)[best]
+        return [(int(row), float(distances[position])) for row, position in zip(ids, best)]
+
+    def save(self, index_dir: Path) -> None:
+        """Save the feature matrix and its columns next to the FAISS index."""
+        np.save(index_dir / FEATURES_FILE, self.matrix.astype(np.float32))
+        with (index_dir / FEATURE_COLUMNS_FILE).open("w", encoding="utf-8") as f:
+            json.dump(self.columns, f)
+        logger.info(f"Saved {self.matrix.shape[1]} structured features of {len(self)} patients.")
+
+    @classmethod
+    def load(cls, index_dir: Path) -> Optional["PatientFeatureIndex"]:
+        """
+        Load the feature matrix saved next to a FAISS index, memory-mapped.
+
+        Args:
+            index_dir (Path): Directory of the index version.
+
+        Returns:
+            Optional[PatientFeatureIndex]: The index, or None if none was built.
+        """
+        if not (index_dir / FEATURES_FILE).exists():
+            return None
+        with (index_dir / FEATURE_COLUMNS_FILE).open("r", encoding="utf-8") as f:
+            columns = [tuple(column) for column in json.load(f)]
+        return cls(np.load(index_dir / FEATURES_FILE, mmap_mode="r"), columns)
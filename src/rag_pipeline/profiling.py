@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+
+from pyinstrument import Profiler
+
+from paths_and_constants import PROFILE_DIR, PROFILE_SAMPLING_INTERVAL_SECONDS
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# pyinstrument allows one active profiler per thread, and requests share the event loop thread
+_profile_lock = threading.Lock()
+
+
+class ProfileInProgress(Exception):
+    """Raised when a CPU profile is requested while another one is running."""
+
+
+@contextmanager
+def profile_to_file(label: str) -> Iterator[Dict[str, str]]:
+    """
+    Capture a sampling CPU profile of the enclosed block and save it as HTML under PROFILE_DIR.
+
+    The profiler follows the current task across `await`s, so only the work of the
+    profiled request is attributed to it. Only one profile runs at a time.
+
+    Args:
+        label (str): Prefix of the profile file name.
+
+    Yields:
+        Dict[str, str]: Filled with the saved profile `path` when the block exits.
+
+    Raises:
+        ProfileInProgress: If another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfileInProgress("A CPU profile is already running.")
+    profiler = Profiler(interval=PROFILE_SAMPLING_INTERVAL_SECONDS, async_mode="enabled")
+    profile = {}
+    try:
+        profiler.start()
+    except BaseException:
+        _profile_lock.release()
+        raise
+    try:
+        yield profile
+    finally:
+        profiler.stop()
+        _profile_lock.release()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.html"
+        path.write_text(profiler.output_html(), encoding="utf-8")
+        profile["path"] = str(path)
+        logger.info(f"CPU profile saved to {path}")
@@ -1,4 +1,5 @@
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any
 
@@ -7,7 +8,7 @@ from src.logging_config import setup_logger
 logger = setup_logger(__name__)
 
 # Path for logging queries
-LOG_FILE = Path("artifacts/query_logs.json")
+LOG_FILE = Path("artifacts/query_logs.jsonl")
 
 
 def serialize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -23,46 +24,38 @@ def serialize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "text": doc.get("text", ""),
         "metadata": doc.get("metadata", {}),
+        "score": doc.get("score"),
     }
 
 
 def log_query(query: str, results: Dict[str, Any]) -> None:
     """
-    Log the query and its results to a JSON file.
+    Append the query and its results to a JSON Lines file, one entry per line.
+
+    The file is opened with O_APPEND and each entry is written in a single call, so
+    worker threads and uvicorn worker processes can log concurrently without a lock.
 
     Args:
         query (str): The user query.
         results (Dict[str, Any]): The results including summaries and source documents.
     """
-    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "query": query,
+        "public_summary": results.get("public_summary", ""),
+        "private_summary": results.get("private_summary", ""),
+        "combined_summary": results.get("combined_summary", ""),
+        "public_sources": [serialize_document(doc) for doc in results.get("public_sources", [])],
+        "private_sources": [serialize_document(doc) for doc in results.get("private_sources", [])],
+    }
+    line = (json.dumps(entry) + "\n").encode("utf-8")
 
     try:
-        # Load existing logs if the file exists
-        if LOG_FILE.exists():
-            with LOG_FILE.open("r", encoding="utf-8") as f:
-                logs = json.load(f)
-        else:
-            logs = []
-
-        # Append the new log entry
-        logs.append(
-            {
-                "query": query,
-                "public_summary": results.get("public_summary", ""),
-                "private_summary": results.get("private_summary", ""),
-                "combined_summary": results.get("combined_summary", ""),
-                "public_sources": [
-                    serialize_document(doc) for doc in results.get("public_sources", [])
-                ],
-                "private_sources": [
-                    serialize_document(doc) for doc in results.get("private_sources", [])
-                ],
-            }
-        )
-
-        # Write logs back to the file
-        with LOG_FILE.open("w", encoding="utf-8") as f:
-            json.dump(logs, f, indent=4)
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
 
         logger.info(f"Query and results logged successfully to {LOG_FILE}")
 
@@ -1,31 +1,253 @@
-from typing import List, Dict, Any
+import asyncio
+import json
+import secrets
+from contextlib import contextmanager, nullcontext
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from langchain_openai import ChatOpenAI
-from langchain_openai.embeddings import OpenAIEmbeddings
 from pydantic import BaseModel
 
-from paths_and_constants import PUBLIC_FAISS_DIR, PRIVATE_FAISS_DIR, RAG_MODEL_NAME
+from admin_state import SharedAdminState
+from admission import (
+    BULK_LANE,
+    INTERACTIVE_LANE,
+    AdmissionRejected,
+    current_lane,
+)
+from coalescing import SingleFlight
+from embedding_cache import normalize_text
+from index_manager import IndexManager
+from index_types import describe_index, set_search_params
+from memory_report import AllocationTracker, memory_report
+from metrics import METRICS_CONTENT_TYPE, observe_stage, render_metrics, set_index_size
+from partitions import partition_filters
+from paths_and_constants import (
+    ADMIN_STATE_FILE,
+    ADMIN_SYNC_POLL_SECONDS,
+    ADMISSION_RETRY_AFTER_SECONDS,
+    BATCH_RETRIEVAL_CHUNK_SIZE,
+    BATCH_SUMMARY_CONCURRENCY,
+    FAISS_EF_SEARCH,
+    FAISS_NPROBE,
+    INDEX_RELOAD_POLL_SECONDS,
+    MEMORY_REPORT_TOP_N,
+    PUBLIC_FAISS_DIR,
+    PRIVATE_FAISS_DIR,
+    RAG_MODEL_NAME,
+    RETRIEVAL_KEEP_N,
+    SEMANTIC_CACHE_INDEX,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
+from profiling import ProfileInProgress, profile_to_file
 from query_generalizer import prepare_patient_data, generalize_query
 from query_logger import log_query
-from retriever import load_faiss_index, retrieve_context
-from src.env_config import OPENAI_API_KEY
+from retriever import (
+    aembed_query_per_index,
+    aretrieve_context,
+    aretrieve_context_batch,
+    get_embedding_cache_stats,
+    get_rerank_cache_stats,
+    load_faiss_index,
+)
+from semantic_cache import SemanticCache, cache_scope
+from src.env_config import ADMIN_API_KEY, OPENAI_API_KEY
 from src.logging_config import setup_logger
-from summary_generator import generate_summary, generate_combined_summary
+from summary_generator import (
+    agenerate_summary,
+    agenerate_combined_summary,
+    astream_combined_summary,
+    completion_cache,
+    llm_admission,
+)
+from tracing import RequestTrace, current_trace
 
 # Initialize FastAPI application
 app = FastAPI()
 
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> JSONResponse:
+    """
+    Turn admission control rejections into 429/503 responses with a retry hint.
+    """
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.exception_handler(ProfileInProgress)
+async def profile_in_progress_handler(request: Request, exc: ProfileInProgress) -> JSONResponse:
+    """
+    Turn a profile request made while another profile runs into a 409 response.
+    """
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
 # Logger setup
 logger = setup_logger(__name__)
 
-# Embedding model initialization
-embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+# LLM client and index managers, set by `load_resources` when the app starts. Tests set
+# them beforehand to serve small in-memory indexes and a fake LLM.
+llm: Optional[Any] = None
+index_managers: Dict[str, IndexManager] = {}
+
+# Concurrent duplicate `/query` requests share one pipeline run
+query_single_flight = SingleFlight("query")
+
+# Full responses scoped by the patient data and keyed by the embedding of the base query
+semantic_cache = SemanticCache(
+    similarity_threshold=SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+
+# Query-time search parameters of approximate indexes, reapplied to reloaded indexes
+search_params = {"nprobe": FAISS_NPROBE, "ef_search": FAISS_EF_SEARCH}
+
+# Admin actions recorded for, and picked up from, the other uvicorn workers
+admin_state = SharedAdminState(ADMIN_STATE_FILE)
+
+
+def on_index_swap(index_name: str, vectorstore: Any) -> None:
+    """
+    Apply the search parameters, refresh the index size gauge and drop cached responses
+    built from the old index.
+
+    Args:
+        index_name (str): Name of the swapped index.
+        vectorstore (Any): The newly loaded vector store.
+    """
+    set_search_params(vectorstore.index, **search_params)
+    set_index_size(index_name, vectorstore)
+    semantic_cache.invalidate()
+
+
+def build_llm() -> ChatOpenAI:
+    """
+    Create the chat model client shared by every request.
+
+    Returns:
+        ChatOpenAI: The client; `stream_usage` makes streamed completions report token usage.
+    """
+    return ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY, stream_usage=True)
 
-# Load retrievers
-public_retriever = load_faiss_index(PUBLIC_FAISS_DIR, embeddings)
-private_retriever = load_faiss_index(PRIVATE_FAISS_DIR, embeddings)
-llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
+
+def build_index_managers() -> Dict[str, IndexManager]:
+    """
+    Load both retrievers, each with the embedding model named in its index manifest.
+
+    Returns:
+        Dict[str, IndexManager]: The public and private index managers.
+    """
+    return {
+        "public": IndexManager("public", PUBLIC_FAISS_DIR, load_faiss_index, on_index_swap),
+        "private": IndexManager("private", PRIVATE_FAISS_DIR, load_faiss_index, on_index_swap),
+    }
+
+
+def apply_search_params(params: Dict[str, Optional[int]]) -> None:
+    """
+    Update the search parameters and apply them to the live indexes.
+
+    Args:
+        params (Dict[str, Optional[int]]): The `nprobe` and `ef_search` values to change.
+    """
+    search_params.update(params)
+    for manager in index_managers.values():
+        set_search_params(manager.vectorstore.index, **search_params)
+
+
+async def reload_all_indexes(force: bool) -> Dict[str, Any]:
+    """
+    Reload every index, keeping the live version of any index that fails to reload.
+
+    Args:
+        force (bool): Reload even if the published version did not change.
+
+    Returns:
+        Dict[str, Any]: The reload outcome keyed by index name.
+    """
+    results = {}
+    for name, manager in index_managers.items():
+        try:
+            results[name] = await manager.reload(force=force)
+        except Exception as e:
+            results[name] = {"swapped": False, "version": manager.version, "error": str(e)}
+    return results
+
+
+async def sync_admin_actions() -> None:
+    """
+    Apply the admin actions other workers recorded since the last call.
+    """
+    for action, payload in await asyncio.to_thread(admin_state.pending):
+        logger.info(f"Applying admin action {action} recorded by another worker.")
+        if action == "invalidate":
+            semantic_cache.invalidate()
+        elif action == "search_params":
+            apply_search_params(payload)
+        elif action == "reload":
+            await reload_all_indexes(payload.get("force", False))
+
+
+async def poll_admin_actions(interval: float) -> None:
+    """
+    Poll for admin actions recorded by other workers.
+
+    Args:
+        interval (float): Seconds between polls.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_admin_actions()
+        except Exception as e:
+            logger.error(f"Failed to apply admin actions from other workers: {e}")
+
+
+# tracemalloc window opened by the admin memory endpoints
+allocation_tracker = AllocationTracker()
+
+
+@contextmanager
+def lease_retrievers() -> Iterator[Dict[str, Any]]:
+    """
+    Hold the live version of both indexes, so a hot reload cannot swap them mid-request.
+
+    Yields:
+        Dict[str, Any]: The public and private vector stores keyed by index name.
+    """
+    with index_managers["public"].lease() as public, index_managers["private"].lease() as private:
+        yield {"public": public, "private": private}
+
+
+@app.on_event("startup")
+async def load_resources() -> None:
+    """
+    Create the LLM client and load the indexes, unless they were set already, and apply
+    the search parameters other workers have set. Then poll the index directories for
+    newly published versions and the shared admin state for actions of other workers.
+    """
+    global llm
+    if llm is None:
+        llm = build_llm()
+    if not index_managers:
+        index_managers.update(build_index_managers())
+    recorded = await asyncio.to_thread(admin_state.current)
+    if "search_params" in recorded:
+        apply_search_params(recorded["search_params"])
+    if INDEX_RELOAD_POLL_SECONDS:
+        for manager in index_managers.values():
+            asyncio.create_task(manager.watch(INDEX_RELOAD_POLL_SECONDS))
+    if ADMIN_SYNC_POLL_SECONDS:
+        asyncio.create_task(poll_admin_actions(ADMIN_SYNC_POLL_SECONDS))
 
 
 class QueryRequest(BaseModel):
@@ -47,68 +269,728 @@ class QueryResponse(BaseModel):
     combined_summary: str
     public_sources: List[Dict[str, Any]]
     private_sources: List[Dict[str, Any]]
+    cache_hit: bool = False
+    trace: Optional[Dict[str, Any]] = None
 
 
-@app.post("/query", response_model=QueryResponse)
-def query_rag_pipeline(request: QueryRequest):
+def is_admin_key(key: Optional[str]) -> bool:
     """
-    Query the RAG pipeline and return the results.
+    Check a key against the admin API key.
+
+    Args:
+        key (Optional[str]): The key sent by the client.
+
+    Returns:
+        bool: False if the key is missing, wrong or `ADMIN_API_KEY` is not configured.
+    """
+    return bool(ADMIN_API_KEY and key and secrets.compare_digest(key, ADMIN_API_KEY))
+
+
+def is_enabled(flag: Optional[str]) -> bool:
+    """Interpret an opt-in header value such as `1` or `true`."""
+    return (flag or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Reject requests to admin endpoints that do not carry the admin API key.
+
+    Admin endpoints are disabled entirely when `ADMIN_API_KEY` is not configured.
+
+    Args:
+        x_admin_key (Optional[str]): Value of the `X-Admin-Key` header.
+
+    Raises:
+        HTTPException: 403 if the key is missing, wrong or not configured.
+    """
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Admin access denied.")
+
+
+def prepare_query(request: QueryRequest) -> Tuple[str, str]:
+    """
+    Format the patient data and build the generalized retrieval query.
 
     Args:
         request (QueryRequest): The query request containing the patient's data and query.
 
     Returns:
-        QueryResponse: The results containing summaries and source documents.
+        Tuple[str, str]: The formatted patient data string and the generalized query.
     """
-    try:
-        # Prepare patient data
+    with observe_stage("prepare_query"):
         patient_data_str = prepare_patient_data(request.patient_data)
         generalized_query = generalize_query(patient_data_str, request.base_query)
-        logger.info(f"Generalized Query: {generalized_query}")
+    logger.info(f"Generalized Query: {generalized_query}")
+    return patient_data_str, generalized_query
 
-        # Retrieve documents
-        retrieved_context = retrieve_context(
-            generalized_query, public_retriever, private_retriever, top_n=5
-        )
 
-        # Generate summaries
-        public_summary = generate_summary(
+def timed_log_query(query: str, results: Dict[str, Any]) -> None:
+    """
+    Log the query and its results, recording the logging latency.
+
+    Args:
+        query (str): The generalized query.
+        results (Dict[str, Any]): The results including summaries and source documents.
+    """
+    with observe_stage("log_query"):
+        log_query(query, results)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode a payload as a server-sent event.
+
+    Args:
+        event (str): The event name.
+        data (Any): JSON-serializable event payload.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def patient_data_key(patient_data: Optional[Dict[str, Any]]) -> str:
+    """
+    Serialize the raw patient data for exact cache and coalescing keys.
+
+    Retrieval depends on it beyond the formatted prompt text: partitions and the
+    structured ranking of similar patients by their labs.
+
+    Args:
+        patient_data (Optional[Dict[str, Any]]): The patient's data.
+
+    Returns:
+        str: Canonical JSON of the patient data.
+    """
+    return json.dumps(patient_data, sort_keys=True, default=str)
+
+
+def semantic_cache_scope(
+    patient_data_str: str,
+    filters: Optional[Dict[str, List[str]]] = None,
+    patient_data: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build the semantic cache scope of a query: the patient data that reaches the prompts,
+    the metadata partitions retrieved from and the raw patient data used to rank
+    similar patients.
+
+    Args:
+        patient_data_str (str): Formatted patient data string used as the target case.
+        filters (Optional[Dict[str, List[str]]]): Metadata partitions of the patient.
+        patient_data (Optional[Dict[str, Any]]): The patient's data.
+
+    Returns:
+        str: The exact scope key.
+    """
+    return cache_scope(normalize_text(patient_data_str), filters, patient_data_key(patient_data))
+
+
+async def embed_and_lookup(
+    base_query: str, generalized_query: str, scope: str, retrievers: Dict[str, Any]
+) -> Tuple[Dict[str, List[float]], List[float], Optional[Dict[str, Any]]]:
+    """
+    Embed the queries and look up a cached response for the same patient and a similar question.
+
+    The generalized query, which embeds the patient data, is only used for retrieval:
+    the cache matches on the exact `scope` and on the embedding of the base query.
+
+    Args:
+        base_query (str): The user's question.
+        generalized_query (str): The generalized query.
+        scope (str): Semantic cache scope, see `semantic_cache_scope`.
+        retrievers (Dict[str, Any]): Leased vector stores keyed by index name.
+
+    Returns:
+        Tuple[Dict[str, List[float]], List[float], Optional[Dict[str, Any]]]: Generalized
+            query vectors keyed by index name, the base query vector, and the cached
+            response or None on a miss.
+    """
+    vectors, base_vector = await asyncio.gather(
+        aembed_query_per_index(generalized_query, retrievers),
+        retrievers[SEMANTIC_CACHE_INDEX].embeddings.aembed_query(base_query),
+    )
+    return vectors, base_vector, semantic_cache.lookup(scope, base_vector)
+
+
+async def summarize_context(
+    patient_data_str: str, retrieved_context: Dict[str, List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Summarize the retrieved public and private documents for a single patient.
+
+    The public and private summaries are generated concurrently, then combined.
+
+    Args:
+        patient_data_str (str): Formatted patient data string used as the target case.
+        retrieved_context (Dict[str, List[Dict[str, Any]]]): Output of the retriever.
+
+    Returns:
+        Dict[str, Any]: Summaries and source documents matching `QueryResponse`.
+    """
+    public_summary, private_summary = await asyncio.gather(
+        agenerate_summary(
             llm=llm,
             documents=retrieved_context["public_results"],
             source_type="public",
             target_case=patient_data_str,
-        )
-        private_summary = generate_summary(
+        ),
+        agenerate_summary(
             llm=llm,
             documents=retrieved_context["private_results"],
             source_type="private",
             target_case=patient_data_str,
+        ),
+    )
+
+    combined_summary = await agenerate_combined_summary(
+        public_summary=public_summary,
+        private_summary=private_summary,
+        target_case=patient_data_str,
+        llm=llm,
+    )
+
+    return {
+        "public_summary": public_summary,
+        "private_summary": private_summary,
+        "combined_summary": combined_summary,
+        "public_sources": retrieved_context["public_results"],
+        "private_sources": retrieved_context["private_results"],
+    }
+
+
+async def run_query_pipeline(
+    patient_data_str: str,
+    generalized_query: str,
+    base_query: str,
+    patient_data: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run retrieval, summarization and logging for a prepared query.
+
+    Args:
+        patient_data_str (str): Formatted patient data string used as the target case.
+        generalized_query (str): The generalized retrieval query.
+        base_query (str): The user's question, matched against cached responses.
+        patient_data (Optional[Dict[str, Any]]): The patient's data, used to select the
+            metadata partitions to retrieve from and to rank similar patients by their labs.
+
+    Returns:
+        Dict[str, Any]: Summaries and source documents matching `QueryResponse`.
+    """
+    filters = None if patient_data is None else partition_filters(patient_data)
+    scope = semantic_cache_scope(patient_data_str, filters, patient_data)
+    with lease_retrievers() as retrievers:
+        # Serve near-identical questions about the same patient from the semantic cache
+        vectors, base_vector, cached_results = await embed_and_lookup(
+            base_query, generalized_query, scope, retrievers
         )
+        if cached_results is not None:
+            return {**cached_results, "cache_hit": True}
 
-        # Generate combined summary
-        combined_summary = generate_combined_summary(
-            public_summary=public_summary,
-            private_summary=private_summary,
-            target_case=patient_data_str,
+        # Retrieve documents
+        retrieved_context = await aretrieve_context(
+            generalized_query,
+            retrievers["public"],
+            retrievers["private"],
+            top_n=RETRIEVAL_KEEP_N,
+            vectors=vectors,
+            filters=filters,
+            patient_data=patient_data,
         )
 
-        # Log the query and results
-        results = {
-            "public_summary": public_summary,
-            "private_summary": private_summary,
-            "combined_summary": combined_summary,
-            "public_sources": retrieved_context["public_results"],
-            "private_sources": retrieved_context["private_results"],
-        }
-        log_query(generalized_query, results)
+    # Generate summaries
+    results = await summarize_context(patient_data_str, retrieved_context)
+    semantic_cache.add(scope, base_vector, results)
+
+    # Log the query and results
+    await asyncio.to_thread(timed_log_query, generalized_query, results)
+
+    return results
+
+
+async def run_traced_query(request: QueryRequest, profile: bool) -> Dict[str, Any]:
+    """
+    Run a query on its own, recording a per-stage trace and optionally a CPU profile.
+
+    Traced requests bypass request coalescing so the trace covers the work done for
+    this request rather than the wait on another one.
+
+    Args:
+        request (QueryRequest): The query request containing the patient's data and query.
+        profile (bool): Whether to save a sampling CPU profile of the request.
+
+    Returns:
+        Dict[str, Any]: The results matching `QueryResponse`, including `trace`.
+    """
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        with profile_to_file("query") if profile else nullcontext({}) as profile_info:
+            patient_data_str, generalized_query = prepare_query(request)
+            results = await run_query_pipeline(
+                patient_data_str, generalized_query, request.base_query, request.patient_data
+            )
+    finally:
+        current_trace.reset(token)
+
+    report = trace.to_dict()
+    if profile_info.get("path"):
+        report["profile_path"] = profile_info["path"]
+    return {**results, "trace": report}
+
+
+@app.post("/query", response_model=QueryResponse, response_model_exclude_none=True)
+async def query_rag_pipeline(
+    request: QueryRequest,
+    trace: bool = False,
+    x_trace: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+    x_admin_key: Optional[str] = Header(None),
+):
+    """
+    Query the RAG pipeline and return the results.
+
+    Retrieval from both indexes and the public/private summaries run concurrently,
+    so only the combined summary waits on the other LLM calls. Queries about the same
+    patient data whose base query embedding is close enough to a cached one are
+    answered from the semantic cache and flagged with `cache_hit`. Identical requests that arrive
+    while one is already being processed wait for its result instead of rerunning
+    the pipeline.
+
+    Passing `?trace=true` or an `X-Trace: 1` header adds a `trace` field with the
+    per-stage timings, LLM token counts and cache hits of the request. Admins may
+    also send `X-Profile: 1` to save a sampling CPU profile under `LOG_DIR`; only one
+    profile runs at a time and concurrent profile requests get a 409.
+
+    Args:
+        request (QueryRequest): The query request containing the patient's data and query.
+        trace (bool): Whether to return the per-stage trace.
+        x_trace (Optional[str]): Value of the `X-Trace` header.
+        x_profile (Optional[str]): Value of the `X-Profile` header.
+        x_admin_key (Optional[str]): Value of the `X-Admin-Key` header, required to profile.
 
-        return results
+    Returns:
+        QueryResponse: The results containing summaries and source documents.
+    """
+    profile = is_enabled(x_profile)
+    if profile and not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Admin access denied.")
 
+    llm_admission.check_capacity(INTERACTIVE_LANE)
+    try:
+        if trace or profile or is_enabled(x_trace):
+            return await run_traced_query(request, profile)
+
+        # Prepare patient data
+        patient_data_str, generalized_query = prepare_query(request)
+
+        # Retrieval also depends on the raw patient data: partitions and lab similarity
+        key = (
+            normalize_text(generalized_query),
+            normalize_text(request.base_query),
+            patient_data_key(request.patient_data),
+        )
+        return await query_single_flight.run(
+            key,
+            lambda: run_query_pipeline(
+                patient_data_str, generalized_query, request.base_query, request.patient_data
+            ),
+        )
+
+    except (AdmissionRejected, ProfileInProgress):
+        raise
     except Exception as e:
         logger.error(f"Error processing query: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while processing the query.")
 
 
+async def retrieve_batch(
+    requests: List[QueryRequest],
+) -> Tuple[List[Tuple[str, str]], List[Dict[str, List[Dict[str, Any]]]]]:
+    """
+    Prepare many queries and retrieve their context with one embeddings call per model
+    and one search per index.
+
+    Args:
+        requests (List[QueryRequest]): The query requests, one per patient.
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[Dict[str, List[Dict[str, Any]]]]]: The formatted
+            patient data and generalized query of each request, and its retrieved context.
+    """
+    prepared = [prepare_query(request) for request in requests]
+    with lease_retrievers() as retrievers:
+        retrieved_contexts = await aretrieve_context_batch(
+            [generalized_query for _, generalized_query in prepared],
+            retrievers["public"],
+            retrievers["private"],
+            top_n=RETRIEVAL_KEEP_N,
+            filters=[partition_filters(request.patient_data) for request in requests],
+            patients=[request.patient_data for request in requests],
+        )
+    return prepared, retrieved_contexts
+
+
+@app.post("/query/batch")
+async def batch_rag_pipeline(requests: List[QueryRequest]):
+    """
+    Query the RAG pipeline for many patients in one call.
+
+    Patients are retrieved in chunks of `BATCH_RETRIEVAL_CHUNK_SIZE`: each chunk is
+    embedded with a single embeddings call and each index is searched once with the
+    chunk's query matrix. Summarization fans out with at most
+    `BATCH_SUMMARY_CONCURRENCY` patients in flight, starting with the first chunk, and
+    the next chunk is only retrieved once fewer than two chunks of patients wait to be
+    streamed back, so memory stays bounded for any batch size. Results are streamed
+    back as newline-delimited JSON in completion order, each line carrying the `index`
+    of its request and either a `result` matching `QueryResponse` or an `error`.
+
+    Args:
+        requests (List[QueryRequest]): The query requests, one per patient.
+
+    Returns:
+        StreamingResponse: An `application/x-ndjson` response.
+    """
+    llm_admission.check_capacity(BULK_LANE)
+
+    semaphore = asyncio.Semaphore(BATCH_SUMMARY_CONCURRENCY)
+    # Patients retrieved but not streamed back yet
+    backlog = asyncio.Semaphore(2 * BATCH_RETRIEVAL_CHUNK_SIZE)
+    lines: asyncio.Queue = asyncio.Queue()
+
+    async def process(
+        index: int, prepared: Tuple[str, str], retrieved_context: Dict[str, Any]
+    ) -> None:
+        patient_data_str, generalized_query = prepared
+        # Each task runs in its own context, so this only affects this patient's LLM calls
+        current_lane.set(BULK_LANE)
+        async with semaphore:
+            try:
+                results = await summarize_context(patient_data_str, retrieved_context)
+                await asyncio.to_thread(timed_log_query, generalized_query, results)
+                line = {"index": index, "result": results}
+            except AdmissionRejected as e:
+                line = {"index": index, "error": e.detail, "status_code": e.status_code}
+            except Exception as e:
+                logger.error(f"Error processing batch query {index}: {e}")
+                line = {"index": index, "error": "An error occurred while processing the query."}
+        lines.put_nowait(line)
+
+    async def retrieve_chunks() -> None:
+        tasks = []
+        try:
+            for start in range(0, len(requests), BATCH_RETRIEVAL_CHUNK_SIZE):
+                chunk = requests[start : start + BATCH_RETRIEVAL_CHUNK_SIZE]
+                for _ in chunk:
+                    await backlog.acquire()
+                try:
+                    prepared, retrieved_contexts = await retrieve_batch(chunk)
+                except Exception as e:
+                    logger.error(f"Error retrieving batch context: {e}")
+                    for index in range(start, start + len(chunk)):
+                        lines.put_nowait(
+                            {"index": index, "error": "An error occurred while retrieving context."}
+                        )
+                    continue
+                for offset, (query, context) in enumerate(zip(prepared, retrieved_contexts)):
+                    tasks.append(asyncio.create_task(process(start + offset, query, context)))
+            await asyncio.gather(*tasks)
+        finally:
+            # Stop outstanding work if the client disconnects mid-stream
+            for task in tasks:
+                task.cancel()
+
+    async def result_stream() -> AsyncIterator[str]:
+        producer = asyncio.create_task(retrieve_chunks())
+        try:
+            for _ in range(len(requests)):
+                line = await lines.get()
+                backlog.release()
+                yield json.dumps(line) + "\n"
+        finally:
+            producer.cancel()
+
+    logger.info(f"Processing batch of {len(requests)} queries...")
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/query/stream")
+async def stream_rag_pipeline(request: QueryRequest):
+    """
+    Query the RAG pipeline and stream the results as server-sent events.
+
+    Events are emitted as soon as each stage finishes: `sources` after retrieval,
+    `public_summary` and `private_summary` in completion order, `combined_token`
+    for every chunk of the combined summary and finally `done`. A failure is
+    reported with an `error` event.
+
+    Args:
+        request (QueryRequest): The query request containing the patient's data and query.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response.
+    """
+
+    llm_admission.check_capacity(INTERACTIVE_LANE)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            patient_data_str, generalized_query = prepare_query(request)
+            filters = partition_filters(request.patient_data)
+            scope = semantic_cache_scope(patient_data_str, filters, request.patient_data)
+
+            with lease_retrievers() as retrievers:
+                vectors, base_vector, cached_results = await embed_and_lookup(
+                    request.base_query, generalized_query, scope, retrievers
+                )
+                if cached_results is None:
+                    retrieved_context = await aretrieve_context(
+                        generalized_query,
+                        retrievers["public"],
+                        retrievers["private"],
+                        top_n=RETRIEVAL_KEEP_N,
+                        vectors=vectors,
+                        filters=filters,
+                        patient_data=request.patient_data,
+                    )
+
+            if cached_results is not None:
+                yield format_sse(
+                    "sources",
+                    {
+                        "public_sources": cached_results["public_sources"],
+                        "private_sources": cached_results["private_sources"],
+                        "cache_hit": True,
+                    },
+                )
+                for source_type in ("public", "private"):
+                    summary = cached_results[f"{source_type}_summary"]
+                    yield format_sse(f"{source_type}_summary", {"summary": summary})
+                yield format_sse("combined_token", {"token": cached_results["combined_summary"]})
+                yield format_sse("done", {})
+                return
+
+            yield format_sse(
+                "sources",
+                {
+                    "public_sources": retrieved_context["public_results"],
+                    "private_sources": retrieved_context["private_results"],
+                },
+            )
+
+            async def summarize(source_type: str) -> Tuple[str, str]:
+                summary = await agenerate_summary(
+                    llm=llm,
+                    documents=retrieved_context[f"{source_type}_results"],
+                    source_type=source_type,
+                    target_case=patient_data_str,
+                )
+                return source_type, summary
+
+            summaries = {}
+            for finished in asyncio.as_completed([summarize("public"), summarize("private")]):
+                source_type, summary = await finished
+                summaries[source_type] = summary
+                yield format_sse(f"{source_type}_summary", {"summary": summary})
+
+            combined_chunks = []
+            async for token in astream_combined_summary(
+                public_summary=summaries["public"],
+                private_summary=summaries["private"],
+                target_case=patient_data_str,
+                llm=llm,
+            ):
+                combined_chunks.append(token)
+                yield format_sse("combined_token", {"token": token})
+
+            results = {
+                "public_summary": summaries["public"],
+                "private_summary": summaries["private"],
+                "combined_summary": "".join(combined_chunks),
+                "public_sources": retrieved_context["public_results"],
+                "private_sources": retrieved_context["private_results"],
+            }
+            semantic_cache.add(scope, base_vector, results)
+            await asyncio.to_thread(timed_log_query, generalized_query, results)
+            yield format_sse("done", {})
+
+        except AdmissionRejected as e:
+            yield format_sse("error", {"detail": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+            yield format_sse("error", {"detail": "An error occurred while processing the query."})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Report hit and miss counters of the backend caches.
+
+    Returns:
+        Dict[str, Any]: Counters per cache.
+    """
+    return {
+        "embeddings": get_embedding_cache_stats(),
+        "completions": completion_cache.stats(),
+        "semantic": semantic_cache.stats(),
+        "rerank": get_rerank_cache_stats(),
+        "coalesced_queries": query_single_flight.stats(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Export Prometheus metrics: per-stage latency histograms, token usage and index sizes.
+
+    Returns:
+        Response: Metrics in the Prometheus text exposition format.
+    """
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    """
+    Report active LLM calls, queue lengths and queue times per admission lane.
+
+    Returns:
+        Dict[str, Any]: Metrics keyed by lane.
+    """
+    return llm_admission.stats()
+
+
+@app.post("/admin/cache/invalidate", dependencies=[Depends(require_admin)])
+def invalidate_cache():
+    """
+    Drop every cached response, e.g. after the FAISS indexes are rebuilt. The other
+    workers drop theirs on their next poll of the shared admin state.
+
+    Returns:
+        Dict[str, int]: The number of semantic cache entries removed by this worker.
+    """
+    removed = semantic_cache.invalidate()
+    admin_state.publish("invalidate", {})
+    return {"semantic_entries_removed": removed}
+
+
+@app.get("/admin/memory", dependencies=[Depends(require_admin)])
+def memory_stats(top_n: int = MEMORY_REPORT_TOP_N):
+    """
+    Report resident memory split by FAISS vectors, docstores, and embedding and LLM clients.
+
+    While allocation tracking is started, the report also lists the `top_n` allocation
+    sites that grew the most since tracking started.
+
+    Args:
+        top_n (int): Number of allocation sites to report.
+
+    Returns:
+        Dict[str, Any]: The memory report.
+    """
+    with lease_retrievers() as retrievers:
+        report = memory_report(
+            retrievers,
+            {
+                "public_embeddings": retrievers["public"].embedding_function,
+                "private_embeddings": retrievers["private"].embedding_function,
+                "llm": llm,
+            },
+        )
+    if allocation_tracker.active:
+        report["allocations"] = allocation_tracker.diff(top_n)
+    return report
+
+
+@app.post("/admin/memory/tracking/start", dependencies=[Depends(require_admin)])
+def start_allocation_tracking():
+    """
+    Start tracemalloc and take the baseline snapshot for the allocation diff.
+
+    Returns:
+        Dict[str, str]: The tracking status.
+    """
+    allocation_tracker.start()
+    return {"status": "started"}
+
+
+@app.post("/admin/memory/tracking/stop", dependencies=[Depends(require_admin)])
+def stop_allocation_tracking():
+    """
+    Stop tracemalloc and drop the baseline snapshot.
+
+    Returns:
+        Dict[str, str]: The tracking status.
+    """
+    allocation_tracker.stop()
+    return {"status": "stopped"}
+
+
+@app.get("/admin/indexes", dependencies=[Depends(require_admin)])
+def index_stats():
+    """
+    Report the live version of each index, the old versions still draining and the
+    size of each metadata partition.
+
+    Returns:
+        Dict[str, Any]: Stats keyed by index name.
+    """
+    stats = {}
+    for name, manager in index_managers.items():
+        vectorstore = manager.vectorstore
+        partition_index = getattr(vectorstore, "partition_index", None)
+        stats[name] = {
+            **manager.stats(),
+            "index_type": describe_index(vectorstore.index),
+            "partitions": partition_index.stats() if partition_index else None,
+        }
+    return stats
+
+
+@app.post("/admin/indexes/search-params", dependencies=[Depends(require_admin)])
+def update_search_params(nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    Change the accuracy/speed trade-off of approximate indexes without rebuilding them.
+    The other workers apply the change on their next poll of the shared admin state.
+
+    Args:
+        nprobe (Optional[int]): Number of IVF lists visited per query.
+        ef_search (Optional[int]): Size of the HNSW candidate list per query.
+
+    Returns:
+        Dict[str, Optional[int]]: The search parameters now in effect.
+    """
+    changed = {"nprobe": nprobe, "ef_search": ef_search}
+    changed = {name: value for name, value in changed.items() if value is not None}
+    apply_search_params(admin_state.publish("search_params", changed))
+    return search_params
+
+
+@app.post("/admin/indexes/reload", dependencies=[Depends(require_admin)])
+async def reload_indexes(force: bool = False):
+    """
+    Load the published version of each index in the background and swap it in.
+
+    Requests already running keep the version they started with; the old version is
+    released once they finish. If a new version fails to load or validate, the live
+    version keeps serving. The other workers reload on their next poll of the shared
+    admin state.
+
+    Args:
+        force (bool): Reload even if the published version did not change.
+
+    Returns:
+        Dict[str, Any]: The reload outcome keyed by index name.
+    """
+    results = await reload_all_indexes(force)
+    await asyncio.to_thread(admin_state.publish, "reload", {"force": force})
+    return results
+
+
 if __name__ == "__main__":
     import uvicorn
 
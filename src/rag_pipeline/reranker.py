@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from cache_store import PersistentLRUCache
+from embedding_cache import normalize_text
+from src.logging_config import setup_logger
+from tracing import record_cache_event
+
+logger = setup_logger(__name__)
+
+
+def chunk_id(document: Document) -> str:
+    """
+    Identify a chunk for the score cache.
+
+    Args:
+        document (Document): A retrieved chunk.
+
+    Returns:
+        str: The docstore id, the `id` metadata field or, failing both, a hash of the text.
+    """
+    identifier = document.id or document.metadata.get("id")
+    if identifier:
+        return str(identifier)
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks with a local cross-encoder and keeps the best ones.
+
+    The cross-encoder reads the query and the chunk together, which ranks far better
+    than comparing two independent embeddings, but costs one forward pass per pair.
+    All uncached pairs of a call are scored in one batched CPU pass, and every score is
+    cached by model, query and chunk id.
+    """
+
+    def __init__(self, model_name: str, store: PersistentLRUCache, batch_size: int):
+        """
+        Args:
+            model_name (str): SentenceTransformers cross-encoder model.
+            store (PersistentLRUCache): Cache storage for pair scores.
+            batch_size (int): Pairs per forward pass.
+        """
+        self.model_name = model_name
+        self.store = store
+        self.batch_size = batch_size
+        self._model: Optional[Any] = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        """The cross-encoder, loaded on first use."""
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading cross-encoder {self.model_name} on the CPU...")
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def cache_key(self, query: str, document: Document) -> str:
+        """
+        Build the cache key of a (query, chunk) pair.
+
+        Args:
+            query (str): The query.
+            document (Document): The chunk.
+
+        Returns:
+            str: SHA-256 hex digest of the model name, normalized query and chunk id.
+        """
+        payload = f"{self.model_name}\0{normalize_text(query)}\0{chunk_id(document)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def score(
+        self, queries: Sequence[str], documents: Sequence[Sequence[Document]]
+    ) -> List[List[float]]:
+        """
+        Score every chunk against its query, computing all cache misses in one batch.
+
+        Args:
+            queries (Sequence[str]): The queries.
+            documents (Sequence[Sequence[Document]]): Candidate chunks of each query.
+
+        Returns:
+            List[List[float]]: Relevance scores in the shape of `documents`; higher is better.
+        """
+        scores: List[List[Optional[float]]] = []
+        missing: Dict[str, List[Any]] = {}
+        for query_number, (query, candidates) in enumerate(zip(queries, documents)):
+            scores.append([])
+            for position, document in enumerate(candidates):
+                key = self.cache_key(query, document)
+                value = self.store.get(key)
+                record_cache_event("rerank", hit=value is not None)
+                if value is not None:
+                    scores[-1].append(array("f", value)[0])
+                    continue
+                scores[-1].append(None)
+                # Duplicate pairs are scored once
+                missing.setdefault(key, [query, document.page_content, []])[2].append(
+                    (query_number, position)
+                )
+
+        if missing:
+            pairs = [(query, text) for query, text, _ in missing.values()]
+            predicted = self.model.predict(
+                pairs, batch_size=self.batch_size, show_progress_bar=False
+            )
+            for (key, (_, _, positions)), value in zip(missing.items(), predicted):
+                self.store.set(key, array("f", [float(value)]).tobytes())
+                for query_number, position in positions:
+                    scores[query_number][position] = float(value)
+        return scores
+
+    def order(
+        self, queries: Sequence[str], documents: Sequence[Sequence[Document]], keep: int
+    ) -> List[List[int]]:
+        """
+        Rank the chunks of each query by cross-encoder score and keep the `keep` best.
+
+        Args:
+            queries (Sequence[str]): The queries.
+            documents (Sequence[Sequence[Document]]): Candidate chunks of each query.
+            keep (int): Number of chunks kept per query.
+
+        Returns:
+            List[List[int]]: Positions of the kept chunks in `documents`, best first.
+        """
+        return [
+            sorted(range(len(candidates)), key=lambda i: -candidate_scores[i])[:keep]
+            for candidates, candidate_scores in zip(documents, self.score(queries, documents))
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report score cache hit and miss counters.
+
+        Returns:
+            Dict[str, int]: Counters from the underlying cache store.
+        """
+        return self.store.stats()
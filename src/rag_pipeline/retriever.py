@@ -1,25 +1,212 @@
+import asyncio
 import json
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
-from langchain_community.embeddings import OpenAIEmbeddings
+import faiss
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_openai.embeddings import OpenAIEmbeddings
 
-from paths_and_constants import PUBLIC_FAISS_DIR, PRIVATE_FAISS_DIR, RETRIEVAL_TOP_N
+from adaptive_k import adaptive_cutoff
+from bm25 import BM25Index, reciprocal_rank_fusion
+from cache_store import PersistentLRUCache
+from diversity import select_diverse
+from embedding_cache import CachedEmbeddings, get_embedding_model_name
+from index_manifest import (
+    SHARDS_DIR_NAME,
+    infer_legacy_manifest,
+    read_index_manifest,
+    resolve_index_version,
+)
+from index_types import (
+    enable_reconstruction,
+    filtered_search,
+    reconstruct_rows,
+    set_search_params,
+    with_exact_rerank,
+)
+from metrics import observe_stage
+from mmap_docstore import has_mmap_docstore, load_mmap_vectorstore
+from partitions import PartitionIndex
+from patient_features import PatientFeatureIndex
+from paths_and_constants import (
+    ADAPTIVE_TOP_K,
+    DIVERSITY_CANDIDATES_N,
+    DIVERSITY_INDEXES,
+    DIVERSITY_MODE,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    EMBEDDING_CACHE_PATH,
+    FAISS_EF_SEARCH,
+    FAISS_EXACT_RERANK,
+    FAISS_MMAP,
+    FAISS_NPROBE,
+    FAISS_RERANK_FACTOR,
+    HYBRID_CANDIDATES_N,
+    PARTITIONED_RETRIEVAL,
+    PUBLIC_FAISS_DIR,
+    PRIVATE_FAISS_DIR,
+    RERANK_CACHE_MEMORY_SIZE,
+    RERANK_CACHE_PATH,
+    RERANK_INDEXES,
+    RERANKER_BATCH_SIZE,
+    RERANKER_MODEL,
+    RETRIEVAL_FETCH_N,
+    RETRIEVAL_KEEP_N,
+    RETRIEVAL_MODE,
+    SIMILARITY_THRESHOLDS,
+    STRUCTURED_RETRIEVAL_MODE,
+)
 from query_generalizer import generalize_query
+from reranker import CrossEncoderReranker
+from sharded_index import combine_shards, load_shards
 from src.env_config import OPENAI_API_KEY
 from src.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
 
-def load_faiss_index(index_dir: Path, embeddings: OpenAIEmbeddings) -> FAISS:
+# Embeddings shared by every index built with the same (provider, model)
+_embeddings_registry: Dict[Tuple[str, str], Embeddings] = {}
+
+# Cross-encoder shared by every index in RERANK_INDEXES, built on first use
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def build_embeddings(provider: str, model_name: str) -> Embeddings:
+    """
+    Build the embeddings object for an embedding provider and model.
+
+    Remote OpenAI embeddings are wrapped in a persistent cache; local
+    SentenceTransformer models run on the CPU without any network call.
+
+    Args:
+        provider (str): Embedding provider from the index manifest.
+        model_name (str): Embedding model from the index manifest.
+
+    Returns:
+        Embeddings: The embeddings object.
+
+    Raises:
+        ValueError: If the provider is not supported.
+    """
+    if provider == "openai":
+        return CachedEmbeddings(
+            OpenAIEmbeddings(model=model_name, openai_api_key=OPENAI_API_KEY),
+            PersistentLRUCache(
+                EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE, table="embeddings"
+            ),
+        )
+    if provider == "sentence_transformers":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    raise ValueError(f"Unsupported embedding provider: {provider}")
+
+
+def get_embeddings(provider: str, model_name: str) -> Embeddings:
+    """
+    Get the shared embeddings object for an embedding provider and model.
+
+    Args:
+        provider (str): Embedding provider from the index manifest.
+        model_name (str): Embedding model from the index manifest.
+
+    Returns:
+        Embeddings: The embeddings object, built on first use.
+    """
+    key = (provider, model_name)
+    if key not in _embeddings_registry:
+        logger.info(f"Initializing {provider} embeddings: {model_name}")
+        _embeddings_registry[key] = build_embeddings(provider, model_name)
+    return _embeddings_registry[key]
+
+
+def get_embedding_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Report hit and miss counters of every cached embeddings object.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Counters keyed by embedding model name.
+    """
+    return {
+        embeddings.model_name: embeddings.stats()
+        for embeddings in _embeddings_registry.values()
+        if isinstance(embeddings, CachedEmbeddings)
+    }
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Get the shared cross-encoder re-ranker.
+
+    Returns:
+        Optional[CrossEncoderReranker]: The re-ranker, or None if re-ranking is disabled.
+    """
+    global _reranker
+    if RERANKER_MODEL is None:
+        return None
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(
+            RERANKER_MODEL,
+            PersistentLRUCache(RERANK_CACHE_PATH, RERANK_CACHE_MEMORY_SIZE, table="rerank_scores"),
+            RERANKER_BATCH_SIZE,
+        )
+    return _reranker
+
+
+def get_rerank_cache_stats() -> Dict[str, int]:
+    """
+    Report hit and miss counters of the re-ranker score cache.
+
+    Returns:
+        Dict[str, int]: Counters, empty if re-ranking is disabled.
+    """
+    reranker = get_reranker()
+    return {} if reranker is None else reranker.stats()
+
+
+def load_index_files(index_dir: Path, embeddings: Optional[Embeddings] = None) -> FAISS:
+    """
+    Load the FAISS index and docstore saved in a directory, with query-time settings applied.
+
+    Args:
+        index_dir (Path): Directory containing one saved index (or shard).
+        embeddings (Optional[Embeddings]): Embedding model of the vector store.
+
+    Returns:
+        FAISS: The loaded vector store.
+    """
+    if has_mmap_docstore(index_dir):
+        vectorstore = load_mmap_vectorstore(index_dir, embeddings, mmap_index=FAISS_MMAP)
+    else:
+        vectorstore = FAISS.load_local(
+            str(index_dir), embeddings, allow_dangerous_deserialization=True
+        )
+    set_search_params(vectorstore.index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+    # Result scores and near-duplicate suppression read candidate vectors back from the index
+    enable_reconstruction(vectorstore.index)
+    if FAISS_EXACT_RERANK:
+        vectorstore.index = with_exact_rerank(vectorstore.index, index_dir, FAISS_RERANK_FACTOR)
+    return vectorstore
+
+
+def load_faiss_index(index_dir: Path, embeddings: Optional[Embeddings] = None) -> FAISS:
     """
-    Load a FAISS index from the specified directory using the given embeddings.
+    Load a FAISS index from the specified directory.
+
+    The embedding model is taken from the index manifest so that queries are embedded
+    into the same vector space as the stored vectors. For a versioned index directory
+    the version named in its CURRENT file is loaded. Indexes saved with a columnar
+    docstore are loaded without unpickling anything; with `FAISS_MMAP` enabled the
+    FAISS index is also mapped read-only, so worker processes share one copy in the
+    page cache. Older indexes fall back to `FAISS.load_local`. Sharded indexes are
+    combined into one vector store that searches every shard in parallel.
 
     Args:
         index_dir (Path): Path to the directory containing the FAISS index.
-        embeddings (OpenAIEmbeddings): The embedding model used to create the FAISS index.
+        embeddings (Optional[Embeddings]): Overrides the embedding model from the manifest.
 
     Returns:
         FAISS: The loaded FAISS retriever.
@@ -28,49 +215,588 @@ def load_faiss_index(index_dir: Path, embeddings: OpenAIEmbeddings) -> FAISS:
         logger.error(f"FAISS index directory not found: {index_dir}")
         raise FileNotFoundError(f"Directory {index_dir} does not exist.")
 
+    _, index_dir = resolve_index_version(index_dir)
     logger.info(f"Loading FAISS index from {index_dir}...")
-    return FAISS.load_local(str(index_dir), embeddings, allow_dangerous_deserialization=True)
+    shards_dir = index_dir / SHARDS_DIR_NAME
+    if shards_dir.exists():
+        shards = load_shards(shards_dir, lambda shard_dir: load_index_files(shard_dir, embeddings))
+        vectorstore = combine_shards(shards, embeddings)
+    else:
+        vectorstore = load_index_files(index_dir, embeddings)
+
+    manifest = read_index_manifest(index_dir)
+    if manifest is None:
+        manifest = infer_legacy_manifest(index_dir, vectorstore.index.d)
+    if manifest["dimension"] != vectorstore.index.d:
+        raise ValueError(
+            f"Index at {index_dir} stores {vectorstore.index.d}-dimensional vectors, but its "
+            f"manifest declares {manifest['dimension']}."
+        )
+
+    if embeddings is None:
+        vectorstore.embedding_function = get_embeddings(
+            manifest["embedding_provider"], manifest["embedding_model"]
+        )
+    # Loaded with the version, so a hot reload swaps both indexes together
+    vectorstore.bm25_index = BM25Index.load(index_dir)
+    vectorstore.partition_index = PartitionIndex.load(index_dir)
+    vectorstore.feature_index = PatientFeatureIndex.load(index_dir)
+    logger.info(
+        f"Loaded {vectorstore.index.ntotal} vectors from {index_dir} "
+        f"(embedding model: {manifest['embedding_model']})."
+    )
+    return vectorstore
+
+
+def format_results(results: List[Tuple[Document, float]]) -> List[Dict[str, Any]]:
+    """
+    Convert retrieved LangChain documents into JSON-serializable dictionaries.
+
+    Args:
+        results (List[Tuple[Document, float]]): Documents returned by a FAISS retriever,
+            with their similarity scores.
+
+    Returns:
+        List[Dict[str, Any]]: Documents as dictionaries with text, metadata and score.
+    """
+    return [
+        {"text": res.page_content, "metadata": res.metadata, "score": score}
+        for res, score in results
+    ]
+
+
+def group_by_embedding_model(retrievers: Dict[str, FAISS]) -> Dict[str, List[str]]:
+    """
+    Group indexes by the embedding model each one was loaded with.
+
+    Each FAISS retriever carries its own embeddings object, so the mapping of index
+    name to retriever doubles as the per-index embedding model registry. Indexes that
+    share a model can reuse one query vector; indexes with different models cannot.
+
+    Args:
+        retrievers (Dict[str, FAISS]): FAISS retrievers keyed by index name.
+
+    Returns:
+        Dict[str, List[str]]: Index names keyed by embedding model name.
+    """
+    groups = {}
+    for name, retriever in retrievers.items():
+        model_name = get_embedding_model_name(retriever.embeddings)
+        groups.setdefault(model_name, []).append(name)
+    return groups
+
+
+def embed_query_per_index(query: str, retrievers: Dict[str, FAISS]) -> Dict[str, List[float]]:
+    """
+    Embed a query once per distinct embedding model.
+
+    Args:
+        query (str): The query to embed.
+        retrievers (Dict[str, FAISS]): FAISS retrievers keyed by index name.
+
+    Returns:
+        Dict[str, List[float]]: The query vector for each index name.
+    """
+    vectors = {}
+    for model_name, names in group_by_embedding_model(retrievers).items():
+        vector = retrievers[names[0]].embeddings.embed_query(query)
+        vectors.update({name: vector for name in names})
+    return vectors
+
+
+async def aembed_query_per_index(
+    query: str, retrievers: Dict[str, FAISS]
+) -> Dict[str, List[float]]:
+    """
+    Embed a query once per distinct embedding model, embedding for different models concurrently.
+
+    Args:
+        query (str): The query to embed.
+        retrievers (Dict[str, FAISS]): FAISS retrievers keyed by index name.
+
+    Returns:
+        Dict[str, List[float]]: The query vector for each index name.
+    """
+    groups = list(group_by_embedding_model(retrievers).values())
+    with observe_stage("embed_query"):
+        group_vectors = await asyncio.gather(
+            *(retrievers[names[0]].embeddings.aembed_query(query) for names in groups)
+        )
+    return {name: vector for names, vector in zip(groups, group_vectors) for name in names}
+
+
+def is_hybrid(vectorstore: FAISS) -> bool:
+    """Whether searches of an index fuse BM25 and vector rankings."""
+    return RETRIEVAL_MODE == "hybrid" and getattr(vectorstore, "bm25_index", None) is not None
+
+
+def is_diverse(index_name: str) -> bool:
+    """Whether near-duplicate chunks are dropped from the results of an index."""
+    return DIVERSITY_MODE != "off" and index_name in DIVERSITY_INDEXES
+
+
+def is_structured(vectorstore: FAISS) -> bool:
+    """Whether searches of an index rank patients by their structured lab and categorical fields."""
+    return (
+        STRUCTURED_RETRIEVAL_MODE != "off"
+        and getattr(vectorstore, "feature_index", None) is not None
+    )
+
+
+def partition_rows(
+    vectorstore: FAISS, filters: Optional[Dict[str, List[str]]]
+) -> Optional[np.ndarray]:
+    """
+    Select the rows of an index matching structured metadata filters.
+
+    Args:
+        vectorstore (FAISS): The FAISS retriever to search.
+        filters (Optional[Dict[str, List[str]]]): Accepted values keyed by partition field.
+
+    Returns:
+        Optional[np.ndarray]: Sorted row ids to search, or None to search the whole index,
+            e.g. if it has no partitions or no chunk matches the filters.
+    """
+    partition_index = getattr(vectorstore, "partition_index", None)
+    if not PARTITIONED_RETRIEVAL or not filters or partition_index is None:
+        return None
+    rows = partition_index.rows(filters)
+    if rows is not None and len(rows) == 0:
+        logger.warning(f"No chunks match the filters {filters}; searching the whole index.")
+        return None
+    return rows
+
+
+def fetch_size(index_name: str, top_n: int) -> int:
+    """
+    Number of candidates to fetch from an index to keep `top_n` of them.
+
+    Args:
+        index_name (str): Name of the index.
+        top_n (int): Number of results kept.
+
+    Returns:
+        int: `RETRIEVAL_FETCH_N` for re-ranked indexes, `top_n` otherwise.
+    """
+    if index_name not in RERANK_INDEXES or get_reranker() is None:
+        return top_n
+    return max(top_n, RETRIEVAL_FETCH_N)
+
+
+def keep_results(
+    index_name: str,
+    queries: Optional[List[str]],
+    results: List[List[Tuple[Document, float]]],
+    top_n: int,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Keep up to `top_n` of the candidates of each query.
+
+    Relevance and order are decided by two different scores. With `ADAPTIVE_TOP_K`,
+    candidates are first cut on their cosine similarity, the score returned with each
+    result: those below the similarity threshold of the index, or too far below the best
+    candidate, are dropped. Candidates of indexes in `RERANK_INDEXES` are then ordered by
+    the cross-encoder, whose scores are not comparable across queries and are only used
+    for ordering; other indexes, and searches without query texts, keep the search ranking.
+
+    Args:
+        index_name (str): Name of the index, used as the metrics stage label.
+        queries (Optional[List[str]]): Query texts in the order of `results`.
+        results (List[List[Tuple[Document, float]]]): Scored candidates of each query.
+        top_n (int): Maximum number of results kept per query.
+
+    Returns:
+        List[List[Tuple[Document, float]]]: The kept documents of each query, with their
+            cosine similarity scores.
+    """
+    if ADAPTIVE_TOP_K:
+        threshold = SIMILARITY_THRESHOLDS.get(index_name)
+        results = [
+            [
+                candidates[i]
+                for i in adaptive_cutoff(
+                    [score for _, score in candidates], len(candidates), threshold
+                )
+            ]
+            for candidates in results
+        ]
+
+    reranker = get_reranker()
+    if index_name not in RERANK_INDEXES or reranker is None or queries is None:
+        return [candidates[:top_n] for candidates in results]
+    with observe_stage(f"rerank_{index_name}"):
+        orders = reranker.order(
+            queries, [[document for document, _ in candidates] for candidates in results], top_n
+        )
+    return [[candidates[i] for i in order] for candidates, order in zip(results, orders)]
+
+
+async def asearch_index(
+    index_name: str,
+    retriever: FAISS,
+    vector: List[float],
+    top_n: int,
+    query: Optional[str] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+    patient_data: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[Document, float]]:
+    """
+    Search one FAISS index by vector, recording the search latency.
+
+    Indexes saved with a BM25 index are searched in hybrid mode when the query text is given.
+    Re-ranked indexes fetch more candidates and keep the `top_n` best-scored by the
+    cross-encoder. Weak results are dropped as described in `keep_results`.
+
+    Args:
+        index_name (str): Name of the index, used as the metrics stage label.
+        retriever (FAISS): The FAISS retriever to search.
+        vector (List[float]): The query vector.
+        top_n (int): Maximum number of results to retrieve.
+        query (Optional[str]): The query text, for the BM25 ranking.
+        filters (Optional[Dict[str, List[str]]]): Metadata partitions to search in.
+        patient_data (Optional[Dict[str, Any]]): The patient's data, for structured search.
+
+    Returns:
+        List[Tuple[Document, float]]: The retrieved documents with their similarity scores.
+    """
+    queries = None if query is None else [query]
+    patients = None if patient_data is None else [patient_data]
+    with observe_stage(f"faiss_search_{index_name}"):
+        results = await asyncio.to_thread(
+            search_by_vectors,
+            retriever,
+            [vector],
+            fetch_size(index_name, top_n),
+            queries,
+            filters,
+            patients,
+            is_diverse(index_name),
+        )
+    results = await asyncio.to_thread(keep_results, index_name, queries, results, top_n)
+    return results[0]
 
 
 def retrieve_context(
-    query: str, public_retriever: FAISS, private_retriever: FAISS, top_n: int
+    query: str,
+    public_retriever: FAISS,
+    private_retriever: FAISS,
+    top_n: int,
+    filters: Optional[Dict[str, List[str]]] = None,
+    patient_data: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Retrieve context from public and private FAISS retrievers.
 
+    The query is embedded once per distinct embedding model and the vector is reused
+    for every index built with that model.
+
     Args:
         query (str): The generalized query.
         public_retriever (FAISS): Public FAISS retriever.
         private_retriever (FAISS): Private FAISS retriever.
-        top_n (int): Number of top results to retrieve.
+        top_n (int): Maximum number of results to retrieve.
+        filters (Optional[Dict[str, List[str]]]): Metadata partitions to search in, for
+            indexes saved with partitions.
+        patient_data (Optional[Dict[str, Any]]): The patient's data, for structured search
+            of indexes saved with patient features.
 
     Returns:
         Dict[str, List[Dict[str, Any]]]: Retrieved contexts with metadata from both retrievers.
     """
     logger.info(f"Retrieving context for query: {query}")
 
-    public_results = public_retriever.similarity_search(query, k=top_n)
-    private_results = private_retriever.similarity_search(query, k=top_n)
+    retrievers = {"public": public_retriever, "private": private_retriever}
+    vectors = embed_query_per_index(query, retrievers)
+
+    patients = None if patient_data is None else [patient_data]
+    results = {}
+    for name, retriever in retrievers.items():
+        candidates = search_by_vectors(
+            retriever,
+            [vectors[name]],
+            fetch_size(name, top_n),
+            [query],
+            filters,
+            patients,
+            is_diverse(name),
+        )
+        results[name] = keep_results(name, [query], candidates, top_n)[0]
+    public_results, private_results = results["public"], results["private"]
 
     logger.info(f"Retrieved {len(public_results)} results from public data.")
     logger.info(f"Retrieved {len(private_results)} results from private data.")
 
     return {
-        "public_results": [
-            {"text": res.page_content, "metadata": res.metadata} for res in public_results
-        ],
-        "private_results": [
-            {"text": res.page_content, "metadata": res.metadata} for res in private_results
-        ],
+        "public_results": format_results(public_results),
+        "private_results": format_results(private_results),
     }
 
 
-if __name__ == "__main__":
-    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+async def aretrieve_context(
+    query: str,
+    public_retriever: FAISS,
+    private_retriever: FAISS,
+    top_n: int,
+    vectors: Optional[Dict[str, List[float]]] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+    patient_data: Optional[Dict[str, Any]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retrieve context from public and private FAISS retrievers concurrently.
+
+    The query is embedded once per distinct embedding model and the vector is reused
+    for every index built with that model.
+
+    Args:
+        query (str): The generalized query.
+        public_retriever (FAISS): Public FAISS retriever.
+        private_retriever (FAISS): Private FAISS retriever.
+        top_n (int): Maximum number of results to retrieve.
+        vectors (Optional[Dict[str, List[float]]]): Query vectors already computed with
+            `aembed_query_per_index`, keyed by index name.
+        filters (Optional[Dict[str, List[str]]]): Metadata partitions to search in, for
+            indexes saved with partitions.
+        patient_data (Optional[Dict[str, Any]]): The patient's data, for structured search
+            of indexes saved with patient features.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Retrieved contexts with metadata from both retrievers.
+    """
+    logger.info(f"Retrieving context for query: {query}")
 
+    if vectors is None:
+        retrievers = {"public": public_retriever, "private": private_retriever}
+        vectors = await aembed_query_per_index(query, retrievers)
+
+    public_results, private_results = await asyncio.gather(
+        asearch_index(
+            "public", public_retriever, vectors["public"], top_n, query, filters, patient_data
+        ),
+        asearch_index(
+            "private", private_retriever, vectors["private"], top_n, query, filters, patient_data
+        ),
+    )
+
+    logger.info(f"Retrieved {len(public_results)} results from public data.")
+    logger.info(f"Retrieved {len(private_results)} results from private data.")
+
+    return {
+        "public_results": format_results(public_results),
+        "private_results": format_results(private_results),
+    }
+
+
+def search_by_vectors(
+    vectorstore: FAISS,
+    vectors: List[List[float]],
+    k: int,
+    queries: Optional[List[str]] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+    patients: Optional[List[Dict[str, Any]]] = None,
+    diverse: bool = False,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Search a FAISS index for many query vectors with a single `index.search` call.
+
+    In hybrid mode, `HYBRID_CANDIDATES_N` candidates are taken from both the vector
+    search and the BM25 index, and the top `k` of their reciprocal rank fusion are kept.
+    Indexes of patient records also rank patients by the weighted distance of their lab
+    values and categorical fields, fused the same way or, in "structured" mode, instead
+    of the vector search. With filters, all rankings only consider the rows of the
+    matching partitions. With `diverse`, `DIVERSITY_CANDIDATES_N` candidates are read
+    back from the index and near-duplicates are dropped before the top `k` are kept.
+
+    Like `similarity_search_with_score`, each document comes with a score: its cosine
+    similarity to the query, computed from the vectors read back from the index, so
+    results found by BM25 or structured search are scored the same way. Indexes wrapped
+    for exact re-ranking are scored on their original vectors; other compressed indexes
+    (SQ8, PQ) are scored on their approximate vectors.
+
+    Args:
+        vectorstore (FAISS): The FAISS retriever to search.
+        vectors (List[List[float]]): Query embeddings, one per query.
+        k (int): Number of top results to retrieve per query.
+        queries (Optional[List[str]]): Query texts in the order of `vectors`, for hybrid search.
+        filters (Optional[Dict[str, List[str]]]): Metadata partitions to search in, shared
+            by all queries.
+        patients (Optional[List[Dict[str, Any]]]): Patient data in the order of `vectors`,
+            for structured search.
+        diverse (bool): Whether to drop near-duplicate chunks.
+
+    Returns:
+        List[List[Tuple[Document, float]]]: Retrieved documents and their scores for each
+            query, in input order.
+    """
+    hybrid = queries is not None and is_hybrid(vectorstore)
+    structured = patients is not None and is_structured(vectorstore)
+    structured_only = structured and STRUCTURED_RETRIEVAL_MODE == "structured"
+    rows = partition_rows(vectorstore, filters)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if vectorstore._normalize_L2:
+        faiss.normalize_L2(matrix)
+    fetch_k = max(k, HYBRID_CANDIDATES_N) if hybrid or structured else k
+    if diverse:
+        fetch_k = max(fetch_k, DIVERSITY_CANDIDATES_N)
+    if structured_only:
+        indices = [[] for _ in vectors]
+    else:
+        _, indices = filtered_search(vectorstore.index, matrix, fetch_k, rows)
+
+    results = []
+    for query_number, row in enumerate(indices):
+        # FAISS pads with -1 when fewer than k vectors are available
+        rankings = [[int(i) for i in row if i != -1]]
+        if hybrid:
+            sparse = vectorstore.bm25_index.search(queries[query_number], HYBRID_CANDIDATES_N, rows)
+            rankings.append([i for i, _ in sparse])
+        if structured:
+            nearest = vectorstore.feature_index.search(
+                patients[query_number], max(k, HYBRID_CANDIDATES_N), rows
+            )
+            rankings.append([i for i, _ in nearest])
+        if structured_only:
+            rankings = rankings[1:]
+        positions = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings)
+        positions = positions[:fetch_k] if diverse else positions[:k]
+        candidates = reconstruct_rows(vectorstore.index, positions)
+        selected = select_diverse(
+            matrix[query_number], candidates, k, DIVERSITY_MODE if diverse else "off"
+        )
+        results.append(
+            [
+                (
+                    vectorstore.docstore.search(vectorstore.index_to_docstore_id[positions[i]]),
+                    score,
+                )
+                for i, score in selected
+            ]
+        )
+    return results
+
+
+def search_by_vectors_per_filter(
+    vectorstore: FAISS,
+    vectors: List[List[float]],
+    k: int,
+    queries: List[str],
+    filters: List[Optional[Dict[str, List[str]]]],
+    patients: Optional[List[Dict[str, Any]]] = None,
+    diverse: bool = False,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Search a FAISS index for many queries with their own filters, one search per distinct filter.
+
+    Args:
+        vectorstore (FAISS): The FAISS retriever to search.
+        vectors (List[List[float]]): Query embeddings, one per query.
+        k (int): Number of top results to retrieve per query.
+        queries (List[str]): Query texts in the order of `vectors`.
+        filters (List[Optional[Dict[str, List[str]]]]): Metadata partitions of each query.
+        patients (Optional[List[Dict[str, Any]]]): Patient data of each query.
+        diverse (bool): Whether to drop near-duplicate chunks.
+
+    Returns:
+        List[List[Tuple[Document, float]]]: Retrieved documents and their scores for each
+            query, in input order.
+    """
+    groups: Dict[str, List[int]] = {}
+    for position, query_filters in enumerate(filters):
+        groups.setdefault(json.dumps(query_filters, sort_keys=True), []).append(position)
+
+    results: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+    for positions in groups.values():
+        group_results = search_by_vectors(
+            vectorstore,
+            [vectors[position] for position in positions],
+            k,
+            [queries[position] for position in positions],
+            filters[positions[0]],
+            None if patients is None else [patients[position] for position in positions],
+            diverse,
+        )
+        for position, documents in zip(positions, group_results):
+            results[position] = documents
+    return results
+
+
+async def aretrieve_context_batch(
+    queries: List[str],
+    public_retriever: FAISS,
+    private_retriever: FAISS,
+    top_n: int,
+    filters: Optional[List[Optional[Dict[str, List[str]]]]] = None,
+    patients: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Retrieve context for many queries using one embeddings call per model and one search per index.
+
+    Queries with different metadata filters are searched separately, one search per filter.
+
+    Args:
+        queries (List[str]): The generalized queries.
+        public_retriever (FAISS): Public FAISS retriever.
+        private_retriever (FAISS): Private FAISS retriever.
+        top_n (int): Maximum number of results to retrieve per query.
+        filters (Optional[List[Optional[Dict[str, List[str]]]]]): Metadata partitions to
+            search in for each query, in the order of `queries`.
+        patients (Optional[List[Dict[str, Any]]]): Patient data of each query, for
+            structured search of patient records.
+
+    Returns:
+        List[Dict[str, List[Dict[str, Any]]]]: Retrieved contexts for each query, in input order.
+    """
+    logger.info(f"Retrieving context for a batch of {len(queries)} queries...")
+
+    # One embeddings call per distinct embedding model
+    retrievers = {"public": public_retriever, "private": private_retriever}
+    groups = list(group_by_embedding_model(retrievers).values())
+    with observe_stage("embed_query_batch"):
+        group_vectors = await asyncio.gather(
+            *(retrievers[names[0]].embeddings.aembed_documents(queries) for names in groups)
+        )
+    vectors = {name: matrix for names, matrix in zip(groups, group_vectors) for name in names}
+    if filters is None:
+        filters = [None] * len(queries)
+
+    # FAISS releases the GIL during search, so both indexes are searched in parallel threads
+    with observe_stage("faiss_search_batch"):
+        candidates = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    search_by_vectors_per_filter,
+                    retrievers[name],
+                    vectors[name],
+                    fetch_size(name, top_n),
+                    queries,
+                    filters,
+                    patients,
+                    is_diverse(name),
+                )
+                for name in ("public", "private")
+            )
+        )
+
+    # One cross-encoder batch per re-ranked index for all queries
+    public_results, private_results = await asyncio.gather(
+        *(
+            asyncio.to_thread(keep_results, name, queries, results, top_n)
+            for name, results in zip(("public", "private"), candidates)
+        )
+    )
+
+    return [
+        {
+            "public_results": format_results(public_docs),
+            "private_results": format_results(private_docs),
+        }
+        for public_docs, private_docs in zip(public_results, private_results)
+    ]
+
+
+if __name__ == "__main__":
     # Load FAISS indexes
-    public_retriever = load_faiss_index(PUBLIC_FAISS_DIR, embeddings)
-    private_retriever = load_faiss_index(PRIVATE_FAISS_DIR, embeddings)
+    public_retriever = load_faiss_index(PUBLIC_FAISS_DIR)
+    private_retriever = load_faiss_index(PRIVATE_FAISS_DIR)
 
     # Example usage
     patient_info = {
@@ -99,16 +825,20 @@ if __name__ == "__main__":
     generalized_query = generalize_query(patient_info, base_query)
 
     results = retrieve_context(
-        generalized_query, public_retriever, private_retriever, RETRIEVAL_TOP_N
+        generalized_query,
+        public_retriever,
+        private_retriever,
+        RETRIEVAL_KEEP_N,
+        patient_data=patient_info,
     )
 
     print("Public Results:")
     for result in results["public_results"]:
-        print(f"- {result['text']} (Source: {result['metadata']})")
+        print(f"- [{result['score']:.3f}] {result['text']} (Source: {result['metadata']})")
 
     print("\nPrivate Results:")
     for result in results["private_results"]:
-        print(f"- {result['text']} (Source: {result['metadata']})")
+        print(f"- [{result['score']:.3f}] {result['text']} (Source: {result['metadata']})")
 
     with open("artifacts/public_docs.json", "w") as f:
         f.write(json.dumps(results["public_results"], indent=4))
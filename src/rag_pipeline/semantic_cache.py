@@ -0,0 +1,164 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.logging_config import setup_logger
+from tracing import record_cache_event
+
+logger = setup_logger(__name__)
+
+
+def cache_scope(*parts: Any) -> str:
+    """
+    Build the exact scope key of a cache entry.
+
+    Args:
+        *parts (Any): JSON-serializable values the cached response depends on.
+
+    Returns:
+        str: SHA-256 hex digest of the values.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """
+    Cache of full RAG responses, scoped by an exact key and matched by query embedding.
+
+    The scope holds everything the response depends on besides the query wording, e.g.
+    the patient data, and must match exactly: embeddings of texts that differ in a
+    single lab value are too close to tell apart. Within a scope, a lookup returns the
+    stored response of the most similar cached query when its cosine similarity reaches
+    `similarity_threshold`. Entries expire after `ttl_seconds`, and the least recently
+    used entry is evicted once `max_entries` is exceeded.
+    """
+
+    def __init__(self, similarity_threshold: float, ttl_seconds: float, max_entries: int):
+        """
+        Args:
+            similarity_threshold (float): Minimum cosine similarity for a cache hit.
+            ttl_seconds (float): Lifetime of an entry in seconds.
+            max_entries (int): Maximum number of cached responses.
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        self._matrix_scopes: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def lookup(self, scope: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached response of the most similar query within a scope.
+
+        Args:
+            scope (str): Exact scope key, see `cache_scope`.
+            vector (List[float]): Embedding of the query.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached response, or None on a miss.
+        """
+        query = _unit(vector)
+        with self._lock:
+            self._expire()
+            rows = np.flatnonzero(self._get_scopes() == scope) if self._entries else []
+            if len(rows):
+                similarities = self._get_matrix()[rows] @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id = self._matrix_ids[rows[best]]
+                    self._entries.move_to_end(entry_id)
+                    self._counters["hits"] += 1
+                    logger.info(f"Semantic cache hit (similarity {similarities[best]:.4f}).")
+                    record_cache_event("semantic", hit=True)
+                    return self._entries[entry_id]["response"]
+
+            self._counters["misses"] += 1
+            record_cache_event("semantic", hit=False)
+            return None
+
+    def add(self, scope: str, vector: List[float], response: Dict[str, Any]) -> None:
+        """
+        Store a response under its scope and the embedding of its query.
+
+        Args:
+            scope (str): Exact scope key, see `cache_scope`.
+            vector (List[float]): Embedding of the query.
+            response (Dict[str, Any]): The full response to cache.
+        """
+        with self._lock:
+            self._entries[self._next_id] = {
+                "scope": scope,
+                "vector": _unit(vector),
+                "response": response,
+                "created_at": time.monotonic(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> int:
+        """
+        Remove every cached response, e.g. after the FAISS indexes are rebuilt.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+        logger.info(f"Semantic cache invalidated ({removed} entries removed).")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report hit/miss counters and the number of cached responses.
+
+        Returns:
+            Dict[str, int]: Counters for hits, misses and entries.
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+    def _expire(self) -> None:
+        """Drop entries older than the TTL. Entries are ordered by recency, not age."""
+        deadline = time.monotonic() - self.ttl_seconds
+        expired = [i for i, entry in self._entries.items() if entry["created_at"] < deadline]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._matrix = None
+
+    def _get_matrix(self) -> np.ndarray:
+        """Stack the cached vectors into one matrix, rebuilding it only after changes."""
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries)
+            self._matrix = np.vstack([self._entries[i]["vector"] for i in self._matrix_ids])
+            self._matrix_scopes = np.array(
+                [self._entries[i]["scope"] for i in self._matrix_ids], dtype=object
+            )
+        return self._matrix
+
+    def _get_scopes(self) -> np.ndarray:
+        """Scope of each row of the matrix returned by `_get_matrix`."""
+        self._get_matrix()
+        return self._matrix_scopes
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    """Convert a vector to a float32 array with unit L2 norm."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from paths_and_constants import FAISS_SHARD_SEARCH_THREADS
+from src.logging_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# FAISS releases the GIL while searching, so shards are searched in parallel threads
+_shard_search_pool = ThreadPoolExecutor(
+    max_workers=FAISS_SHARD_SEARCH_THREADS, thread_name_prefix="faiss-shard"
+)
+
+
+class ShardedIndex:
+    """
+    Presents several FAISS indexes as one: row ids are numbered shard after shard.
+
+    A search runs on every shard in a thread pool and the per-shard top-k lists are
+    merged by distance. Exposes the `search`, `ntotal` and `d` attributes used by
+    LangChain's FAISS.
+    """
+
+    def __init__(self, names: List[str], indexes: List[Any]):
+        """
+        Args:
+            names (List[str]): Shard names, in id order.
+            indexes (List[Any]): The FAISS index of each shard, all of the same dimension.
+        """
+        self.names = names
+        self.shards = indexes
+        self.offsets = np.cumsum([0] + [index.ntotal for index in indexes])
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def d(self) -> int:
+        return self.shards[0].d
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search every shard for the top `k` results and merge them by distance.
+
+        Args:
+            queries (np.ndarray): float32 queries of shape (n, d).
+            k (int): Number of results per query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Distances and global ids of shape (n, k).
+        """
+        return self.fan_out(lambda shard, index: index.search(queries, k), k)
+
+    def fan_out(
+        self, search_shard: Callable[[int, Any], Tuple[np.ndarray, np.ndarray]], k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run a search on every shard in parallel and merge the top `k` results by distance.
+
+        Args:
+            search_shard (Callable[[int, Any], Tuple[np.ndarray, np.ndarray]]): Searches
+                one shard, given its number and index, and returns shard-local ids.
+            k (int): Number of results per query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Distances and global ids of shape (n, k).
+        """
+        results = list(_shard_search_pool.map(search_shard, range(len(self.shards)), self.shards))
+        distances = np.hstack([shard_distances for shard_distances, _ in results])
+        labels = np.hstack(
+            [
+                np.where(shard_labels >= 0, shard_labels + offset, -1)
+                for (_, shard_labels), offset in zip(results, self.offsets)
+            ]
+        )
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, 1), np.take_along_axis(labels, order, 1)
+
+    def local_rows(self, rows: np.ndarray, shard: int) -> np.ndarray:
+        """
+        Select the global row ids that belong to a shard, as shard-local row ids.
+
+        Args:
+            rows (np.ndarray): Sorted global row ids.
+            shard (int): The shard number.
+
+        Returns:
+            np.ndarray: Sorted row ids within the shard.
+        """
+        start, end = int(self.offsets[shard]), int(self.offsets[shard + 1])
+        return rows[(rows >= start) & (rows < end)] - start
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """
+        Find the shard holding a global row id.
+
+        Args:
+            position (int): Global row id.
+
+        Returns:
+            Tuple[int, int]: The shard number and the row id within the shard.
+        """
+        shard = int(np.searchsorted(self.offsets, position, side="right")) - 1
+        return shard, position - int(self.offsets[shard])
+
+
+class ShardedDocstore(Docstore):
+    """
+    Resolves global row ids of a `ShardedIndex` to documents in the shard docstores.
+    """
+
+    def __init__(self, index: ShardedIndex, shards: List[FAISS]):
+        """
+        Args:
+            index (ShardedIndex): The index whose row ids are resolved.
+            shards (List[FAISS]): Shard vector stores, in the order of `index.shards`.
+        """
+        self.index = index
+        self.shards = shards
+
+    def search(self, search: Union[int, str]) -> Union[Document, str]:
+        """
+        Look up the document at a global row id.
+
+        Args:
+            search (Union[int, str]): Global row id.
+
+        Returns:
+            Union[Document, str]: The document, or an error message if there is none.
+        """
+        position = int(search)
+        if not 0 <= position < self.index.ntotal:
+            return f"ID {search} not found."
+        shard, row = self.index.locate(position)
+        vectorstore = self.shards[shard]
+        return vectorstore.docstore.search(vectorstore.index_to_docstore_id[row])
+
+
+def combine_shards(shards: Dict[str, FAISS], embeddings: Optional[Embeddings] = None) -> FAISS:
+    """
+    Combine shard vector stores into one vector store that fans out every search.
+
+    Args:
+        shards (Dict[str, FAISS]): Shard vector stores keyed by shard name.
+        embeddings (Optional[Embeddings]): Embedding model shared by the shards.
+
+    Returns:
+        FAISS: A read-only vector store over all shards.
+    """
+    names = list(shards)
+    stores = [shards[name] for name in names]
+    index = ShardedIndex(names, [store.index for store in stores])
+    logger.info(f"Combined {len(names)} shards with {index.ntotal} vectors: {', '.join(names)}")
+    # The docstore is keyed by global row id, so the id of row i is i
+    return FAISS(embeddings, index, ShardedDocstore(index, stores), range(index.ntotal))
+
+
+def load_shards(shards_dir: Path, loader: Callable[[Path], FAISS]) -> Dict[str, FAISS]:
+    """
+    Load every shard saved under a shards directory.
+
+    Args:
+        shards_dir (Path): The `shards` directory of an index version.
+        loader (Callable[[Path], FAISS]): Loads the vector store saved in one shard directory.
+
+    Returns:
+        Dict[str, FAISS]: Shard vector stores keyed by shard name, in name order.
+    """
+    return {
+        shard_dir.name: loader(shard_dir)
+        for shard_dir in sorted(shards_dir.iterdir())
+        if shard_dir.is_dir()
+    }
@@ -1,38 +1,61 @@
 import json
-from typing import Dict, List, Any
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from langchain_openai.chat_models import ChatOpenAI
 
-from paths_and_constants import RAG_MODEL_NAME
-from src.env_config import OPENAI_API_KEY
+from admission import AdmissionController, worker_share
+from cache_store import PersistentLRUCache
+from completion_cache import CompletionCache
+from metrics import observe_stage, record_token_usage
+from paths_and_constants import (
+    COMPLETION_CACHE_MEMORY_SIZE,
+    COMPLETION_CACHE_PATH,
+    LLM_MAX_BULK_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_QUEUE_SIZE,
+    LLM_MAX_QUEUE_WAIT_SECONDS,
+    RAG_MODEL_NAME,
+)
+from src.env_config import OPENAI_API_KEY, UVICORN_WORKERS
 from src.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
+# Bounds concurrent asynchronous LLM calls, with interactive calls served before bulk ones.
+# The limits are server-wide, so each uvicorn worker enforces its share of them.
+llm_admission = AdmissionController(
+    max_concurrency=worker_share(LLM_MAX_CONCURRENCY, UVICORN_WORKERS),
+    max_bulk_concurrency=worker_share(LLM_MAX_BULK_CONCURRENCY, UVICORN_WORKERS),
+    max_queue_size={
+        lane: worker_share(size, UVICORN_WORKERS) for lane, size in LLM_MAX_QUEUE_SIZE.items()
+    },
+    max_wait_seconds=LLM_MAX_QUEUE_WAIT_SECONDS,
+)
 
-def generate_summary(
-    llm: ChatOpenAI, documents: List[Dict[str, Any]], source_type: str, target_case: str
+# Shared by every summary function, keyed by (model name, temperature, prompt)
+completion_cache = CompletionCache(
+    PersistentLRUCache(COMPLETION_CACHE_PATH, COMPLETION_CACHE_MEMORY_SIZE, table="completions"),
+    admission=llm_admission,
+    on_response=record_token_usage,
+)
+
+
+def build_summary_prompt(
+    documents: List[Dict[str, Any]], source_type: str, target_case: str
 ) -> str:
     """
-    Generate a concise, actionable summary for a set of documents using a language model.
+    Build the summarization prompt for a set of documents.
 
     Args:
-        llm (ChatOpenAI): The language model for summarization.
         documents (List[Dict[str, Any]]): The documents to summarize.
         source_type (str): Type of documents (e.g., "private" or "public").
         target_case (str): Target case description to guide summarization.
 
     Returns:
-        str: A refined, concise summary of the provided documents.
+        str: The prompt to send to the language model.
     """
-    if not documents:
-        logger.warning(f"No documents provided for {source_type} summarization.")
-        return f"No data to summarize for {source_type}."
-
-    logger.info(f"Generating summary for {source_type} documents...")
-
     if source_type == "private":
-        prompt = (
+        return (
             f"Target case details:\n{target_case}\n\n"
             f"Summarize the following patient histories. Do not repeat the target case details."
             f"Identify similarities and differences with the target case, "
@@ -40,25 +63,22 @@ def generate_summary(
             f"{[doc['text'] for doc in documents]}\n\n"
             f"Provide a structured summary with key patterns, actionable insights, and specific recommendations for the target case."
         )
-    else:  # For public data
-        prompt = (
-            f"Target case details:\n{target_case}\n\n"
-            f"Summarize the following article samples. Do not repeat the target case details."
-            f"Extract actionable recommendations, highlight population-specific guidelines "
-            f"or treatments relevant to the target case, and discuss recent research breakthroughs:\n\n"
-            f"{[doc['text'] for doc in documents]}\n\n"
-            f"Provide a concise, actionable summary with insights tailored to the target case."
-        )
-
-    summary = llm.invoke(prompt)
-    summary_content = summary.content
-    logger.info(f"Summary generated for {len(documents)} documents.")
-    return summary_content
+    # For public data
+    return (
+        f"Target case details:\n{target_case}\n\n"
+        f"Summarize the following article samples. Do not repeat the target case details."
+        f"Extract actionable recommendations, highlight population-specific guidelines "
+        f"or treatments relevant to the target case, and discuss recent research breakthroughs:\n\n"
+        f"{[doc['text'] for doc in documents]}\n\n"
+        f"Provide a concise, actionable summary with insights tailored to the target case."
+    )
 
 
-def generate_combined_summary(public_summary: str, private_summary: str, target_case: str) -> str:
+def build_combined_summary_prompt(
+    public_summary: str, private_summary: str, target_case: str
+) -> str:
     """
-    Generate a consolidated actionable summary combining public and private insights.
+    Build the prompt that consolidates public and private summaries.
 
     Args:
         public_summary (str): Summary of public documents.
@@ -66,10 +86,9 @@ def generate_combined_summary(public_summary: str, private_summary: str, target_
         target_case (str): Target case description to guide consolidation.
 
     Returns:
-        str: Combined actionable summary.
+        str: The prompt to send to the language model.
     """
-    logger.info("Generating actionable combined summary...")
-    prompt = (
+    return (
         f"Target case details:\n{target_case}\n\n"
         f"Public Summary:\n{public_summary}\n\n"
         f"Private Summary:\n{private_summary}\n\n"
@@ -82,13 +101,147 @@ def generate_combined_summary(public_summary: str, private_summary: str, target_
         f"3. Integrated Recommendations\n"
         f"4. Additional Considerations or Unresolved Questions."
     )
-    llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
-    combined_summary = llm.invoke(prompt)
-    combined_summary_content = combined_summary.content
+
+
+def generate_summary(
+    llm: ChatOpenAI, documents: List[Dict[str, Any]], source_type: str, target_case: str
+) -> str:
+    """
+    Generate a concise, actionable summary for a set of documents using a language model.
+
+    Args:
+        llm (ChatOpenAI): The language model for summarization.
+        documents (List[Dict[str, Any]]): The documents to summarize.
+        source_type (str): Type of documents (e.g., "private" or "public").
+        target_case (str): Target case description to guide summarization.
+
+    Returns:
+        str: A refined, concise summary of the provided documents.
+    """
+    if not documents:
+        logger.warning(f"No documents provided for {source_type} summarization.")
+        return f"No data to summarize for {source_type}."
+
+    logger.info(f"Generating summary for {source_type} documents...")
+    prompt = build_summary_prompt(documents, source_type, target_case)
+    summary_content = completion_cache.invoke(llm, prompt)
+    logger.info(f"Summary generated for {len(documents)} documents.")
+    return summary_content
+
+
+async def agenerate_summary(
+    llm: ChatOpenAI, documents: List[Dict[str, Any]], source_type: str, target_case: str
+) -> str:
+    """
+    Asynchronous counterpart of `generate_summary` built on `llm.ainvoke`.
+
+    Args:
+        llm (ChatOpenAI): The language model for summarization.
+        documents (List[Dict[str, Any]]): The documents to summarize.
+        source_type (str): Type of documents (e.g., "private" or "public").
+        target_case (str): Target case description to guide summarization.
+
+    Returns:
+        str: A refined, concise summary of the provided documents.
+    """
+    if not documents:
+        logger.warning(f"No documents provided for {source_type} summarization.")
+        return f"No data to summarize for {source_type}."
+
+    logger.info(f"Generating summary for {source_type} documents...")
+    prompt = build_summary_prompt(documents, source_type, target_case)
+    with observe_stage(f"generate_summary_{source_type}"):
+        summary_content = await completion_cache.ainvoke(llm, prompt)
+    logger.info(f"Summary generated for {len(documents)} documents.")
+    return summary_content
+
+
+def generate_combined_summary(
+    public_summary: str,
+    private_summary: str,
+    target_case: str,
+    llm: Optional[ChatOpenAI] = None,
+) -> str:
+    """
+    Generate a consolidated actionable summary combining public and private insights.
+
+    Args:
+        public_summary (str): Summary of public documents.
+        private_summary (str): Summary of private documents.
+        target_case (str): Target case description to guide consolidation.
+        llm (Optional[ChatOpenAI]): The language model to use. A new client for
+            `RAG_MODEL_NAME` is created when omitted.
+
+    Returns:
+        str: Combined actionable summary.
+    """
+    logger.info("Generating actionable combined summary...")
+    prompt = build_combined_summary_prompt(public_summary, private_summary, target_case)
+    if llm is None:
+        llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
+    combined_summary_content = completion_cache.invoke(llm, prompt)
+    logger.info("Combined summary generated.")
+    return combined_summary_content
+
+
+async def agenerate_combined_summary(
+    public_summary: str,
+    private_summary: str,
+    target_case: str,
+    llm: Optional[ChatOpenAI] = None,
+) -> str:
+    """
+    Asynchronous counterpart of `generate_combined_summary` built on `llm.ainvoke`.
+
+    Args:
+        public_summary (str): Summary of public documents.
+        private_summary (str): Summary of private documents.
+        target_case (str): Target case description to guide consolidation.
+        llm (Optional[ChatOpenAI]): The language model to use. A new client for
+            `RAG_MODEL_NAME` is created when omitted.
+
+    Returns:
+        str: Combined actionable summary.
+    """
+    logger.info("Generating actionable combined summary...")
+    prompt = build_combined_summary_prompt(public_summary, private_summary, target_case)
+    if llm is None:
+        llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
+    with observe_stage("generate_combined_summary"):
+        combined_summary_content = await completion_cache.ainvoke(llm, prompt)
     logger.info("Combined summary generated.")
     return combined_summary_content
 
 
+async def astream_combined_summary(
+    public_summary: str,
+    private_summary: str,
+    target_case: str,
+    llm: Optional[ChatOpenAI] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the consolidated summary token by token using `llm.astream`.
+
+    Args:
+        public_summary (str): Summary of public documents.
+        private_summary (str): Summary of private documents.
+        target_case (str): Target case description to guide consolidation.
+        llm (Optional[ChatOpenAI]): The language model to use. A new client for
+            `RAG_MODEL_NAME` is created when omitted.
+
+    Yields:
+        str: Chunks of the combined summary as they are produced by the model.
+    """
+    logger.info("Streaming actionable combined summary...")
+    prompt = build_combined_summary_prompt(public_summary, private_summary, target_case)
+    if llm is None:
+        llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
+    with observe_stage("generate_combined_summary_stream"):
+        async for chunk in completion_cache.astream(llm, prompt):
+            yield chunk
+    logger.info("Combined summary streamed.")
+
+
 if __name__ == "__main__":
     # Example usage
     llm = ChatOpenAI(model_name=RAG_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
@@ -0,0 +1,73 @@
+import contextvars
+import time
+from typing import Any, Dict, List, Optional
+
+# Trace of the request being processed; None unless the request asked for one
+current_trace: contextvars.ContextVar[Optional["RequestTrace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class RequestTrace:
+    """
+    Collects a per-stage timing breakdown, LLM token usage and cache events for one request.
+
+    The trace is stored in a context variable. Tasks started with `asyncio.gather`
+    copy the context, so every stage of the request records into the same trace.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.cache_events: List[Dict[str, Any]] = []
+
+    def add_stage(self, stage: str, duration: float, error: bool = False) -> None:
+        """Record the duration of a pipeline stage."""
+        self.stages.append(
+            {
+                "stage": stage,
+                "start_ms": round((time.perf_counter() - duration - self.started) * 1000, 2),
+                "duration_ms": round(duration * 1000, 2),
+                "error": error,
+            }
+        )
+
+    def add_llm_call(self, model: str, input_tokens: int, output_tokens: int) -> None:
+        """Record the token usage of an LLM call."""
+        self.llm_calls.append(
+            {"model": model, "input_tokens": input_tokens, "output_tokens": output_tokens}
+        )
+
+    def add_cache_event(self, cache: str, hit: bool) -> None:
+        """Record a cache lookup."""
+        self.cache_events.append({"cache": cache, "hit": hit})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the trace.
+
+        Returns:
+            Dict[str, Any]: Total duration, stages, LLM calls, token totals and cache events.
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": sorted(self.stages, key=lambda stage: stage["start_ms"]),
+            "llm_calls": self.llm_calls,
+            "input_tokens": sum(call["input_tokens"] for call in self.llm_calls),
+            "output_tokens": sum(call["output_tokens"] for call in self.llm_calls),
+            "cache_events": self.cache_events,
+        }
+
+
+def record_cache_event(cache: str, hit: bool) -> None:
+    """
+    Record a cache lookup in the current request trace, if any.
+
+    Args:
+        cache (str): Name of the cache.
+        hit (bool): Whether the lookup was a hit.
+    """
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_cache_event(cache, hit)
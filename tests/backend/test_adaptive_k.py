@@ -0,0 +1,25 @@
+from src.rag_pipeline.adaptive_k import adaptive_cutoff
+
+
+def test_threshold_is_absolute():
+    scores = [0.62, 0.58, 0.21, 0.19]
+    assert adaptive_cutoff(scores, max_k=5, threshold=0.3, relative_gap=None) == [0, 1]
+    # min_k never keeps a result below the threshold
+    assert adaptive_cutoff([0.1, 0.05], max_k=5, threshold=0.3, min_k=1) == []
+    assert adaptive_cutoff([], max_k=5, threshold=0.3) == []
+
+
+def test_relative_gap_and_max_k():
+    scores = [0.8, 0.75, 0.5, 0.78, 0.7]
+    # 0.5 is more than 25% below the best score; order is kept
+    assert adaptive_cutoff(scores, max_k=5, relative_gap=0.25, min_k=1) == [0, 1, 3, 4]
+    assert adaptive_cutoff(scores, max_k=2, relative_gap=0.25, min_k=1) == [0, 1]
+    assert adaptive_cutoff(scores, max_k=5, relative_gap=None) == [0, 1, 2, 3, 4]
+
+
+def test_min_k_exempts_best_scored_results_from_the_gap():
+    # Ranked by fusion: the best-scored results are not the first ones
+    scores = [0.4, 0.9, 0.5]
+    assert adaptive_cutoff(scores, max_k=5, relative_gap=0.25, min_k=1) == [1]
+    assert adaptive_cutoff(scores, max_k=5, relative_gap=0.25, min_k=2) == [1, 2]
+    assert adaptive_cutoff(scores, max_k=5, threshold=0.45, relative_gap=0.25, min_k=3) == [1, 2]
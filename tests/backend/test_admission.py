@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.rag_pipeline.admission import (
+    BULK_LANE,
+    INTERACTIVE_LANE,
+    AdmissionController,
+    AdmissionRejected,
+    worker_share,
+)
+
+
+def make_controller(**overrides):
+    settings = {
+        "max_concurrency": 2,
+        "max_bulk_concurrency": 1,
+        "max_queue_size": {INTERACTIVE_LANE: 4, BULK_LANE: 4},
+        "max_wait_seconds": 1.0,
+    }
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def test_bulk_lane_never_takes_every_slot():
+    controller = make_controller()
+    running = []
+
+    async def call(lane):
+        async with controller.slot(lane):
+            running.append(controller.stats()[BULK_LANE]["active"])
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(call(BULK_LANE) for _ in range(3)))
+
+    asyncio.run(main())
+    assert max(running) == 1
+
+
+def test_interactive_waiters_are_served_before_bulk():
+    controller = make_controller(max_concurrency=1)
+    order = []
+
+    async def call(lane, name):
+        async with controller.slot(lane):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        first = asyncio.create_task(call(INTERACTIVE_LANE, "first"))
+        await asyncio.sleep(0)
+        bulk = asyncio.create_task(call(BULK_LANE, "bulk"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call(INTERACTIVE_LANE, "interactive"))
+        await asyncio.gather(first, bulk, interactive)
+
+    asyncio.run(main())
+    assert order == ["first", "interactive", "bulk"]
+
+
+def test_full_queue_is_rejected_with_429():
+    controller = make_controller(max_concurrency=1, max_queue_size={INTERACTIVE_LANE: 0})
+
+    async def main():
+        async with controller.slot(INTERACTIVE_LANE):
+            async with controller.slot(INTERACTIVE_LANE):
+                pass
+
+    with pytest.raises(AdmissionRejected) as error:
+        asyncio.run(main())
+    assert error.value.status_code == 429
+
+
+def test_wait_timeout_is_rejected_with_503():
+    controller = make_controller(max_concurrency=1, max_wait_seconds=0.01)
+
+    async def main():
+        async with controller.slot(INTERACTIVE_LANE):
+            async with controller.slot(INTERACTIVE_LANE):
+                pass
+
+    with pytest.raises(AdmissionRejected) as error:
+        asyncio.run(main())
+    assert error.value.status_code == 503
+    assert controller.stats()[INTERACTIVE_LANE]["timed_out"] == 1
+
+
+def test_server_wide_limits_are_split_between_workers():
+    assert worker_share(16, 4) == 4
+    assert worker_share(16, 1) == 16
+    # Every worker keeps at least one slot
+    assert worker_share(2, 4) == 1
@@ -0,0 +1,48 @@
+from src.rag_pipeline.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def build_index():
+    return BM25Index.build(
+        [
+            "Metformin is the first-line therapy for type 2 diabetes.",
+            "Empagliflozin reduces cardiovascular events; avoid if eGFR is below 30.",
+            "Insulin degludec 10 units once daily, titrated to fasting glucose.",
+            "Lifestyle therapy for type 2 diabetes: diet and exercise.",
+        ]
+    )
+
+
+def test_tokenize_keeps_codes_and_doses():
+    assert tokenize("Start 10mg/day; eGFR <30, code E11.9") == [
+        "start",
+        "10mg/day",
+        "egfr",
+        "30",
+        "code",
+        "e11.9",
+    ]
+
+
+def test_search_ranks_rare_terms_first():
+    index = build_index()
+    assert index.search("empagliflozin dose", k=1)[0][0] == 1
+    assert index.search("degludec", k=5) == index.search("degludec", k=1)
+    rows = [row for row, _ in index.search("type 2 diabetes therapy", k=4)]
+    assert set(rows[:2]) == {0, 3}
+    assert index.search("unknown words", k=3) == []
+    assert [row for row, _ in index.search("therapy", k=4, rows=[3])] == [3]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build_index()
+    assert BM25Index.load(tmp_path) is None
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+    assert len(loaded) == 4
+    assert loaded.search("egfr", k=2) == index.search("egfr", k=2)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [3, 1, 2]
+    sparse = [1, 0]
+    assert reciprocal_rank_fusion([dense, sparse]) == [1, 3, 0, 2]
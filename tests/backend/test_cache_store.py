@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+from src.rag_pipeline.cache_store import PersistentLRUCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PersistentLRUCache(db_path=None, max_memory_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = tmp_path / "cache.sqlite"
+    cache = PersistentLRUCache(db_path=db_path, max_memory_entries=1)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+
+    # "a" was evicted from memory but is still on disk
+    assert cache.get("a") == b"1"
+
+    cache.flush()
+    reopened = PersistentLRUCache(db_path=db_path, max_memory_entries=1)
+    assert reopened.get("b") == b"2"
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_stats_count_hits_and_misses():
+    cache = PersistentLRUCache(db_path=None, max_memory_entries=4)
+    cache.set("a", b"1")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["memory_entries"] == 1
+
+
+def test_clear_removes_both_tiers(tmp_path):
+    cache = PersistentLRUCache(db_path=tmp_path / "cache.sqlite", max_memory_entries=4)
+    cache.set("a", b"1")
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_disk_tier_keeps_newest_rows_within_bounds(tmp_path):
+    db_path = tmp_path / "cache.sqlite"
+    cache = PersistentLRUCache(db_path=db_path, max_memory_entries=1, max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.encode())
+        cache.flush()
+
+    reopened = PersistentLRUCache(db_path=db_path, max_memory_entries=4)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == b"c"
+
+
+def test_expired_rows_are_not_served(tmp_path):
+    db_path = tmp_path / "cache.sqlite"
+    cache = PersistentLRUCache(db_path=db_path, max_memory_entries=4)
+    cache.set("a", b"1")
+    cache.flush()
+
+    expired = PersistentLRUCache(db_path=db_path, max_memory_entries=4, max_age_seconds=-1)
+    assert expired.get("a") is None
+
+
+def test_async_lookups_read_disk_off_the_calling_thread(tmp_path):
+    db_path = tmp_path / "cache.sqlite"
+    cache = PersistentLRUCache(db_path=db_path, max_memory_entries=4)
+    cache.set("a", b"1")
+    cache.flush()
+
+    reopened = PersistentLRUCache(db_path=db_path, max_memory_entries=4)
+    reopened.set("b", b"2")
+    reader_threads = []
+    get_disk = reopened._get_disk
+
+    def recording_get_disk(keys):
+        reader_threads.append(threading.get_ident())
+        # The memory tier stays usable while the disk is read
+        assert reopened._lock.acquire(blocking=False)
+        reopened._lock.release()
+        return get_disk(keys)
+
+    reopened._get_disk = recording_get_disk
+    found = asyncio.run(reopened.aget_many(["a", "b", "missing"]))
+    assert found == {"a": b"1", "b": b"2", "missing": None}
+    assert reader_threads and threading.get_ident() not in reader_threads
+    assert asyncio.run(reopened.aget("a")) == b"1"
+    assert reopened.stats()["disk_hits"] == 1
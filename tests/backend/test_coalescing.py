@@ -0,0 +1,57 @@
+import asyncio
+
+from src.rag_pipeline.coalescing import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_run_once():
+    single_flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(single_flight.run("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(calls) == 1
+    assert single_flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    single_flight = SingleFlight("test")
+
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    async def main():
+        first = await asyncio.gather(
+            single_flight.run("a", lambda: work("a")),
+            single_flight.run("b", lambda: work("b")),
+        )
+        second = await single_flight.run("a", lambda: work("again"))
+        return first, second
+
+    assert asyncio.run(main()) == (["a", "b"], "again")
+    assert single_flight.stats()["executions"] == 3
+
+
+def test_errors_propagate_to_every_waiter():
+    single_flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            single_flight.run("key", failing),
+            single_flight.run("key", failing),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.rag_pipeline.admission import BULK_LANE, INTERACTIVE_LANE
+from src.rag_pipeline.cache_store import PersistentLRUCache
+
+# The lane variable read by the cache, which imports `admission` by its bare name
+from src.rag_pipeline.completion_cache import CompletionCache, completion_cache_key, current_lane
+
+
+class FakeLLM:
+    def __init__(self, model_name="gpt-4o-mini", temperature=0.5):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=f"summary of {prompt}")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+    async def astream(self, prompt):
+        self.calls += 1
+        for token in ("summary ", "of ", prompt):
+            yield SimpleNamespace(content=token)
+
+
+def make_cache():
+    return CompletionCache(PersistentLRUCache(db_path=None, max_memory_entries=8))
+
+
+def test_key_depends_on_model_temperature_and_prompt():
+    key = completion_cache_key(FakeLLM(), "prompt")
+    assert key == completion_cache_key(FakeLLM(), "prompt")
+    assert key != completion_cache_key(FakeLLM(model_name="gpt-4o"), "prompt")
+    assert key != completion_cache_key(FakeLLM(temperature=0.0), "prompt")
+    assert key != completion_cache_key(FakeLLM(), "other prompt")
+
+
+def test_repeated_prompt_is_served_from_cache():
+    cache, llm = make_cache(), FakeLLM()
+    assert cache.invoke(llm, "case") == "summary of case"
+    assert asyncio.run(cache.ainvoke(llm, "case")) == "summary of case"
+    assert llm.calls == 1
+
+
+def test_streamed_completion_is_cached_whole():
+    cache, llm = make_cache(), FakeLLM()
+
+    async def collect():
+        return [chunk async for chunk in cache.astream(llm, "case")]
+
+    assert asyncio.run(collect()) == ["summary ", "of ", "case"]
+    assert asyncio.run(collect()) == ["summary of case"]
+    assert llm.calls == 1
+
+
+def test_concurrent_misses_share_a_call_only_within_a_lane():
+    class SlowLLM(FakeLLM):
+        async def ainvoke(self, prompt):
+            await asyncio.sleep(0.01)
+            return self.invoke(prompt)
+
+    cache, llm = make_cache(), SlowLLM()
+
+    async def ask(lane):
+        current_lane.set(lane)
+        return await cache.ainvoke(llm, "case")
+
+    async def main():
+        return await asyncio.gather(ask(BULK_LANE), ask(BULK_LANE), ask(INTERACTIVE_LANE))
+
+    assert asyncio.run(main()) == ["summary of case"] * 3
+    # The interactive request does not join the bulk call
+    assert llm.calls == 2
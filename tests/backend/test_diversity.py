@@ -0,0 +1,35 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.rag_pipeline.diversity import select_diverse
+
+
+def candidates():
+    # 0 and 1 are the same paragraph from two yearly editions, 2 and 3 are distinct
+    return np.array(
+        [[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.8, 0.6, 0.0], [0.7, 0.0, 0.7]],
+        dtype=np.float32,
+    )
+
+
+def test_dedup_keeps_ranking_order_without_duplicates():
+    selected = select_diverse(np.array([1.0, 0.0, 0.0]), candidates(), k=3, mode="dedup")
+    assert [position for position, _ in selected] == [0, 2, 3]
+    assert selected[0][1] == pytest.approx(1.0)
+
+
+def test_mmr_prefers_novel_candidates():
+    query = np.array([1.0, 0.0, 0.1])
+    selected = select_diverse(query, candidates(), k=2, mode="mmr", mmr_lambda=0.5)
+    assert [position for position, _ in selected] == [0, 3]
+    # With relevance only, MMR still drops the duplicate
+    selected = select_diverse(query, candidates(), k=4, mode="mmr", mmr_lambda=1.0)
+    assert 1 not in [position for position, _ in selected]
+
+
+def test_off_mode_and_unknown_mode():
+    query = np.array([1.0, 0.0, 0.0])
+    assert [position for position, _ in select_diverse(query, candidates(), 2, "off")] == [0, 1]
+    with pytest.raises(ValueError):
+        select_diverse(query, candidates(), 2, "cluster")
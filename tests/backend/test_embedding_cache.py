@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings
+
+from src.rag_pipeline.cache_store import PersistentLRUCache
+from src.rag_pipeline.embedding_cache import CachedEmbeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """Returns float64 vectors that float32 cannot represent exactly."""
+
+    model_name = "fake"
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [0.1, 1 / 3, len(text) / 7]
+
+
+def test_miss_and_hit_return_identical_vectors():
+    embeddings = CachedEmbeddings(FakeEmbeddings(), PersistentLRUCache(None, 8))
+    fresh = embeddings.embed_query("metformin")
+    assert embeddings.embed_query("metformin") == fresh
+    assert embeddings.embed_documents(["metformin"]) == [fresh]
+    assert embeddings.stats()["memory_hits"] == 2
+
+
+def test_async_miss_returns_stored_precision():
+    embeddings = CachedEmbeddings(FakeEmbeddings(), PersistentLRUCache(None, 8))
+    fresh = asyncio.run(embeddings.aembed_query("insulin"))
+    assert fresh != FakeEmbeddings().embed_query("insulin")
+    assert asyncio.run(embeddings.aembed_query("insulin")) == fresh
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.rag_pipeline.index_manager import IndexManager
+from src.rag_pipeline.index_manifest import publish_index_version
+
+
+def fake_loader(vector_counts):
+    def load(version_dir):
+        ntotal, documents = vector_counts[version_dir.name]
+        return SimpleNamespace(
+            index=SimpleNamespace(ntotal=ntotal),
+            index_to_docstore_id={i: str(i) for i in range(documents)},
+        )
+
+    return load
+
+
+def publish(base_dir, version):
+    version_dir = base_dir / "versions" / version
+    version_dir.mkdir(parents=True)
+    publish_index_version(base_dir, version_dir)
+
+
+def test_reload_swaps_version_and_drains_old_one(tmp_path):
+    publish(tmp_path, "v1")
+    swaps = []
+    manager = IndexManager(
+        "public",
+        tmp_path,
+        fake_loader({"v1": (3, 3), "v2": (5, 5)}),
+        on_swap=lambda name, store: swaps.append(store.index.ntotal),
+    )
+
+    async def main():
+        with manager.lease() as old_store:
+            publish(tmp_path, "v2")
+            result = await manager.reload()
+            # The in-flight request keeps the version it started with
+            assert old_store.index.ntotal == 3
+            assert manager.stats()["draining"] == [{"version": "v1", "leases": 1}]
+        return result
+
+    result = asyncio.run(main())
+
+    assert result == {"swapped": True, "previous_version": "v1", "version": "v2"}
+    assert manager.version == "v2"
+    assert manager.stats()["draining"] == []
+    assert swaps == [3, 5]
+    assert asyncio.run(manager.reload()) == {"swapped": False, "version": "v2"}
+
+
+def test_reload_keeps_live_version_when_validation_fails(tmp_path):
+    publish(tmp_path, "v1")
+    manager = IndexManager("private", tmp_path, fake_loader({"v1": (2, 2), "v2": (4, 3)}))
+    publish(tmp_path, "v2")
+
+    with pytest.raises(ValueError):
+        asyncio.run(manager.reload())
+
+    assert manager.version == "v1"
+    assert manager.stats()["reloads"] == {"succeeded": 0, "failed": 1}
@@ -0,0 +1,62 @@
+import pytest
+
+from paths_and_constants import PRIVATE_EMBEDDING_MODEL
+from src.rag_pipeline.index_manifest import (
+    UNVERSIONED,
+    infer_legacy_manifest,
+    new_index_version_dir,
+    publish_index_version,
+    read_index_manifest,
+    resolve_index_version,
+    write_index_manifest,
+)
+
+
+def test_manifest_round_trip(tmp_path):
+    written = write_index_manifest(
+        tmp_path,
+        provider="sentence_transformers",
+        model_name=PRIVATE_EMBEDDING_MODEL,
+        dimension=768,
+        vector_count=10,
+    )
+    assert read_index_manifest(tmp_path) == written
+    assert written["embedding_model"] == PRIVATE_EMBEDDING_MODEL
+
+
+def test_read_missing_manifest_returns_none(tmp_path):
+    assert read_index_manifest(tmp_path) is None
+
+
+def test_infer_legacy_manifest_from_dimension(tmp_path):
+    manifest = infer_legacy_manifest(tmp_path, 768)
+    assert manifest["embedding_model"] == PRIVATE_EMBEDDING_MODEL
+    assert manifest["dimension"] == 768
+
+
+def test_infer_legacy_manifest_rejects_unknown_dimension(tmp_path):
+    with pytest.raises(ValueError):
+        infer_legacy_manifest(tmp_path, 42)
+
+
+def test_unversioned_index_resolves_to_its_directory(tmp_path):
+    assert resolve_index_version(tmp_path) == (UNVERSIONED, tmp_path)
+
+
+def test_publish_index_version_switches_current_and_prunes(tmp_path):
+    versions = []
+    for name in ("20250101T000000000000Z", "20250102T000000000000Z", "20250103T000000000000Z"):
+        version_dir = tmp_path / "versions" / name
+        version_dir.mkdir(parents=True)
+        publish_index_version(tmp_path, version_dir, keep=2)
+        versions.append(version_dir)
+
+    assert resolve_index_version(tmp_path) == (versions[-1].name, versions[-1])
+    assert not versions[0].exists()
+    assert versions[1].exists()
+
+
+def test_new_index_version_dir_is_created_under_versions(tmp_path):
+    version_dir = new_index_version_dir(tmp_path)
+    assert version_dir.is_dir()
+    assert version_dir.parent == tmp_path / "versions"
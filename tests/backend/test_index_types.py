@@ -0,0 +1,109 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from src.data.process_data.benchmark_faiss_index import sample_queries
+from src.rag_pipeline.index_types import (
+    FLAT,
+    HNSW,
+    IVF,
+    PQ,
+    SQ8,
+    SQ_FP16,
+    ExactRerankIndex,
+    build_index,
+    encoding_factory_string,
+    encoding_report,
+    default_nlist,
+    describe_index,
+    enable_reconstruction,
+    filtered_search,
+    index_factory_string,
+    reconstruct_rows,
+    reconstruct_vectors,
+    recall_at_k,
+    set_search_params,
+)
+
+
+def test_default_nlist_leaves_enough_training_points():
+    assert default_nlist(10) == 1
+    assert default_nlist(10_000) == 256
+    assert default_nlist(1_000) == 25
+
+
+def test_unknown_index_type_is_rejected():
+    with pytest.raises(ValueError):
+        index_factory_string("LSH", 100, 16)
+
+
+def test_encoding_factory_strings():
+    assert encoding_factory_string(SQ8, 1000, 768) == "SQ8"
+    assert encoding_factory_string(PQ, 100_000, 1536) == "PQ96x8"
+    assert encoding_factory_string(PQ, 100, 768) == "PQ48x6"
+    assert index_factory_string(IVF, 10_000, 768, SQ_FP16) == "IVF256,SQfp16"
+    with pytest.raises(ValueError):
+        index_factory_string(HNSW, 1000, 768, PQ)
+
+
+@pytest.mark.parametrize("encoding", [SQ_FP16, SQ8, PQ])
+def test_compressed_encodings_with_exact_rerank(encoding):
+    vectors = np.random.default_rng(2).normal(size=(1000, 32)).astype(np.float32)
+    index = build_index(vectors, FLAT, encoding)
+
+    report = encoding_report(vectors, index, vectors[:50], k=5, rerank_factor=4)
+
+    assert report["compression_ratio"] > 1.5
+    assert report["recall_at_k_reranked"] >= report["recall_at_k"] - 1e-9
+    distances, labels = ExactRerankIndex(index, vectors, 4).search(vectors[:3], 5)
+    assert list(labels[:, 0]) == [0, 1, 2]
+    assert np.allclose(distances[:, 0], 0)
+
+
+@pytest.mark.parametrize("index_type", [FLAT, IVF, HNSW])
+def test_built_index_finds_stored_vectors(index_type):
+    vectors = np.random.default_rng(0).normal(size=(500, 16)).astype(np.float32)
+    index = build_index(vectors, index_type)
+    set_search_params(index, nprobe=8, ef_search=64)
+
+    _, ids = index.search(vectors[:20], 1)
+    assert describe_index(index) == index_type
+    assert (ids[:, 0] == np.arange(20)).mean() >= 0.9
+    assert np.allclose(reconstruct_vectors(index)[:5], vectors[:5], atol=1e-5)
+
+
+def test_recall_at_k():
+    truth = np.array([[0, 1], [2, 3]])
+    assert recall_at_k(truth, np.array([[1, 0], [2, 4]])) == 0.75
+
+
+def test_sample_queries_is_deterministic():
+    vectors = np.random.default_rng(1).normal(size=(50, 4)).astype(np.float32)
+    assert np.array_equal(sample_queries(vectors, 10), sample_queries(vectors, 10))
+
+
+@pytest.mark.parametrize("index_type", [FLAT, IVF, HNSW])
+def test_filtered_search_only_returns_selected_rows(index_type):
+    vectors = np.random.default_rng(2).normal(size=(400, 16)).astype(np.float32)
+    index = build_index(vectors, index_type)
+    set_search_params(index, nprobe=16, ef_search=64)
+    rows = np.arange(0, 400, 4)
+    _, ids = filtered_search(index, vectors[:3], 5, rows)
+    assert np.isin(ids, rows).all()
+    # Vector 0 is in the subset, so it is still its own nearest neighbor
+    assert ids[0, 0] == 0
+
+    _, ids = filtered_search(index, vectors[:1], 5, np.empty(0, dtype=np.int64))
+    assert (ids == -1).all()
+
+
+@pytest.mark.parametrize("index_type", [FLAT, IVF, HNSW])
+def test_reconstruct_rows_reads_selected_vectors(index_type):
+    vectors = np.random.default_rng(3).normal(size=(300, 8)).astype(np.float32)
+    index = build_index(vectors, index_type)
+    enable_reconstruction(index)
+    rows = [42, 7, 299]
+    assert np.allclose(reconstruct_rows(index, rows), vectors[rows], atol=1e-5)
+    assert np.allclose(reconstruct_rows(ExactRerankIndex(index, vectors, 4), rows), vectors[rows])
+    assert reconstruct_rows(index, []).shape == (0, 8)
@@ -0,0 +1,123 @@
+import logging
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from src.rag_pipeline.memory_report import (
+    AllocationTracker,
+    deep_sizeof,
+    faiss_index_bytes,
+    memory_report,
+    process_rss_bytes,
+)
+
+
+def test_deep_sizeof_counts_nested_objects_once():
+    shared = "x" * 10_000
+    assert deep_sizeof({"a": shared, "b": [shared]}) < 2 * len(shared)
+    assert deep_sizeof(SimpleNamespace(payload=shared)) > len(shared)
+
+
+def test_shared_objects_are_counted_for_one_component():
+    http_client = SimpleNamespace(buffer="x" * 10_000, logger=logging.getLogger("shared"))
+    clients = {
+        "public_embeddings": SimpleNamespace(client=http_client),
+        "llm": SimpleNamespace(client=http_client),
+    }
+    report = memory_report({}, clients)["clients_bytes"]
+    assert report["public_embeddings"] > 10_000
+    assert report["llm"] < 1_000
+
+
+def test_faiss_index_bytes_uses_code_size_or_float_vectors():
+    assert faiss_index_bytes(SimpleNamespace(ntotal=10, d=4, code_size=4)) == 40
+    assert faiss_index_bytes(SimpleNamespace(ntotal=10, d=4)) == 160
+
+
+def test_faiss_index_bytes_counts_hnsw_links_and_ivf_lists():
+    faiss = pytest.importorskip("faiss")
+    np = pytest.importorskip("numpy")
+    vectors = np.random.default_rng(0).random((500, 8), dtype=np.float32)
+
+    hnsw = faiss.IndexHNSWFlat(8, 16)
+    hnsw.add(vectors)
+    links = hnsw.hnsw.neighbors.size() * 4
+    assert links > 0
+    assert faiss_index_bytes(hnsw) >= 500 * 8 * 4 + links
+
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatL2(8), 8, 4)
+    ivf.train(vectors)
+    ivf.add(vectors)
+    # Codes, one int64 id per vector and the coarse centroids
+    assert faiss_index_bytes(ivf) == 500 * 8 * 4 + 500 * 8 + 4 * 8 * 4
+
+
+class FakeTensor:
+    def __init__(self, numel, pointer):
+        self._numel = numel
+        self._pointer = pointer
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return 4
+
+    def data_ptr(self):
+        return self._pointer
+
+
+class FakeModule:
+    def __init__(self, parameters, buffers):
+        self._params = parameters
+        self._bufs = buffers
+
+    def parameters(self):
+        return iter(self._params)
+
+    def buffers(self):
+        return iter(self._bufs)
+
+
+def test_deep_sizeof_counts_torch_storage_once():
+    weight = FakeTensor(1_000_000, pointer=1)
+    # A tied weight shares the storage of `weight`
+    module = FakeModule([weight, FakeTensor(1_000_000, pointer=1)], [FakeTensor(10, pointer=2)])
+    size = deep_sizeof(SimpleNamespace(client=module))
+    assert 4_000_040 <= size < 4_100_000
+
+
+def test_process_rss_bytes_is_positive():
+    assert process_rss_bytes() > 0
+
+
+def test_allocation_tracker_reports_growth():
+    tracker = AllocationTracker(frames=1)
+    with pytest.raises(RuntimeError):
+        tracker.diff()
+
+    tracker.start()
+    try:
+        retained = [bytearray(1024) for _ in range(100)]
+        report = tracker.diff(top_n=5)
+    finally:
+        tracker.stop()
+
+    assert len(retained) == 100
+    assert not tracker.active
+    assert len(report["top_allocations"]) <= 5
+    assert any(entry["size_diff_bytes"] > 0 for entry in report["top_allocations"])
+
+
+def test_allocation_tracker_leaves_foreign_tracing_running():
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.start(1)
+    try:
+        tracker = AllocationTracker(frames=1)
+        tracker.start()
+        tracker.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from src.rag_pipeline.metrics import (
+    LLM_TOKENS,
+    STAGE_ERRORS,
+    STAGE_LATENCY,
+    observe_stage,
+    record_token_usage,
+)
+
+
+def sample_value(metric, suffix, **labels):
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix) and sample.labels == labels:
+                return sample.value
+    return 0.0
+
+
+def test_observe_stage_records_latency_and_errors():
+    before = sample_value(STAGE_LATENCY, "_count", stage="test_stage")
+    with observe_stage("test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with observe_stage("test_stage"):
+            raise ValueError("boom")
+
+    assert sample_value(STAGE_LATENCY, "_count", stage="test_stage") == before + 2
+    assert sample_value(STAGE_ERRORS, "_total", stage="test_stage") >= 1
+
+
+def test_record_token_usage_counts_input_and_output_tokens():
+    llm = SimpleNamespace(model_name="test-model")
+    message = SimpleNamespace(usage_metadata={"input_tokens": 10, "output_tokens": 3})
+    record_token_usage(llm, message)
+    record_token_usage(llm, SimpleNamespace(usage_metadata=None))
+
+    assert sample_value(LLM_TOKENS, "_total", model="test-model", kind="input") == 10
+    assert sample_value(LLM_TOKENS, "_total", model="test-model", kind="output") == 3
+
+
+def test_metrics_module_can_be_imported_under_its_bare_name():
+    import metrics
+
+    with metrics.observe_stage("bare_import_stage"):
+        pass
+    assert b"bare_import_stage" in metrics.render_metrics()
+
+
+def test_multiprocess_mode_aggregates_the_metrics_of_every_worker(tmp_path):
+    # prometheus_client picks multiprocess mode at import time, so each "worker" is a
+    # fresh interpreter sharing the metrics directory
+    root = Path(__file__).resolve().parents[2]
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(root), str(root / "src" / "rag_pipeline"), env.get("PYTHONPATH", "")]
+    )
+    record = "import metrics\nwith metrics.observe_stage('worker_stage'):\n    pass"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], env=env, cwd=root, check=True)
+
+    render = "import sys, metrics\nsys.stdout.write(metrics.render_metrics().decode())"
+    output = subprocess.run(
+        [sys.executable, "-c", render], env=env, cwd=root, check=True, capture_output=True
+    ).stdout.decode()
+    assert 'rag_stage_duration_seconds_count{stage="worker_stage"} 2.0' in output
@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import faiss
+
+from src.rag_pipeline.mmap_docstore import (
+    MmapColumn,
+    has_mmap_docstore,
+    load_mmap_vectorstore,
+    save_mmap_index,
+    write_column,
+)
+
+
+def build_vectorstore():
+    vectors = np.eye(3, dtype=np.float32)
+    index = faiss.IndexFlatL2(3)
+    index.add(vectors)
+    documents = {
+        f"doc-{i}": Document(page_content=f"text {i}", metadata={"source": f"s{i % 2}"})
+        for i in range(3)
+    }
+    return FAISS(None, index, InMemoryDocstore(documents), {i: f"doc-{i}" for i in range(3)})
+
+
+def test_mmap_vectorstore_round_trip(tmp_path):
+    vectorstore = build_vectorstore()
+    save_mmap_index(tmp_path, vectorstore)
+    assert has_mmap_docstore(tmp_path)
+    assert not (tmp_path / "index.pkl").exists()
+    # Chunks sharing metadata store it once
+    assert len(MmapColumn(tmp_path, "docstore_metadata")) == 2
+
+    loaded = load_mmap_vectorstore(tmp_path)
+    assert loaded.index.ntotal == 3
+    assert len(loaded.index_to_docstore_id) == 3
+
+    hits = loaded.similarity_search_by_vector([0.0, 1.0, 0.0], k=1)
+    assert hits[0].page_content == "text 1"
+    assert hits[0].metadata == {"source": "s1"}
+    assert hits[0].id == "doc-1"
+    assert isinstance(loaded.docstore.search(3), str)
+
+
+def test_column_round_trip_with_empty_values(tmp_path):
+    write_column(tmp_path, "values", [b"", "héllo".encode("utf-8"), b""])
+    column = MmapColumn(tmp_path, "values")
+    assert [column[row] for row in range(len(column))] == ["", "héllo", ""]
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.rag_pipeline.partitions import (
+    CHILDREN,
+    GENERAL,
+    PREGNANCY,
+    PartitionIndex,
+    infer_population,
+    partition_filters,
+)
+
+
+def build_index():
+    return PartitionIndex.build(
+        [
+            {"file_name": "diabetes_in_pregnancy_2023.pdf", "source": "nice_org_uk", "year": 2023},
+            {"file_name": "type_2_diabetes_in_adults_2023.pdf", "source": "nice_org_uk"},
+            {"population": CHILDREN, "source": "nice_org_uk", "year": 2022},
+            {"file_name": "global_report_on_diabetes_2016.pdf", "source": "who", "year": 2016},
+        ]
+    )
+
+
+def test_infer_population_from_file_name():
+    assert infer_population("diabetes_in_pregnancy_2023.pdf") == PREGNANCY
+    assert infer_population("the_role_of_childhood_obesity_2023.pdf") == CHILDREN
+    assert (
+        infer_population("diabetes_type_1_and_type_2_in_children_and_young_people_2023.pdf")
+        == CHILDREN
+    )
+    assert infer_population("standards_of_care_in_diabetes_2024.pdf") == GENERAL
+
+
+def test_rows_combine_values_and_fields():
+    index = build_index()
+    assert index.rows({"population": [GENERAL]}).tolist() == [1, 3]
+    assert index.rows({"population": [PREGNANCY, CHILDREN]}).tolist() == [0, 2]
+    assert index.rows({"population": [GENERAL], "source": ["nice_org_uk"]}).tolist() == [1]
+    assert index.rows({"year": ["2016"]}).tolist() == [3]
+    assert index.rows({"population": ["elderly"]}).tolist() == []
+    assert index.rows({"unknown_field": ["x"]}) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    assert PartitionIndex.load(tmp_path) is None
+    build_index().save(tmp_path)
+    loaded = PartitionIndex.load(tmp_path)
+    assert loaded.stats() == build_index().stats()
+    assert loaded.rows({"population": [PREGNANCY]}).tolist() == [0]
+
+
+def test_partition_filters_from_patient_data():
+    assert partition_filters({"age": 30, "pregnancy_status": "Pregnant"}) == {
+        "population": [PREGNANCY]
+    }
+    assert partition_filters({"age": 12, "pregnancy_status": None}) == {"population": [CHILDREN]}
+    assert partition_filters({"age": 55, "pregnancy_status": "Not Pregnant"}) == {
+        "population": [GENERAL]
+    }
+    assert partition_filters({}) == {"population": [GENERAL]}
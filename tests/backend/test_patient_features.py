@@ -0,0 +1,68 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.rag_pipeline.patient_features import (
+    PatientFeatureIndex,
+    encode_patient,
+    feature_columns,
+)
+
+
+def patient(hba1c, gfr, gender="Female", co_morbidities="", **extra):
+    return {
+        "hba1c_percent": hba1c,
+        "kidney_function_gfr": gfr,
+        "gender": gender,
+        "co_morbidities": co_morbidities,
+        **extra,
+    }
+
+
+def build_index():
+    return PatientFeatureIndex.build(
+        [
+            patient(5.0, 110.0),
+            patient(9.5, 40.0, co_morbidities="Chronic kidney disease, Hypertension"),
+            patient(9.0, 45.0, gender="Male", co_morbidities="Chronic kidney disease"),
+            patient(6.0, 100.0, gender="Male"),
+        ]
+    )
+
+
+def test_encode_patient_scales_labs_and_one_hot_encodes_categories():
+    columns = feature_columns()
+    row = encode_patient(
+        patient(6.5, None, co_morbidities="Obesity, Hypertension", symptoms=["Thirst"]), columns
+    )
+    values = dict(zip(columns, row.tolist()))
+    # The top of the normal range maps to 1
+    assert values[("hba1c_percent", "")] == pytest.approx(1.0)
+    assert np.isnan(values[("kidney_function_gfr", "")])
+    assert values[("gender", "Female")] == 1.0
+    assert values[("gender", "Male")] == 0.0
+    assert values[("co_morbidities", "Obesity")] == 1.0
+    assert values[("co_morbidities", "Hypertension")] == 1.0
+    assert values[("symptoms", "Thirst")] == 1.0
+
+
+def test_search_finds_patients_with_similar_labs():
+    index = build_index()
+    query = patient(9.2, 42.0, co_morbidities="Chronic kidney disease")
+    rows = [row for row, _ in index.search(query, k=2)]
+    assert set(rows) == {1, 2}
+    assert [row for row, _ in index.search(query, k=2, rows=np.array([0, 3]))] == [3, 0]
+    # Labs missing from the query do not count
+    distances = index.distances({"gender": "Male"})
+    assert distances[3] == 0.0
+    assert distances[2] == pytest.approx(1.0)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    assert PatientFeatureIndex.load(tmp_path) is None
+    index = build_index()
+    index.save(tmp_path)
+    loaded = PatientFeatureIndex.load(tmp_path)
+    assert len(loaded) == 4
+    query = patient(5.1, 108.0)
+    assert loaded.search(query, k=4) == index.search(query, k=4)
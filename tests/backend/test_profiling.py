@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyinstrument")
+
+from src.rag_pipeline import profiling
+from src.rag_pipeline.profiling import ProfileInProgress, profile_to_file
+
+
+def test_concurrent_profiles_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    started = asyncio.Event()
+
+    async def profiled_request():
+        with profile_to_file("query") as profile:
+            started.set()
+            await asyncio.sleep(0.05)
+        return profile
+
+    async def second_request():
+        await started.wait()
+        with profile_to_file("query"):
+            pass
+
+    async def main():
+        return await asyncio.gather(profiled_request(), second_request(), return_exceptions=True)
+
+    profile, rejected = asyncio.run(main())
+    assert isinstance(rejected, ProfileInProgress)
+    assert profile["path"].startswith(str(tmp_path))
+
+    # The profiler is free again once the first request finished
+    with profile_to_file("query") as profile:
+        pass
+    assert profile["path"]
@@ -0,0 +1,284 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("prometheus_client")
+
+import httpx
+from fastapi.testclient import TestClient
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Imported by their bare names, like rag_api imports its dependencies, so the tests
+# patch the same module objects the API uses
+import profiling
+import query_logger
+import rag_api
+import retriever
+from admin_state import SharedAdminState
+from cache_store import PersistentLRUCache
+from coalescing import SingleFlight
+from index_manager import IndexManager
+from index_manifest import publish_index_version
+from semantic_cache import SemanticCache
+
+ADMIN_KEY = "test-admin-key"
+FAILING_AGE = 99
+
+PATIENT = {"age": 45, "gender": "Female", "hba1c_percent": 8.1}
+QUERY = {"patient_data": PATIENT, "base_query": "What is the recommended treatment?"}
+
+
+class FakeLLM:
+    """Answers every prompt with a fixed summary, after a short delay."""
+
+    model_name = "fake-llm"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if f"age: {FAILING_AGE};" in prompt:
+            raise RuntimeError("LLM failure")
+        return SimpleNamespace(content=f"summary {self.calls}", usage_metadata=None)
+
+    async def astream(self, prompt):
+        self.calls += 1
+        for token in ("combined ", "summary"):
+            yield SimpleNamespace(content=token, usage_metadata=None)
+
+
+def build_vectorstore(name, version):
+    texts = [f"{name} {version} chunk about treatment {i}" for i in range(6)]
+    return FAISS.from_texts(texts, DeterministicFakeEmbedding(size=16))
+
+
+def publish(base_dir, version):
+    version_dir = base_dir / "versions" / version
+    version_dir.mkdir(parents=True)
+    publish_index_version(base_dir, version_dir)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    llm = FakeLLM()
+    managers = {}
+    for name in ("public", "private"):
+        publish(tmp_path / name, "v1")
+        managers[name] = IndexManager(
+            name,
+            tmp_path / name,
+            lambda version_dir, name=name: build_vectorstore(name, version_dir.name),
+            rag_api.on_index_swap,
+        )
+
+    monkeypatch.setattr(rag_api, "llm", llm)
+    monkeypatch.setattr(rag_api, "index_managers", managers)
+    monkeypatch.setattr(rag_api, "ADMIN_API_KEY", ADMIN_KEY)
+    monkeypatch.setattr(rag_api, "INDEX_RELOAD_POLL_SECONDS", 0)
+    monkeypatch.setattr(rag_api, "ADMIN_SYNC_POLL_SECONDS", 0)
+    monkeypatch.setattr(rag_api, "admin_state", SharedAdminState(tmp_path / "admin_state.json"))
+    monkeypatch.setattr(rag_api, "search_params", dict(rag_api.search_params))
+    monkeypatch.setattr(rag_api, "query_single_flight", SingleFlight("query"))
+    monkeypatch.setattr(
+        rag_api,
+        "semantic_cache",
+        SemanticCache(similarity_threshold=0.99, ttl_seconds=60, max_entries=100),
+    )
+    monkeypatch.setattr(rag_api.completion_cache, "store", PersistentLRUCache(None, 100))
+    monkeypatch.setattr(retriever, "get_reranker", lambda: None)
+    monkeypatch.setattr(query_logger, "LOG_FILE", tmp_path / "query_logs.jsonl")
+
+    with TestClient(rag_api.app) as client:
+        yield SimpleNamespace(client=client, llm=llm, base_dir=tmp_path)
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_query_is_answered_then_served_from_the_semantic_cache(api):
+    first = api.client.post("/query", json=QUERY)
+    assert first.status_code == 200
+    body = first.json()
+    assert body["cache_hit"] is False
+    assert body["public_sources"] and "score" in body["public_sources"][0]
+
+    second = api.client.post("/query", json=QUERY)
+    assert second.json()["cache_hit"] is True
+    assert second.json()["combined_summary"] == body["combined_summary"]
+
+    # Another patient never gets the cached answer
+    other = api.client.post("/query", json={**QUERY, "patient_data": {**PATIENT, "age": 60}})
+    assert other.json()["cache_hit"] is False
+
+
+def test_index_reload_swaps_versions_and_invalidates_the_semantic_cache(api):
+    api.client.post("/query", json=QUERY)
+    publish(api.base_dir / "public", "v2")
+
+    assert api.client.post("/admin/indexes/reload").status_code == 403
+    response = api.client.post("/admin/indexes/reload", headers={"X-Admin-Key": ADMIN_KEY})
+    assert response.status_code == 200
+    assert response.json()["public"] == {"swapped": True, "previous_version": "v1", "version": "v2"}
+    assert response.json()["private"] == {"swapped": False, "version": "v1"}
+
+    after = api.client.post("/query", json=QUERY).json()
+    assert after["cache_hit"] is False
+    assert all("v2" in source["text"] for source in after["public_sources"])
+
+
+def test_identical_concurrent_queries_share_one_pipeline_run(api):
+    async def main():
+        transport = httpx.ASGITransport(app=rag_api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/query", json=QUERY) for _ in range(3)))
+
+    responses = asyncio.run(main())
+    assert [response.status_code for response in responses] == [200] * 3
+    assert len({response.json()["combined_summary"] for response in responses}) == 1
+    stats = api.client.get("/cache/stats").json()["coalesced_queries"]
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 2
+
+
+def test_stream_emits_events_in_order(api):
+    response = api.client.post("/query/stream", json=QUERY)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "sources"
+    assert sorted(names[1:3]) == ["private_summary", "public_summary"]
+    assert names[3:] == ["combined_token", "combined_token", "done"]
+    assert "".join(data["token"] for name, data in events if name == "combined_token") == (
+        "combined summary"
+    )
+
+    cached = parse_sse(api.client.post("/query/stream", json=QUERY).text)
+    assert cached[0][0] == "sources" and cached[0][1]["cache_hit"] is True
+    assert cached[-1][0] == "done"
+
+
+def test_batch_streams_one_line_per_request_with_per_item_errors(api):
+    failing = {**QUERY, "patient_data": {**PATIENT, "age": FAILING_AGE}}
+    response = api.client.post("/query/batch", json=[QUERY, failing, QUERY])
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0]["result"]["public_sources"]
+    assert "error" in by_index[1] and "result" not in by_index[1]
+    assert by_index[2]["result"]["combined_summary"]
+
+
+def test_batch_is_retrieved_in_chunks_and_a_failed_chunk_only_fails_its_lines(api, monkeypatch):
+    retrieve = rag_api.aretrieve_context_batch
+    chunk_sizes = []
+
+    async def chunked_retrieve(queries, *args, **kwargs):
+        chunk_sizes.append(len(queries))
+        if len(chunk_sizes) == 2:
+            raise RuntimeError("search failed")
+        return await retrieve(queries, *args, **kwargs)
+
+    monkeypatch.setattr(rag_api, "BATCH_RETRIEVAL_CHUNK_SIZE", 2)
+    monkeypatch.setattr(rag_api, "aretrieve_context_batch", chunked_retrieve)
+    response = api.client.post("/query/batch", json=[QUERY] * 5)
+    by_index = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+
+    assert chunk_sizes == [2, 2, 1]
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert [index for index, line in by_index.items() if "error" in line] == [2, 3]
+    assert all("result" in by_index[index] for index in (0, 1, 4))
+
+
+def test_queries_are_appended_to_the_query_log(api):
+    api.client.post("/query", json=QUERY)
+    api.client.post("/query", json={**QUERY, "patient_data": {**PATIENT, "age": 60}})
+    entries = [json.loads(line) for line in query_logger.LOG_FILE.read_text().splitlines()]
+    assert len(entries) == 2
+    assert [entry["query"].split(";")[0] for entry in entries] == ["age: 45", "age: 60"]
+    assert entries[0]["combined_summary"] and entries[0]["public_sources"]
+
+
+def test_admin_actions_of_other_workers_are_applied_on_sync(api):
+    other_worker = SharedAdminState(rag_api.admin_state.path)
+    api.client.post("/query", json=QUERY)
+
+    other_worker.publish("invalidate", {})
+    other_worker.publish("search_params", {"nprobe": 7})
+    other_worker.publish("reload", {"force": True})
+    asyncio.run(rag_api.sync_admin_actions())
+
+    assert api.client.post("/query", json=QUERY).json()["cache_hit"] is False
+    assert rag_api.search_params["nprobe"] == 7
+    stats = api.client.get("/admin/indexes", headers={"X-Admin-Key": ADMIN_KEY}).json()
+    assert all(index["reloads"]["succeeded"] == 1 for index in stats.values())
+
+    # Actions taken through this worker's endpoints reach the other worker, once
+    headers = {"X-Admin-Key": ADMIN_KEY}
+    api.client.post("/admin/indexes/search-params?ef_search=40", headers=headers)
+    api.client.post("/admin/cache/invalidate", headers=headers)
+    assert rag_api.admin_state.pending() == []
+    assert dict(other_worker.pending()) == {
+        "search_params": {"nprobe": 7, "ef_search": 40},
+        "invalidate": {},
+    }
+
+
+def test_admission_rejects_with_429_and_503(api, monkeypatch):
+    admission = rag_api.llm_admission
+    monkeypatch.setattr(admission, "max_queue_size", {"interactive": 0, "bulk": 0})
+    response = api.client.post("/query", json=QUERY)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+    # No free slot and a short wait: the call times out in the queue
+    monkeypatch.setattr(admission, "max_queue_size", {"interactive": 4, "bulk": 4})
+    monkeypatch.setattr(admission, "max_concurrency", 0)
+    monkeypatch.setattr(admission, "max_wait_seconds", 0.01)
+    response = api.client.post("/query", json=QUERY)
+    assert response.status_code == 503
+
+
+def test_admin_routes_require_the_admin_key(api):
+    admin_routes = [
+        (method, route.path)
+        for route in rag_api.app.routes
+        if route.path.startswith("/admin")
+        for method in route.methods
+    ]
+    assert admin_routes
+    for method, path in admin_routes:
+        assert api.client.request(method, path).status_code == 403, path
+        wrong = api.client.request(method, path, headers={"X-Admin-Key": "wrong"})
+        assert wrong.status_code == 403, path
+
+    assert api.client.get("/admin/indexes", headers={"X-Admin-Key": ADMIN_KEY}).status_code == 200
+
+
+def test_profiling_requires_admin_and_rejects_concurrent_profiles(api):
+    headers = {"X-Profile": "1"}
+    assert api.client.post("/query", json=QUERY, headers=headers).status_code == 403
+
+    headers["X-Admin-Key"] = ADMIN_KEY
+    assert profiling._profile_lock.acquire(blocking=False)
+    try:
+        response = api.client.post("/query", json=QUERY, headers=headers)
+    finally:
+        profiling._profile_lock.release()
+    assert response.status_code == 409
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from src.rag_pipeline.cache_store import PersistentLRUCache
+from src.rag_pipeline.reranker import CrossEncoderReranker, chunk_id
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words found in the text."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.calls.append(list(pairs))
+        return [sum(word in text for word in query.split()) for query, text in pairs]
+
+
+def build_reranker():
+    reranker = CrossEncoderReranker("fake", PersistentLRUCache(None, 100), batch_size=8)
+    reranker._model = FakeCrossEncoder()
+    return reranker
+
+
+def documents():
+    return [
+        Document(page_content="metformin dose", id="a"),
+        Document(page_content="insulin degludec dose titration", id="b"),
+        Document(page_content="diet and exercise", id="c"),
+    ]
+
+
+def test_chunk_id_falls_back_to_text_hash():
+    assert chunk_id(Document(page_content="x", id="a")) == "a"
+    assert chunk_id(Document(page_content="x", metadata={"id": 7})) == "7"
+    assert chunk_id(Document(page_content="x")) == chunk_id(Document(page_content="x"))
+
+
+def test_order_keeps_best_scored_positions():
+    reranker = build_reranker()
+    order = reranker.order(["degludec dose", "diet"], [documents(), documents()], keep=2)
+    assert order[0] == [1, 0]
+    assert order[1][0] == 2
+    assert len(order[1]) == 2
+    # All pairs of both queries are scored in a single batch
+    assert len(reranker.model.calls) == 1
+    assert len(reranker.model.calls[0]) == 6
+
+
+def test_scores_are_cached_by_query_and_chunk():
+    reranker = build_reranker()
+    first = reranker.score(["degludec dose"], [documents()])
+    assert reranker.score(["degludec  dose "], [documents()]) == first
+    assert len(reranker.model.calls) == 1
+    assert reranker.stats()["memory_hits"] == 3
+
+    # The same chunk twice in one call is scored once
+    reranker.score(["metformin"], [documents()[:1] * 2])
+    assert len(reranker.model.calls[-1]) == 1
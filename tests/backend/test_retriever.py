@@ -0,0 +1,85 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("prometheus_client")
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import faiss
+
+from src.rag_pipeline import retriever
+from src.rag_pipeline.cache_store import PersistentLRUCache
+from src.rag_pipeline.index_types import EXACT_VECTORS_FILE
+from src.rag_pipeline.query_logger import serialize_document
+from src.rag_pipeline.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words found in the text."""
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        return [sum(word in text for word in query.split()) for query, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    reranker = CrossEncoderReranker("fake", PersistentLRUCache(None, 100), batch_size=8)
+    reranker._model = FakeCrossEncoder()
+    monkeypatch.setattr(retriever, "get_reranker", lambda: reranker)
+    monkeypatch.setattr(retriever, "ADAPTIVE_TOP_K", True)
+    monkeypatch.setattr(retriever, "RERANK_INDEXES", ("public",))
+    monkeypatch.setattr(retriever, "SIMILARITY_THRESHOLDS", {"public": 0.3})
+    return reranker
+
+
+def candidates():
+    return [
+        (Document(page_content="metformin dose", id="a"), 0.8),
+        (Document(page_content="insulin dose titration", id="b"), 0.7),
+        # Favored by the cross-encoder, but below the cosine threshold
+        (Document(page_content="insulin dose titration insulin", id="c"), 0.2),
+        (Document(page_content="diet", id="d"), 0.75),
+    ]
+
+
+def test_keep_results_cuts_on_cosine_then_reranks(reranker):
+    kept = retriever.keep_results("public", ["insulin dose"], [candidates()], top_n=2)[0]
+    assert [document.id for document, _ in kept] == ["b", "a"]
+    # The scores are the cosine similarities the cut was made on
+    assert [score for _, score in kept] == [0.7, 0.8]
+
+
+def test_keep_results_without_reranking_keeps_search_order(reranker):
+    # "c" is more than the relative gap below the best score
+    kept = retriever.keep_results("private", ["insulin dose"], [candidates()], top_n=4)[0]
+    assert [document.id for document, _ in kept] == ["a", "b", "d"]
+    kept = retriever.keep_results("public", None, [candidates()], top_n=3)[0]
+    assert [document.id for document, _ in kept] == ["a", "b", "d"]
+
+
+def test_scores_come_from_exact_vectors_and_reach_the_log(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(200, 8)).astype(np.float32)
+    index = faiss.index_factory(8, "SQ4")
+    index.train(vectors)
+    index.add(vectors)
+    retriever.enable_reconstruction(index)
+    np.save(tmp_path / EXACT_VECTORS_FILE, vectors)
+    ids = {row: str(row) for row in range(len(vectors))}
+    docstore = InMemoryDocstore({doc_id: Document(page_content=doc_id) for doc_id in ids.values()})
+    vectorstore = FAISS(None, retriever.with_exact_rerank(index, tmp_path, 4), docstore, ids)
+
+    query = vectors[17] + 0.01
+    results = retriever.search_by_vectors(vectorstore, [query], k=3)[0]
+    document, score = results[0]
+    row = int(document.page_content)
+    expected = vectors[row] @ query / np.linalg.norm(vectors[row]) / np.linalg.norm(query)
+    assert score == pytest.approx(float(expected), abs=1e-5)
+
+    formatted = retriever.format_results(results)
+    assert [entry["score"] for entry in formatted] == [score for _, score in results]
+    assert serialize_document(formatted[0])["score"] == score
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.rag_pipeline.semantic_cache import SemanticCache, cache_scope
+
+
+def make_cache(**overrides):
+    settings = {"similarity_threshold": 0.95, "ttl_seconds": 60, "max_entries": 2}
+    settings.update(overrides)
+    return SemanticCache(**settings)
+
+
+def test_similar_query_hits_cache():
+    cache = make_cache()
+    cache.add("patient", [1.0, 0.0, 0.0], {"combined_summary": "cached"})
+
+    assert cache.lookup("patient", [0.99, 0.05, 0.0]) == {"combined_summary": "cached"}
+    assert cache.lookup("patient", [0.0, 1.0, 0.0]) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_expired_entries_are_not_served():
+    cache = make_cache(ttl_seconds=-1)
+    cache.add("patient", [1.0, 0.0], {"combined_summary": "stale"})
+    assert cache.lookup("patient", [1.0, 0.0]) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache()
+    cache.add("patient", [1.0, 0.0, 0.0], {"id": "a"})
+    cache.add("patient", [0.0, 1.0, 0.0], {"id": "b"})
+    cache.lookup("patient", [1.0, 0.0, 0.0])
+    cache.add("patient", [0.0, 0.0, 1.0], {"id": "c"})
+
+    assert cache.lookup("patient", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("patient", [1.0, 0.0, 0.0]) == {"id": "a"}
+
+
+def test_invalidate_removes_all_entries():
+    cache = make_cache()
+    cache.add("patient", [1.0, 0.0], {"id": "a"})
+    assert cache.invalidate() == 1
+    assert cache.lookup("patient", [1.0, 0.0]) is None
+
+
+def test_patients_with_near_identical_text_do_not_share_entries():
+    cache = make_cache()
+    first = cache_scope("Age: 54, Gender: Female, HbA1c: 7.1, Pregnancy: None")
+    second = cache_scope("Age: 54, Gender: Female, HbA1c: 9.8, Pregnancy: None")
+    assert first != second
+    cache.add(first, [1.0, 0.0, 0.0], {"combined_summary": "first patient"})
+
+    # The same question about another patient misses, even with an identical embedding
+    assert cache.lookup(second, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup(first, [1.0, 0.0, 0.0]) == {"combined_summary": "first patient"}
+
+
+def test_partition_filters_are_part_of_the_scope():
+    cache = make_cache()
+    patient = "Age: 17, Gender: Female, Pregnancy: Pregnant"
+    children = cache_scope(patient, {"population": ["children"]})
+    pregnancy = cache_scope(patient, {"population": ["pregnancy", "children"]})
+    cache.add(children, [1.0, 0.0], {"combined_summary": "children guidance"})
+    assert cache.lookup(pregnancy, [1.0, 0.0]) is None
+
+
+def test_raw_patient_data_is_part_of_the_scope():
+    patient = "Age: 54, Gender: Female"
+    filters = {"population": ["general"]}
+    assert cache_scope(patient, filters, '{"hba1c_percent": 7.1}') != cache_scope(
+        patient, filters, '{"hba1c_percent": 9.8}'
+    )
@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import faiss
+
+from src.rag_pipeline.index_types import filtered_search, reconstruct_rows
+from src.rag_pipeline.sharded_index import ShardedIndex, combine_shards
+
+
+def build_shard(name, vectors):
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    documents = {
+        f"{name}-{i}": Document(page_content=f"{name} {i}", metadata={"source": name})
+        for i in range(len(vectors))
+    }
+    return FAISS(None, index, InMemoryDocstore(documents), dict(enumerate(documents)))
+
+
+def test_sharded_search_matches_single_index():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    queries = rng.normal(size=(5, 8)).astype(np.float32)
+    single = faiss.IndexFlatL2(8)
+    single.add(vectors)
+    shards = []
+    for rows in (vectors[:20], vectors[20:45], vectors[45:]):
+        shard = faiss.IndexFlatL2(8)
+        shard.add(rows)
+        shards.append(shard)
+
+    sharded = ShardedIndex(["a", "b", "c"], shards)
+    assert sharded.ntotal == 50
+    assert sharded.locate(20) == (1, 0)
+    expected_distances, expected_ids = single.search(queries, 10)
+    distances, ids = sharded.search(queries, 10)
+    np.testing.assert_array_equal(ids, expected_ids)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+
+def test_combined_shards_resolve_documents():
+    shards = {
+        "ada": build_shard("ada", np.eye(4, dtype=np.float32)[:2]),
+        "who": build_shard("who", np.eye(4, dtype=np.float32)[2:]),
+    }
+    vectorstore = combine_shards(shards)
+    assert len(vectorstore.index_to_docstore_id) == 4
+
+    hits = vectorstore.similarity_search_by_vector([0.0, 0.0, 0.0, 1.0], k=2)
+    assert hits[0].page_content == "who 1"
+    # k larger than a shard still returns the best results of all shards
+    hits = vectorstore.similarity_search_by_vector([1.0, 0.0, 0.0, 0.0], k=4)
+    assert len(hits) == 4
+    assert isinstance(vectorstore.docstore.search(4), str)
+
+
+def test_filtered_search_translates_rows_per_shard():
+    vectors = np.random.default_rng(1).normal(size=(30, 4)).astype(np.float32)
+    shards = []
+    for rows in (vectors[:10], vectors[10:]):
+        shard = faiss.IndexFlatL2(4)
+        shard.add(rows)
+        shards.append(shard)
+    sharded = ShardedIndex(["a", "b"], shards)
+
+    rows = np.array([3, 12, 25])
+    _, ids = filtered_search(sharded, vectors[[12]], 3)
+    assert ids[0, 0] == 12
+    _, ids = filtered_search(sharded, vectors[[0]], 5, rows)
+    assert sorted(ids[0][ids[0] >= 0]) == [3, 12, 25]
+
+
+def test_reconstruct_rows_across_shards():
+    vectors = np.random.default_rng(2).normal(size=(12, 4)).astype(np.float32)
+    shards = []
+    for rows in (vectors[:5], vectors[5:]):
+        shard = faiss.IndexFlatL2(4)
+        shard.add(rows)
+        shards.append(shard)
+    rows = [11, 0, 5, 4]
+    np.testing.assert_allclose(
+        reconstruct_rows(ShardedIndex(["a", "b"], shards), rows), vectors[rows]
+    )
@@ -0,0 +1,34 @@
+import asyncio
+
+from src.rag_pipeline.tracing import RequestTrace, current_trace, record_cache_event
+
+
+def test_record_cache_event_is_ignored_without_a_trace():
+    record_cache_event("completion", hit=True)
+    assert current_trace.get() is None
+
+
+def test_trace_is_shared_by_concurrent_tasks():
+    async def stage(name):
+        await asyncio.sleep(0)
+        current_trace.get().add_stage(name, 0.01)
+        record_cache_event("embedding", hit=name == "public")
+
+    async def main():
+        trace = RequestTrace()
+        token = current_trace.set(trace)
+        try:
+            await asyncio.gather(stage("public"), stage("private"))
+            trace.add_llm_call("test-model", input_tokens=10, output_tokens=3)
+            trace.add_llm_call("test-model", input_tokens=5, output_tokens=2)
+        finally:
+            current_trace.reset(token)
+        return trace.to_dict()
+
+    report = asyncio.run(main())
+
+    assert {stage["stage"] for stage in report["stages"]} == {"public", "private"}
+    assert report["input_tokens"] == 15
+    assert report["output_tokens"] == 5
+    assert sorted(event["hit"] for event in report["cache_events"]) == [False, True]
+    assert report["total_ms"] >= 0
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The RAG pipeline modules import each other by bare module name, matching the
+# PYTHONPATH set in docker/Dockerfile.backend.
+RAG_PIPELINE_DIR = Path(__file__).resolve().parent.parent / "src" / "rag_pipeline"
+if str(RAG_PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(RAG_PIPELINE_DIR))